@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import hashlib
+import importlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+BUILD_CACHE_FORMAT = "paper-build/1"
+# Imported once by the fork server; every bundle worker is forked from it warm.
+PRELOAD_MODULES = ["numpy", "scipy.stats", "matplotlib", "matplotlib.pyplot"]
+
+
+@dataclass(frozen=True)
+class BundleJob:
+    root: str
+    formats: str
+    fingerprint: str
+
+
+@dataclass
+class BundleResult:
+    bundle: str
+    status: str
+    timings: dict[str, float] = field(default_factory=dict)
+    error: str | None = None
+
+
+def discover_bundles(papers_dir: Path, only: list[str]) -> list[Path]:
+    bundles = sorted(path.parent.parent for path in papers_dir.glob("*/scripts/analyze_metrics.py"))
+    if only:
+        bundles = [bundle for bundle in bundles if bundle.name in only]
+    return bundles
+
+
+def _fingerprint(root: Path, formats: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps({"format": BUILD_CACHE_FORMAT, "formats": formats}).encode("utf-8"))
+    for path in sorted([*root.glob("output/metrics.jsonl"), *root.glob("scripts/*.py")]):
+        digest.update(str(path.relative_to(root)).encode("utf-8") + b"\0")
+        digest.update(path.read_bytes())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _cache_path(root: Path) -> Path:
+    return root / "output" / ".cache" / "build.json"
+
+
+def _is_current(root: Path, fingerprint: str) -> bool:
+    try:
+        cached = json.loads(_cache_path(root).read_text(encoding="utf-8")).get("fingerprint")
+    except (OSError, ValueError):
+        return False
+    return cached == fingerprint and (root / "output" / "analysis.json").exists()
+
+
+def _build_bundle(job: BundleJob) -> BundleResult:
+    root = Path(job.root)
+    result = BundleResult(bundle=root.name, status="built")
+    start = time.perf_counter()
+    # Each worker runs exactly one bundle, so bundle-local module names
+    # (analysis_lib, plots_lib, ...) never collide across papers.
+    os.chdir(root)
+    sys.path.insert(0, str(root / "scripts"))
+    try:
+        t0 = time.perf_counter()
+        analyze = importlib.import_module("analyze_metrics")
+        plot = importlib.import_module("plot_metrics")
+        result.timings["import_s"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        analyze.main(["--metrics", "output/metrics.jsonl", "--output-dir", "output", "--tables-dir", "tables"])
+        result.timings["analyze_s"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        plot.main(
+            [
+                "--analysis",
+                "output/analysis.json",
+                "--figures-dir",
+                "figures",
+                "--formats",
+                job.formats,
+            ]
+        )
+        result.timings["plot_s"] = time.perf_counter() - t0
+
+        cache_path = _cache_path(root)
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(
+            json.dumps({"format": BUILD_CACHE_FORMAT, "fingerprint": job.fingerprint}), encoding="utf-8"
+        )
+    except (Exception, SystemExit) as exc:
+        result.status = "failed"
+        result.error = "".join(traceback.format_exception_only(type(exc), exc)).strip()
+    finally:
+        result.timings["total_s"] = time.perf_counter() - start
+    return result
+
+
+def _pool(jobs: int) -> ProcessPoolExecutor:
+    methods = multiprocessing.get_all_start_methods()
+    if "forkserver" not in methods:
+        return ProcessPoolExecutor(
+            max_workers=jobs, mp_context=multiprocessing.get_context("spawn"), max_tasks_per_child=1
+        )
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(PRELOAD_MODULES)
+    return ProcessPoolExecutor(max_workers=jobs, mp_context=context, max_tasks_per_child=1)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Rebuild the analysis and figures of every bundle under papers/.")
+    parser.add_argument("--papers-dir", type=str, default="papers", help="Directory holding the paper bundles.")
+    parser.add_argument("--only", type=str, action="append", default=[], help="Bundle name to build (repeatable).")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Bundles built in parallel.")
+    parser.add_argument(
+        "--formats",
+        type=str,
+        default="png,svg",
+        help="Figure formats passed to plot_metrics.py (default: the PNG and SVG the bundles ship).",
+    )
+    parser.add_argument("--force", action="store_true", help="Rebuild bundles whose inputs are unchanged.")
+    parser.add_argument("--timings", type=str, default=None, help="Write per-bundle timings as JSON to this path.")
+    args = parser.parse_args(argv)
+
+    bundles = discover_bundles(Path(args.papers_dir), args.only)
+    if not bundles:
+        raise SystemExit(f"No bundles with scripts/analyze_metrics.py found under {args.papers_dir}.")
+    start = time.perf_counter()
+    results: list[BundleResult] = []
+    jobs: list[BundleJob] = []
+    for bundle in bundles:
+        fingerprint = _fingerprint(bundle, args.formats)
+        if not args.force and _is_current(bundle, fingerprint):
+            results.append(BundleResult(bundle=bundle.name, status="cached"))
+        else:
+            jobs.append(BundleJob(root=str(bundle.resolve()), formats=args.formats, fingerprint=fingerprint))
+    if jobs:
+        with _pool(max(1, min(args.jobs, len(jobs)))) as pool:
+            results.extend(pool.map(_build_bundle, jobs))
+        results.sort(key=lambda r: r.bundle)
+    wall = time.perf_counter() - start
+
+    width = max(len(r.bundle) for r in results)
+    for r in results:
+        stages = " ".join(f"{name[:-2]}={value:.2f}s" for name, value in r.timings.items()) or "-"
+        line = f"{r.bundle:<{width}}  {r.status:<6}  {stages}"
+        print(line if r.error is None else f"{line}  {r.error}")
+    failed = sum(r.status == "failed" for r in results)
+    print(f"build: {len(results)} bundles in {wall:.2f}s ({failed} failed)")
+    if args.timings:
+        payload: dict[str, Any] = {"wall_s": wall, "bundles": [asdict(r) for r in results]}
+        Path(args.timings).write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from statistics import NormalDist
+from typing import Any
+
+import numpy as np
+
+from output_lib import write_text_atomic
+from record_lib import TIER_ORDER, MetricRecord, canonical_tier
+from stats_lib import welch_t_pvalues
+
+ABLATION_CACHE_FORMAT = "ablation-cache/2"
+# Cached results are only as good as the code that produced them, so the
+# fingerprint covers these sources as well as the inputs and config.
+_SOURCE_FILES = tuple(
+    Path(__file__).with_name(f"{name}.py") for name in ("ablation_lib", "analysis_lib", "record_lib", "stats_lib")
+)
+SUMMARY_COLUMNS = ("suite", "metric_name", "case", "tier", "n", "mean", "std", "se", "ci_low", "ci_high")
+ABLATION_COLUMNS = (
+    "suite",
+    "metric_name",
+    "case",
+    "tier",
+    "baseline_tier",
+    "n",
+    "baseline_n",
+    "mean",
+    "baseline_mean",
+    "delta",
+    "delta_pct",
+    "p_value",
+)
+
+
+@dataclass(frozen=True)
+class AblationConfig:
+    baseline_tier: str = "summary"
+    tier_key: str = "memory_tier"
+    case_key: str = "scenario"
+    ci: float = 0.95
+
+
+@dataclass(frozen=True)
+class _Moments:
+    keys: list[tuple[str, ...]]
+    n: np.ndarray
+    mean: np.ndarray
+    var: np.ndarray
+
+
+class _Columns:
+    def __init__(self) -> None:
+        self.index: dict[tuple[str, ...], int] = {}
+        self.ids: list[int] = []
+
+    def add(self, key: tuple[str, ...]) -> None:
+        self.ids.append(self.index.setdefault(key, len(self.index)))
+
+    def moments(self, values: np.ndarray) -> _Moments:
+        ids = np.asarray(self.ids, dtype=np.int64)
+        size = len(self.index)
+        n = np.bincount(ids, minlength=size).astype(float)
+        mean = np.bincount(ids, weights=values, minlength=size) / np.maximum(n, 1.0)
+        sq = np.bincount(ids, weights=(values - mean[ids]) ** 2, minlength=size)
+        var = np.divide(sq, n - 1.0, out=np.zeros(size), where=n > 1)
+        return _Moments(keys=list(self.index), n=n, mean=mean, var=var)
+
+
+def _tier(record: MetricRecord, config: AblationConfig) -> str:
+    tier = record.tags.get(config.tier_key)
+    if tier is None:
+        return ""
+    return canonical_tier(str(tier)) or ""
+
+
+def compute_ablation(records: Iterable[MetricRecord], config: AblationConfig) -> dict[str, list[dict[str, Any]]]:
+    summaries = _Columns()
+    contrasts = _Columns()
+    values: list[float] = []
+    tiered: list[bool] = []
+    for record in records:
+        tier = _tier(record, config)
+        summaries.add((record.suite, record.metric_name, record.case, tier))
+        values.append(record.value)
+        tiered.append(bool(tier))
+        if tier:
+            case = str(record.tags.get(config.case_key, ""))
+            contrasts.add((record.suite, record.metric_name, case, tier))
+    arr = np.asarray(values, dtype=float)
+
+    summary = summaries.moments(arr)
+    se = np.sqrt(summary.var / np.maximum(summary.n, 1.0))
+    z = NormalDist().inv_cdf(0.5 + config.ci / 2.0)
+    summary_rows = [
+        dict(
+            zip(
+                SUMMARY_COLUMNS,
+                (*key, int(n), float(m), float(np.sqrt(v)), float(s), float(m - z * s), float(m + z * s)),
+            )
+        )
+        for key, n, m, v, s in zip(summary.keys, summary.n, summary.mean, summary.var, se)
+    ]
+
+    cells = contrasts.moments(arr[np.asarray(tiered, dtype=bool)])
+    baseline_of = {key[:3]: i for i, key in enumerate(cells.keys) if key[3] == config.baseline_tier}
+    # Rows are ordered by (suite, case) block, then tier, then metric. Tiers
+    # follow TIER_ORDER (unknown ones after it); blocks and metrics follow
+    # order of first appearance.
+    first_block: dict[tuple[str, str], int] = {}
+    first_tier: dict[str, int] = {}
+    for i, (suite, _, case, tier) in enumerate(cells.keys):
+        first_block.setdefault((suite, case), i)
+        first_tier.setdefault(tier, len(TIER_ORDER) + i if tier not in TIER_ORDER else TIER_ORDER.index(tier))
+    pairs = [
+        (i, baseline_of[key[:3]])
+        for i, key in enumerate(cells.keys)
+        if key[:3] in baseline_of and key[3] != config.baseline_tier
+    ]
+
+    def _order(pair: tuple[int, int]) -> tuple[int, int, int]:
+        suite, _, case, tier = cells.keys[pair[0]]
+        return first_block[suite, case], first_tier[tier], pair[0]
+
+    pairs.sort(key=_order)
+    if not pairs:
+        return {"summaries": summary_rows, "ablation": []}
+    idx = np.asarray([i for i, _ in pairs])
+    base = np.asarray([b for _, b in pairs])
+    delta = cells.mean[idx] - cells.mean[base]
+    delta_pct = np.divide(delta, cells.mean[base], out=np.full(delta.shape, np.nan), where=cells.mean[base] != 0)
+    p_values = welch_t_pvalues(
+        cells.mean[idx], cells.var[idx], cells.n[idx], cells.mean[base], cells.var[base], cells.n[base]
+    )
+    ablation_rows = [
+        dict(
+            zip(
+                ABLATION_COLUMNS,
+                (
+                    *cells.keys[i],
+                    config.baseline_tier,
+                    int(cells.n[i]),
+                    int(cells.n[b]),
+                    float(cells.mean[i]),
+                    float(cells.mean[b]),
+                    float(d),
+                    float(pct),
+                    float(p),
+                ),
+            )
+        )
+        for (i, b), d, pct, p in zip(pairs, delta, delta_pct, p_values)
+    ]
+    return {"summaries": summary_rows, "ablation": ablation_rows}
+
+
+def nest_summaries(rows: list[dict[str, Any]]) -> dict[str, Any]:
+    nested: dict[str, Any] = {}
+    for row in rows:
+        stats = {key: row[key] for key in ("n", "mean", "std", "se", "ci_low", "ci_high")}
+        nested.setdefault(row["metric_name"], {}).setdefault(row["case"], {})[row["tier"]] = stats
+    return nested
+
+
+def input_fingerprint(paths: Iterable[Path], config: AblationConfig) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps({"format": ABLATION_CACHE_FORMAT, **asdict(config)}, sort_keys=True).encode("utf-8"))
+    for source in _SOURCE_FILES:
+        digest.update(source.read_bytes())
+    for path in paths:
+        digest.update(str(path).encode("utf-8") + b"\0")
+        with path.open("rb") as handle:
+            for chunk in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(chunk)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def cache_path(cache_dir: Path, config: AblationConfig) -> Path:
+    # One file per configuration: new inputs overwrite their config's entry,
+    # so the cache stays bounded by the configs in use, not the runs seen.
+    key = hashlib.blake2b(json.dumps(asdict(config), sort_keys=True).encode("utf-8"), digest_size=8).hexdigest()
+    return cache_dir / f"ablation-{key}.json"
+
+
+def read_cached(cache_dir: Path, config: AblationConfig, fingerprint: str) -> dict[str, list[dict[str, Any]]] | None:
+    path = cache_path(cache_dir, config)
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if payload.get("format") != ABLATION_CACHE_FORMAT or payload.get("fingerprint") != fingerprint:
+        return None
+    return {"summaries": payload["summaries"], "ablation": payload["ablation"]}
+
+
+def write_cached(
+    cache_dir: Path,
+    config: AblationConfig,
+    fingerprint: str,
+    result: dict[str, list[dict[str, Any]]],
+) -> Path:
+    path = cache_path(cache_dir, config)
+    payload = {"format": ABLATION_CACHE_FORMAT, "fingerprint": fingerprint, **result}
+    write_text_atomic(path, json.dumps(payload))
+    return path
@@ -1,33 +1,55 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
+import zlib
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 from typing import Any
 
+import numpy as np
+
+from backend_lib import active_backend
+from histogram_lib import LatencyHistogram
+from metrics_log_lib import NO_STRING, NO_TS, MetricsLog
+from profile_lib import profile_stage
+from record_lib import TIER_ORDER, MetricRecord, Quarantine, decode_record, iter_metrics, normalize_tags
+from replay_lib import REPLAY_METRIC, REPLAY_SUITE, ReplayIndex, build_replay_report
+from sketch_lib import (
+    DEFAULT_SKETCH_K,
+    SUMMARY_QUANTILES,
+    PoissonBootstrap,
+    Reservoir,
+    StreamingSummary,
+    kll_rank_error,
+    sketch_cliffs_delta,
+)
+from spill_lib import SpillConfig, SpillStore
 from stats_lib import (
+    ValueCounts,
     benjamini_hochberg,
+    binned_kde,
     bootstrap_ci,
+    bootstrap_ci_counts,
+    bootstrap_cis,
     cliffs_delta,
+    cliffs_delta_counts,
     cohens_d,
+    cohens_d_from_moments,
     ks_test,
+    ks_test_counts,
     mann_whitney_u,
+    mann_whitney_u_counts,
     mean,
     median,
     required_n_two_sample_t,
+    sample_stats,
     std,
+    value_counts,
 )
+from timeline_lib import TIMELINE_METRICS, TimelineCollector, TimelineConfig, build_timelines
 
-
-REQUIRED_TIERS = {"no-memory", "summary", "vector", "graph", "hybrid"}
-VOLATILE_TAG_KEYS = {
-    "run_name",
-    "source_run_id",
-    "source_uid",
-    "step",
-    "snapshot_id",
-    "snapshot_created_at",
-}
+REQUIRED_TIERS = set(TIER_ORDER)
 DEFAULT_PRIMARY_METRICS = (
     "suite_a.accuracy",
     "suite_a.drift",
@@ -36,6 +58,11 @@ DEFAULT_PRIMARY_METRICS = (
     "completion.hash",
     "degradation.time_to_first_useful",
 )
+KDE_GRID_SIZE = 128
+# Metrics drawn as violins; only their groups carry a precomputed KDE.
+KDE_METRICS = frozenset({"suite_a.drift", "suite_a.faithfulness"})
+TAIL_METRIC_PREFIX = "load."
+TAIL_STATS = ("p50", "p95", "p99", "trim10")
 
 
 @dataclass(frozen=True)
@@ -45,6 +72,19 @@ class MetricGroup:
     tags: dict[str, str]
     values: list[float]
     run_ids: list[str]
+    summary: StreamingSummary | None = None
+    bootstrap: PoissonBootstrap | None = None
+    digests: list[bytes] = field(default_factory=list)
+    histogram: LatencyHistogram | None = None
+    reservoir: Reservoir | None = None
+
+    @property
+    def n(self) -> int:
+        return self.summary.n if self.summary is not None else len(self.values)
+
+    @property
+    def approximate(self) -> bool:
+        return self.summary is not None and self.summary.n != len(self.values)
 
 
 @dataclass(frozen=True)
@@ -56,55 +96,388 @@ class FrequentistProtocolConfig:
     primary_metrics: tuple[str, ...] = DEFAULT_PRIMARY_METRICS
 
 
-def _canonical_tier(value: str | None) -> str | None:
-    if value is None:
-        return None
-    raw = value.strip().lower()
-    if raw == "recent":
-        return "no-memory"
-    return raw
+@dataclass(frozen=True)
+class SketchConfig:
+    threshold: int = 10000
+    k: int = DEFAULT_SKETCH_K
 
 
-def _normalize_tags(tags: dict[str, Any]) -> dict[str, str]:
-    normalized: dict[str, str] = {}
-    for key, value in tags.items():
-        key_str = str(key)
-        if key_str in VOLATILE_TAG_KEYS:
-            continue
-        normalized[key_str] = str(value)
-    tier = normalized.get("memory_tier")
-    if tier is not None:
-        normalized["memory_tier"] = _canonical_tier(tier) or tier
-    return normalized
-
-
-def load_metrics(path: Path) -> list[dict[str, Any]]:
-    records: list[dict[str, Any]] = []
-    if not path.exists():
-        raise FileNotFoundError(f"metrics file not found: {path}")
-    with path.open("r", encoding="utf-8") as handle:
-        for line in handle:
-            line = line.strip()
-            if not line:
-                continue
-            records.append(json.loads(line))
-    return records
+@dataclass(frozen=True)
+class PoissonBootstrapConfig:
+    n_replicates: int = 1000
+    seed: int = 42
+    ci: float = 0.95
 
 
-def _group_metrics(records: list[dict[str, Any]]) -> list[MetricGroup]:
-    groups: dict[tuple[str, str, tuple[tuple[str, str], ...]], MetricGroup] = {}
+VALUES_MODES = ("full", "reservoir", "none")
+
+
+@dataclass(frozen=True)
+class ValuesConfig:
+    mode: str = "full"
+    k: int = 1000
+
+    @classmethod
+    def parse(cls, text: str) -> ValuesConfig:
+        mode, _, k = text.strip().lower().partition(":")
+        if mode not in VALUES_MODES:
+            raise ValueError(f"unknown values mode {text!r}; expected none, reservoir:K or full")
+        if mode != "reservoir":
+            if k:
+                raise ValueError(f"values mode {mode!r} takes no size")
+            return cls(mode=mode)
+        if not k:
+            return cls(mode=mode)
+        if not k.isdigit() or int(k) <= 0:
+            raise ValueError(f"reservoir size must be a positive integer, got {k!r}")
+        return cls(mode=mode, k=int(k))
+
+
+def load_metrics(path: Path, *, quarantine: Quarantine | None = None) -> list[MetricRecord]:
+    return list(iter_metrics(path, quarantine=quarantine))
+
+
+def dedup_records(records: Iterable[MetricRecord]) -> Iterator[MetricRecord]:
+    seen: set[bytes] = set()
     for record in records:
-        suite = str(record.get("suite") or "")
-        metric_name = str(record.get("metric_name") or "")
-        run_id = str(record.get("run_id") or "")
-        tags = _normalize_tags(record.get("tags") or {})
+        digest = record.digest
+        if digest in seen:
+            continue
+        seen.add(digest)
+        yield record
+
+
+GroupKey = tuple[str, str, tuple[tuple[str, str], ...]]
+
+
+class MetricGrouper:
+    def __init__(
+        self,
+        *,
+        sketch_config: SketchConfig | None = None,
+        bootstrap_config: PoissonBootstrapConfig | None = None,
+        values_config: ValuesConfig | None = None,
+        track_digests: bool = False,
+        timeline: TimelineCollector | None = None,
+        replay: ReplayIndex | None = None,
+        spill_config: SpillConfig | None = None,
+    ) -> None:
+        self.sketch_config = sketch_config
+        self.bootstrap_config = bootstrap_config
+        self.values_config = values_config
+        self.track_digests = track_digests
+        self.timeline = timeline
+        self.replay = replay
+        self._groups: dict[GroupKey, MetricGroup] = {}
+        self._run_ids: dict[GroupKey, set[str]] = {}
+        self._histograms: dict[GroupKey, LatencyHistogram] = {}
+        self._histogram_parts: dict[GroupKey, list[tuple[bytes, LatencyHistogram]]] = {}
+        self.spill = SpillStore(spill_config) if spill_config is not None else None
+        self._index: dict[GroupKey, int] = {}
+        self._run_codes: dict[str, int] = {}
+
+    def _group(self, suite: str, metric_name: str, tags: dict[str, str]) -> tuple[GroupKey, MetricGroup]:
         key = (suite, metric_name, tuple(sorted(tags.items())))
-        if key not in groups:
-            groups[key] = MetricGroup(suite=suite, metric_name=metric_name, tags=tags, values=[], run_ids=[])
-        groups[key].values.append(float(record.get("value") or 0.0))
-        if run_id:
-            groups[key].run_ids.append(run_id)
-    return list(groups.values())
+        group = self._groups.get(key)
+        if group is None:
+            summary = StreamingSummary(k=self.sketch_config.k) if self.sketch_config is not None else None
+            bootstrap = (
+                PoissonBootstrap(self.bootstrap_config.n_replicates, seed=self.bootstrap_config.seed)
+                if self.bootstrap_config is not None
+                else None
+            )
+            reservoir = (
+                Reservoir(self.values_config.k)
+                if self.values_config is not None and self.values_config.mode == "reservoir"
+                else None
+            )
+            group = MetricGroup(
+                suite=suite,
+                metric_name=metric_name,
+                tags=tags,
+                values=[],
+                run_ids=[],
+                summary=summary,
+                bootstrap=bootstrap,
+                reservoir=reservoir,
+            )
+            self._groups[key] = group
+            self._run_ids[key] = set()
+            if self.spill is not None:
+                self._index[key] = len(self._index)
+                self.spill.partition_of.append(_spill_partition(suite, metric_name, tags, self.spill.config))
+        return key, group
+
+    def add_record(self, record: MetricRecord | dict[str, Any]) -> None:
+        if type(record) is dict:
+            record = decode_record(record)
+        histogram = record.histogram
+        needs_digest = (
+            self.track_digests
+            or self.bootstrap_config is not None
+            or histogram is not None
+            or (self.values_config is not None and self.values_config.mode == "reservoir")
+        )
+        digest = record.digest if needs_digest else None
+        tags = normalize_tags(record.tags)
+        self.add_value(record.suite, record.metric_name, tags, record.value, record.run_id, digest)
+        if histogram is not None:
+            self.add_histogram(record.suite, record.metric_name, tags, histogram, digest)
+        if self.timeline is not None:
+            self.timeline.add_record(record, digest)
+        if self.replay is not None:
+            self.replay.add_record(record, digest)
+
+    def add_records(self, records: Iterable[MetricRecord] | MetricsLog) -> None:
+        if isinstance(records, MetricsLog):
+            self.add_log(records)
+            return
+        for record in records:
+            self.add_record(record)
+
+    def add_log(self, log: MetricsLog) -> None:
+        # Each block is split into groups with one stable sort over (suite,
+        # metric, normalized tag set) codes, so plain groups take their values
+        # and run ids straight from the columns. Sketch/bootstrap/reservoir
+        # groups, histograms and timeline/replay rows go through the same
+        # per-value paths add_record uses, without building records.
+        strings = log.strings
+        text = np.asarray(strings, dtype=object)
+        index = {value: i for i, value in enumerate(strings)}
+        per_value = (
+            self.sketch_config is not None
+            or self.bootstrap_config is not None
+            or (self.values_config is not None and self.values_config.mode == "reservoir")
+        )
+        needs_digest = self.track_digests or per_value
+        empty = index.get("", NO_STRING)
+        timeline_ids = np.asarray([index[m] for m in TIMELINE_METRICS if m in index], dtype=np.uint32)
+        replay_ids = (index.get(REPLAY_SUITE, NO_STRING), index.get(REPLAY_METRIC, NO_STRING))
+        raw_tags: dict[int, dict[str, Any]] = {}
+        tags_by_id: dict[int, dict[str, str]] = {}
+        codes_by_id: dict[int, int] = {}
+        codes: dict[tuple[tuple[str, str], ...], int] = {}
+        for block in log.iter_blocks():
+            tagset_ids, tagset_inv = np.unique(block["tagset"], return_inverse=True)
+            for tagset_id in tagset_ids.tolist():
+                if tagset_id not in codes_by_id:
+                    raw_tags[tagset_id] = json.loads(strings[tagset_id])
+                    tags_by_id[tagset_id] = normalize_tags(raw_tags[tagset_id])
+                    code_key = tuple(sorted(tags_by_id[tagset_id].items()))
+                    codes_by_id[tagset_id] = codes.setdefault(code_key, len(codes))
+            tag_codes = np.asarray([codes_by_id[t] for t in tagset_ids.tolist()], dtype=np.int64)[tagset_inv]
+            pairs = (block["suite"].astype(np.uint64) << np.uint64(32)) | block["metric"]
+            _, pair_inv = np.unique(pairs, return_inverse=True)
+            _, first, inv, counts = np.unique(
+                pair_inv.astype(np.int64) * len(codes) + tag_codes,
+                return_index=True,
+                return_inverse=True,
+                return_counts=True,
+            )
+            order = np.split(np.argsort(inv, kind="stable"), np.cumsum(counts)[:-1])
+            values, runs, digests = block["value"], block["run"], block["digest"]
+            for k in np.argsort(first).tolist():
+                rows = order[k]
+                head = block[rows[0]]
+                suite, metric = strings[head["suite"]], strings[head["metric"]]
+                tags = tags_by_id[int(head["tagset"])]
+                if per_value:
+                    row_digests = digests[rows].tolist() if needs_digest else [None] * len(rows)
+                    for value, run, digest in zip(values[rows].tolist(), runs[rows].tolist(), row_digests):
+                        self.add_value(suite, metric, tags, value, strings[run], digest)
+                    continue
+                key, group = self._group(suite, metric, tags)
+                if self.spill is not None:
+                    run_ids, run_inv = np.unique(runs[rows], return_inverse=True)
+                    run_codes = [-1 if r == empty else self._run_code(strings[r]) for r in run_ids.tolist()]
+                    self.spill.extend(
+                        np.full(len(rows), self._index[key]),
+                        values[rows],
+                        np.asarray(run_codes, dtype=np.int32)[run_inv],
+                    )
+                    continue
+                group.values.extend(values[rows].tolist())
+                if self.track_digests:
+                    group.digests.extend(digests[rows].tolist())
+                run_ids = runs[rows]
+                group.run_ids.extend(text[run_ids[run_ids != empty]].tolist())
+            has_histogram = block["histogram"] != NO_STRING
+            for row in np.flatnonzero(has_histogram).tolist():
+                record = block[row]
+                histogram = LatencyHistogram.from_payload(json.loads(strings[record["histogram"]]))
+                tags = tags_by_id[int(record["tagset"])]
+                digest = record["digest"].tobytes()
+                self.add_histogram(strings[record["suite"]], strings[record["metric"]], tags, histogram, digest)
+            if self.timeline is not None:
+                timed = np.isin(block["metric"], timeline_ids) & (block["ts"] != NO_TS)
+                for row in np.flatnonzero(timed).tolist():
+                    record = block[row]
+                    digest = record["digest"].tobytes() if needs_digest or has_histogram[row] else None
+                    self.timeline.add_sample(
+                        strings[record["run"]],
+                        str(raw_tags[int(record["tagset"])].get("scenario", "")),
+                        strings[record["metric"]],
+                        int(record["ts"]),
+                        float(record["value"]),
+                        digest,
+                    )
+            if self.replay is not None:
+                replayed = (block["suite"] == replay_ids[0]) & (block["metric"] == replay_ids[1])
+                for row in np.flatnonzero(replayed).tolist():
+                    record = block[row]
+                    digest = record["digest"].tobytes() if needs_digest or has_histogram[row] else None
+                    self.replay.add_record(
+                        MetricRecord(
+                            suite=REPLAY_SUITE,
+                            metric_name=REPLAY_METRIC,
+                            value=float(record["value"]),
+                            run_id=strings[record["run"]],
+                            case=strings[record["case"]],
+                            tags=raw_tags[int(record["tagset"])],
+                        ),
+                        digest,
+                    )
+
+    def add_histogram(
+        self,
+        suite: str,
+        metric_name: str,
+        tags: dict[str, str],
+        histogram: LatencyHistogram,
+        digest: bytes | None = None,
+    ) -> None:
+        key, _ = self._group(suite, metric_name, tags)
+        merged = self._histograms.get(key)
+        if merged is None:
+            merged = self._histograms[key] = LatencyHistogram(growth=histogram.growth)
+        merged.merge(histogram)
+        if self.track_digests and digest is not None:
+            self._histogram_parts.setdefault(key, []).append((digest, histogram))
+
+    def histogram_parts(self, group: MetricGroup) -> list[tuple[bytes, LatencyHistogram]]:
+        key = (group.suite, group.metric_name, tuple(sorted(group.tags.items())))
+        return list(self._histogram_parts.get(key, []))
+
+    def add_value(
+        self,
+        suite: str,
+        metric_name: str,
+        tags: dict[str, str],
+        value: float,
+        run_id: str,
+        digest: bytes | None = None,
+    ) -> None:
+        key, group = self._group(suite, metric_name, tags)
+        if group.bootstrap is not None and digest is not None:
+            group.bootstrap.add(value, int.from_bytes(digest[:8], "little"))
+        if group.reservoir is not None and digest is not None:
+            group.reservoir.add(value, int.from_bytes(digest[8:16], "little"))
+        if group.summary is None:
+            if self.spill is not None:
+                self.spill.add(self._index[key], value, self._run_code(run_id) if run_id else -1)
+                return
+            group.values.append(value)
+            if self.track_digests and digest is not None:
+                group.digests.append(digest)
+            if run_id:
+                group.run_ids.append(run_id)
+            return
+        group.summary.add(value)
+        if group.summary.n <= self.sketch_config.threshold:  # type: ignore[union-attr]
+            group.values.append(value)
+            if self.track_digests and digest is not None:
+                group.digests.append(digest)
+        elif group.values:
+            group.values.clear()
+            group.digests.clear()
+        self._add_run_id(key, group, run_id)
+
+    def add_summarized(self, other: MetricGroup) -> None:
+        key, group = self._group(other.suite, other.metric_name, other.tags)
+        if group.summary is None or other.summary is None:
+            raise ValueError("summarized groups can only be merged in sketch mode")
+        group.summary.merge(other.summary)
+        if group.bootstrap is not None and other.bootstrap is not None:
+            group.bootstrap.merge(other.bootstrap)
+        if group.reservoir is not None and other.reservoir is not None:
+            group.reservoir.merge(other.reservoir)
+        group.values.clear()
+        group.digests.clear()
+        for run_id in other.run_ids:
+            self._add_run_id(key, group, run_id)
+
+    def add_run_ids(self, suite: str, metric_name: str, tags: dict[str, str], run_ids: Iterable[str]) -> None:
+        key, group = self._group(suite, metric_name, tags)
+        for run_id in run_ids:
+            self._add_run_id(key, group, run_id)
+
+    def _add_run_id(self, key: GroupKey, group: MetricGroup, run_id: str) -> None:
+        if run_id and run_id not in self._run_ids[key]:
+            self._run_ids[key].add(run_id)
+            group.run_ids.append(run_id)
+
+    def _run_code(self, run_id: str) -> int:
+        code = self._run_codes.get(run_id)
+        if code is None:
+            code = self._run_codes[run_id] = len(self._run_codes)
+        return code
+
+    def groups(self) -> list[MetricGroup]:
+        return [
+            replace(group, histogram=self._histograms[key]) if key in self._histograms else group
+            for key, group in self._groups.items()
+        ]
+
+    def partitions(self) -> Iterator[list[MetricGroup]]:
+        groups = self.groups()
+        if self.spill is None:
+            yield groups
+            return
+        members: dict[int, list[int]] = {}
+        for index, partition in enumerate(self.spill.partition_of):
+            members.setdefault(partition, []).append(index)
+        names = np.asarray(list(self._run_codes), dtype=object)
+        for partition, rows in self.spill.partitions():
+            indices = range(len(groups)) if partition < 0 else members.get(partition, [])
+            found, starts = np.unique(rows["group"], return_index=True)
+            bounds = dict(zip(found.tolist(), zip(starts.tolist(), [*starts[1:].tolist(), len(rows)])))
+            part: list[MetricGroup] = []
+            for index in indices:
+                group = groups[index]
+                start, end = bounds.get(index, (0, 0))
+                runs = rows["run"][start:end]
+                if group.summary is None:
+                    group = replace(
+                        group,
+                        values=rows["value"][start:end].tolist(),
+                        run_ids=names[runs[runs >= 0]].tolist(),
+                    )
+                part.append(group)
+            yield part
+
+    def close(self) -> None:
+        if self.spill is not None:
+            self.spill.close()
+
+
+def _group_metrics(
+    records: Iterable[MetricRecord] | MetricsLog,
+    *,
+    sketch_config: SketchConfig | None = None,
+    bootstrap_config: PoissonBootstrapConfig | None = None,
+    values_config: ValuesConfig | None = None,
+    timeline: TimelineCollector | None = None,
+    replay: ReplayIndex | None = None,
+) -> list[MetricGroup]:
+    grouper = MetricGrouper(
+        sketch_config=sketch_config,
+        bootstrap_config=bootstrap_config,
+        values_config=values_config,
+        timeline=timeline,
+        replay=replay,
+    )
+    grouper.add_records(records)
+    return grouper.groups()
 
 
 def _validate_baselines(groups: list[MetricGroup]) -> None:
@@ -123,7 +496,30 @@ def _group_key_without(tags: dict[str, str], drop: str) -> tuple[tuple[str, str]
     return tuple(sorted((k, v) for k, v in tags.items() if k != drop))
 
 
-def _build_comparisons(groups: list[MetricGroup]) -> list[dict[str, Any]]:
+def _spill_partition(suite: str, metric_name: str, tags: dict[str, str], config: SpillConfig) -> int:
+    # Partitioned on what _build_comparisons pairs groups by, so every
+    # comparison finds its baseline within the same partition.
+    drop = "memory_tier" if "memory_tier" in tags else "scenario"
+    key = json.dumps([suite, metric_name, _group_key_without(tags, drop)])
+    return zlib.crc32(key.encode("utf-8")) % config.partitions
+
+
+def _group_counts(group: MetricGroup) -> ValueCounts | None:
+    # Only integer-valued groups (0/1 flags, small counts) take the count path:
+    # their count-weighted sums are exact, so every statistic matches the
+    # float path bit for bit.
+    if group.approximate:
+        return None
+    counts = value_counts(group.values)
+    return counts if counts is not None and counts.integral else None
+
+
+def _build_comparisons(
+    groups: list[MetricGroup],
+    counts: dict[int, ValueCounts | None] | None = None,
+) -> list[dict[str, Any]]:
+    if counts is None:
+        counts = {id(group): _group_counts(group) for group in groups}
     comparisons: list[dict[str, Any]] = []
     by_key: dict[tuple[str, str, tuple[tuple[str, str], ...], str], MetricGroup] = {}
     for group in groups:
@@ -151,6 +547,22 @@ def _build_comparisons(groups: list[MetricGroup]) -> list[dict[str, Any]]:
         else:
             continue
 
+        if group.approximate or baseline.approximate:
+            comparisons.append(_approximate_comparison(suite, metric, baseline, group))
+            continue
+
+        group_counts = counts.get(id(group))
+        baseline_counts = counts.get(id(baseline))
+        if group_counts is not None and baseline_counts is not None:
+            mean_compare, mean_baseline = group_counts.mean(), baseline_counts.mean()
+            delta = cliffs_delta_counts(group_counts, baseline_counts)
+            mw = mann_whitney_u_counts(group_counts, baseline_counts)
+            ks = ks_test_counts(group_counts, baseline_counts)
+        else:
+            mean_compare, mean_baseline = mean(group.values), mean(baseline.values)
+            delta = cliffs_delta(group.values, baseline.values)
+            mw = mann_whitney_u(group.values, baseline.values)
+            ks = ks_test(group.values, baseline.values)
         comp = {
             "suite": suite,
             "metric_name": metric,
@@ -158,20 +570,59 @@ def _build_comparisons(groups: list[MetricGroup]) -> list[dict[str, Any]]:
             "compare_tags": group.tags,
             "n_baseline": len(baseline.values),
             "n_compare": len(group.values),
-            "mean_baseline": mean(baseline.values),
-            "mean_compare": mean(group.values),
-            "delta_mean": mean(group.values) - mean(baseline.values),
+            "mean_baseline": mean_baseline,
+            "mean_compare": mean_compare,
+            "delta_mean": mean_compare - mean_baseline,
             "cohens_d": cohens_d(group.values, baseline.values),
-            "cliffs_delta": cliffs_delta(group.values, baseline.values),
+            "cliffs_delta": delta,
         }
-        mw = mann_whitney_u(group.values, baseline.values)
-        ks = ks_test(group.values, baseline.values)
         comp["p_mann_whitney"] = mw.p_value
         comp["p_ks"] = ks.p_value
         comparisons.append(comp)
     return comparisons
 
 
+def _approximate_comparison(
+    suite: str,
+    metric: str,
+    baseline: MetricGroup,
+    group: MetricGroup,
+) -> dict[str, Any]:
+    base_summary = _ensure_summary(baseline)
+    comp_summary = _ensure_summary(group)
+    return {
+        "suite": suite,
+        "metric_name": metric,
+        "baseline_tags": baseline.tags,
+        "compare_tags": group.tags,
+        "n_baseline": base_summary.n,
+        "n_compare": comp_summary.n,
+        "mean_baseline": base_summary.moments.mean,
+        "mean_compare": comp_summary.moments.mean,
+        "delta_mean": comp_summary.moments.mean - base_summary.moments.mean,
+        "cohens_d": cohens_d_from_moments(
+            comp_summary.n,
+            comp_summary.moments.mean,
+            comp_summary.moments.variance(),
+            base_summary.n,
+            base_summary.moments.mean,
+            base_summary.moments.variance(),
+        ),
+        "cliffs_delta": sketch_cliffs_delta(comp_summary, base_summary),
+        "p_mann_whitney": None,
+        "p_ks": None,
+        "approximate": True,
+    }
+
+
+def _ensure_summary(group: MetricGroup) -> StreamingSummary:
+    if group.summary is not None:
+        return group.summary
+    summary = StreamingSummary()
+    summary.extend(group.values)
+    return summary
+
+
 def _annotate_frequentist_protocol(
     comparisons: list[dict[str, Any]],
     *,
@@ -242,38 +693,249 @@ def _annotate_frequentist_protocol(
     }
 
 
+def _summarize_group(
+    group: MetricGroup,
+    bootstrap_config: PoissonBootstrapConfig | None,
+    values_config: ValuesConfig | None = None,
+    counts: ValueCounts | None = None,
+) -> dict[str, Any]:
+    row = _summarize_values(group, counts)
+    if group.bootstrap is not None and bootstrap_config is not None:
+        row["ci_low"], row["ci_high"] = group.bootstrap.ci(bootstrap_config.ci)
+        row["ci_method"] = "poisson_bootstrap"
+    if group.histogram is not None:
+        row["histogram"] = _summarize_histogram(group.histogram)
+    kde = _group_kde(group) if group.metric_name in KDE_METRICS else None
+    if kde is not None:
+        row["kde"] = kde
+    if values_config is not None and values_config.mode != "full":
+        row["values"] = group.reservoir.values() if group.reservoir is not None else []
+        row["n_runs"] = len(row.pop("run_ids"))
+    return row
+
+
+def _group_kde(group: MetricGroup) -> dict[str, Any] | None:
+    with profile_stage("kde"):
+        if group.approximate and group.summary is not None:
+            values, weights = group.summary.sketch.weighted_items()
+            kde = binned_kde(values, weights=weights, grid_size=KDE_GRID_SIZE)
+        else:
+            kde = binned_kde(group.values, grid_size=KDE_GRID_SIZE)
+    if kde is None:
+        return None
+    return {
+        "lo": kde.lo,
+        "hi": kde.hi,
+        "bandwidth": kde.bandwidth,
+        "density": [float(f"{d:.6g}") for d in kde.density],
+    }
+
+
+def _summarize_histogram(histogram: LatencyHistogram) -> dict[str, Any]:
+    return {
+        "count": histogram.count,
+        "mean": histogram.mean,
+        "relative_error": histogram.relative_error,
+        "percentiles": histogram.percentiles(),
+        "buckets": histogram.to_payload(),
+    }
+
+
+def _summarize_values(group: MetricGroup, counts: ValueCounts | None = None) -> dict[str, Any]:
+    if group.approximate and group.summary is not None:
+        ci_low, ci_high = group.summary.normal_ci()
+        return {
+            "suite": group.suite,
+            "metric_name": group.metric_name,
+            "tags": group.tags,
+            "n": group.summary.n,
+            "mean": group.summary.moments.mean,
+            "median": group.summary.quantile(0.5),
+            "std": group.summary.moments.std(),
+            "ci_low": ci_low,
+            "ci_high": ci_high,
+            "values": [],
+            "run_ids": sorted(set(group.run_ids)),
+            "approximate": True,
+            "quantiles": {f"p{round(q * 100):g}": group.summary.quantile(q) for q in SUMMARY_QUANTILES},
+        }
+    with profile_stage("bootstrap") as stage:
+        if counts is not None:
+            ci_low, ci_high = bootstrap_ci_counts(counts)
+        else:
+            ci_low, ci_high = bootstrap_ci(group.values, stat="mean")
+        stage.items = len(group.values)
+    row: dict[str, Any] = {
+        "suite": group.suite,
+        "metric_name": group.metric_name,
+        "tags": group.tags,
+        "n": len(group.values),
+        "mean": counts.mean() if counts is not None else mean(group.values),
+        "median": counts.median() if counts is not None else median(group.values),
+        "std": std(group.values),
+        "ci_low": ci_low,
+        "ci_high": ci_high,
+        "values": group.values,
+        "run_ids": sorted(set(group.run_ids)),
+    }
+    if group.summary is not None:
+        row["approximate"] = False
+    if group.metric_name.startswith(TAIL_METRIC_PREFIX) and group.histogram is None and len(group.values) > 1:
+        with profile_stage("tail_bootstrap") as stage:
+            row["tail"] = _tail_summary(group.values)
+            stage.items = len(group.values)
+    return row
+
+
+def _tail_summary(values: list[float]) -> dict[str, dict[str, float]]:
+    estimates = sample_stats(values, TAIL_STATS)
+    return {
+        stat: {"value": estimates[stat], "ci_low": low, "ci_high": high}
+        for stat, (low, high) in bootstrap_cis(values, TAIL_STATS).items()
+    }
+
+
 def aggregate_metrics(
-    records: list[dict[str, Any]],
+    records: Iterable[MetricRecord] | MetricsLog,
+    *,
+    protocol_config: FrequentistProtocolConfig | None = None,
+    sketch_config: SketchConfig | None = None,
+    bootstrap_config: PoissonBootstrapConfig | None = None,
+    values_config: ValuesConfig | None = None,
+    timeline_config: TimelineConfig | None = None,
+    spill_config: SpillConfig | None = None,
+) -> dict[str, Any]:
+    timeline = TimelineCollector() if timeline_config is not None else None
+    replay = ReplayIndex()
+    grouper = MetricGrouper(
+        sketch_config=sketch_config,
+        bootstrap_config=bootstrap_config,
+        values_config=values_config,
+        timeline=timeline,
+        replay=replay,
+        spill_config=spill_config,
+    )
+    try:
+        with profile_stage("group") as stage:
+            grouper.add_records(records)
+            groups = grouper.groups()
+            stage.items = len(groups)
+        analysis = aggregate_groups(
+            groups,
+            protocol_config=protocol_config,
+            sketch_config=sketch_config,
+            bootstrap_config=bootstrap_config,
+            values_config=values_config,
+            timeline=timeline,
+            timeline_config=timeline_config,
+            replay=replay,
+            partitions=grouper.partitions() if grouper.spill is not None else None,
+        )
+    finally:
+        grouper.close()
+    if grouper.spill is not None:
+        analysis["spill"] = {
+            "max_memory": spill_config.max_memory,  # type: ignore[union-attr]
+            "records": grouper.spill.records,
+            "spilled": grouper.spill.spilled,
+            "partitions": grouper.spill.config.partitions if grouper.spill.spilled else 1,
+        }
+    return analysis
+
+
+def _summarize_partition(
+    groups: list[MetricGroup],
+    bootstrap_config: PoissonBootstrapConfig | None,
+    values_config: ValuesConfig | None,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    with profile_stage("value_counts") as stage:
+        counts = {id(group): _group_counts(group) for group in groups}
+        stage.items = sum(c is not None for c in counts.values())
+    with profile_stage("summaries") as stage:
+        summary = [
+            _summarize_group(group, bootstrap_config, values_config, counts[id(group)]) for group in groups
+        ]
+        stage.items = len(summary)
+    with profile_stage("comparisons") as stage:
+        comparisons = _build_comparisons(groups, counts)
+        stage.items = len(comparisons)
+    return summary, comparisons
+
+
+def aggregate_groups(
+    groups: list[MetricGroup],
     *,
     protocol_config: FrequentistProtocolConfig | None = None,
+    sketch_config: SketchConfig | None = None,
+    bootstrap_config: PoissonBootstrapConfig | None = None,
+    values_config: ValuesConfig | None = None,
+    timeline: TimelineCollector | None = None,
+    timeline_config: TimelineConfig | None = None,
+    replay: ReplayIndex | None = None,
+    partitions: Iterable[list[MetricGroup]] | None = None,
 ) -> dict[str, Any]:
-    groups = _group_metrics(records)
     _validate_baselines(groups)
-    summary: list[dict[str, Any]] = []
-    for group in groups:
-        ci_low, ci_high = bootstrap_ci(group.values, stat="mean")
-        summary.append(
-            {
-                "suite": group.suite,
-                "metric_name": group.metric_name,
-                "tags": group.tags,
-                "n": len(group.values),
-                "mean": mean(group.values),
-                "median": median(group.values),
-                "std": std(group.values),
-                "ci_low": ci_low,
-                "ci_high": ci_high,
-                "values": group.values,
-                "run_ids": sorted(set(group.run_ids)),
-            }
+    if partitions is None:
+        summary, comparisons = _summarize_partition(groups, bootstrap_config, values_config)
+    else:
+        # Spilled groups arrive a partition at a time with their values; rows
+        # and comparisons are put back in the order the in-memory path emits.
+        order = {(g.suite, g.metric_name, tuple(sorted(g.tags.items()))): i for i, g in enumerate(groups)}
+        rows: list[dict[str, Any] | None] = [None] * len(groups)
+        comparisons = []
+        for part in partitions:
+            part_rows, part_comparisons = _summarize_partition(part, bootstrap_config, values_config)
+            for group, row in zip(part, part_rows):
+                rows[order[(group.suite, group.metric_name, tuple(sorted(group.tags.items())))]] = row
+            comparisons += part_comparisons
+        summary = [row for row in rows if row is not None]
+        comparisons.sort(
+            key=lambda c: order[(c["suite"], c["metric_name"], tuple(sorted(c["compare_tags"].items())))]
         )
-    comparisons = _build_comparisons(groups)
-    protocol = _annotate_frequentist_protocol(
-        comparisons,
-        config=protocol_config or FrequentistProtocolConfig(),
-    )
-    return {
+    with profile_stage("protocol") as stage:
+        protocol = _annotate_frequentist_protocol(
+            comparisons,
+            config=protocol_config or FrequentistProtocolConfig(),
+        )
+        stage.items = len(comparisons)
+    analysis: dict[str, Any] = {
         "groups": summary,
         "comparisons": comparisons,
         "frequentist_protocol": protocol,
+        "stats_backend": active_backend().name,
+    }
+    if sketch_config is not None:
+        analysis["aggregation"] = {
+            "mode": "sketch",
+            "threshold": sketch_config.threshold,
+            "sketch_k": sketch_config.k,
+            "quantile_rank_error_99": kll_rank_error(sketch_config.k),
+        }
+        analysis["approximate_groups"] = [
+            {"suite": g.suite, "metric_name": g.metric_name, "tags": g.tags, "n": g.n}
+            for g in groups
+            if g.approximate
+        ]
+    if bootstrap_config is not None:
+        analysis["bootstrap"] = {
+            "method": "poisson",
+            "n_replicates": bootstrap_config.n_replicates,
+            "seed": bootstrap_config.seed,
+            "ci": bootstrap_config.ci,
+        }
+    # Recorded even for "full" so consumers (the regression gate) can tell
+    # complete samples from reservoir subsamples.
+    values_mode = values_config.mode if values_config is not None else "full"
+    analysis["values"] = {
+        "mode": values_mode,
+        "k": values_config.k if values_config is not None and values_mode == "reservoir" else 0,
     }
+    if timeline is not None and timeline_config is not None and len(timeline):
+        with profile_stage("timelines") as stage:
+            analysis["timelines"] = build_timelines(timeline, timeline_config)
+            stage.items = len(timeline)
+    if replay is not None and len(replay):
+        with profile_stage("replay") as stage:
+            analysis["replay"] = build_replay_report(replay)
+            stage.items = len(replay)
+    return analysis
@@ -2,25 +2,37 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import json
+import sys
+from collections.abc import Iterable
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-from analysis_lib import aggregate_metrics, load_metrics
+from metrics_log_lib import METRICS_LOG_SUFFIX, MetricsLog, convert_to_log, is_metrics_log
+from output_lib import consistent_read, output_generation, write_text_atomic
+from profile_lib import is_profiling, profile_stage, profiling
+from record_lib import MetricRecord, Quarantine, RecordError, canonical_tier, iter_metrics
+from spill_lib import SpillConfig, parse_size
+from warehouse_lib import MetricsWarehouse, iter_warehouse_records
+from watch_lib import watch_metrics
+
+if TYPE_CHECKING:
+    from analysis_lib import PoissonBootstrapConfig, SketchConfig, TimelineConfig, ValuesConfig
+    from backend_lib import CrossCheckConfig
+    from sequential_lib import RunMeans, SequentialConfig
 
 
 def _write_json(path: Path, payload: Any) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
+    write_text_atomic(path, json.dumps(payload, indent=2, sort_keys=True))
 
 
-def _write_csv(path: Path, rows: list[dict[str, Any]]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
+def _write_csv(path: Path, rows: list[dict[str, Any]], headers: Iterable[str] | None = None) -> None:
     if not rows:
-        path.write_text("", encoding="utf-8")
+        write_text_atomic(path, "")
         return
-    headers = sorted({key for row in rows for key in row})
+    headers = list(headers) if headers is not None else sorted({key for row in rows for key in row})
     lines = [",".join(headers)]
     for row in rows:
         line = []
@@ -31,7 +43,7 @@ def _write_csv(path: Path, rows: list[dict[str, Any]]) -> None:
             else:
                 line.append(str(val).replace(",", ";"))
         lines.append(",".join(line))
-    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    write_text_atomic(path, "\n".join(lines) + "\n")
 
 
 def _flatten_groups(groups: list[dict[str, Any]], comparisons: list[dict[str, Any]]) -> list[dict[str, Any]]:
@@ -59,6 +71,10 @@ def _flatten_groups(groups: list[dict[str, Any]], comparisons: list[dict[str, An
             "ci_low": group.get("ci_low", 0.0),
             "ci_high": group.get("ci_high", 0.0),
         }
+        histogram = group.get("histogram")
+        if histogram:
+            for name, value in histogram["percentiles"].items():
+                row[f"hist_{name}"] = value
         comp = comparison_index.get(
             (
                 row["suite"],
@@ -76,7 +92,6 @@ def _flatten_groups(groups: list[dict[str, Any]], comparisons: list[dict[str, An
 
 
 def _write_tex(path: Path, rows: list[dict[str, Any]]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
     headers = ["suite", "metric", "tier", "scenario", "mean", "ci_low", "ci_high", "cohens_d", "p_mw"]
 
     def _escape(text: str) -> str:
@@ -105,12 +120,45 @@ def _write_tex(path: Path, rows: list[dict[str, Any]]) -> None:
             f"{row.get('mean', 0.0):.3f}",
             f"{row.get('ci_low', 0.0):.3f}",
             f"{row.get('ci_high', 0.0):.3f}",
-            f"{row.get('cohens_d', 0.0):.3f}",
-            f"{row.get('p_mann_whitney', 1.0):.3f}",
+            _format_value(row.get("cohens_d", 0.0)),
+            _format_value(row.get("p_mann_whitney", 1.0)),
         ]
         lines.append(" & ".join(values) + " \\\\")
     lines += ["\\hline", "\\end{tabular}", ""]
-    path.write_text("\n".join(lines), encoding="utf-8")
+    write_text_atomic(path, "\n".join(lines))
+
+
+def _write_ablation_tex(path: Path, rows: list[dict[str, Any]]) -> None:
+    def _escape(text: str) -> str:
+        return (
+            text.replace("\\", "\\textbackslash{}")
+            .replace("&", "\\&")
+            .replace("%", "\\%")
+            .replace("$", "\\$")
+            .replace("#", "\\#")
+            .replace("_", "\\_")
+            .replace("{", "\\{")
+            .replace("}", "\\}")
+        )
+
+    lines = [
+        "\\begin{tabular}{llllrrr}",
+        "suite & metric & case & tier & delta & delta\\_pct & p\\_value \\\\",
+        "\\hline",
+    ]
+    for row in rows:
+        values = [
+            _escape(str(row["suite"])),
+            _escape(str(row["metric_name"])),
+            _escape(str(row["case"])),
+            _escape(str(row["tier"])),
+            f"{row['delta']:.3f}",
+            f"{row['delta_pct']:.3f}",
+            f"{row['p_value']:.3f}",
+        ]
+        lines.append(" & ".join(values) + " \\\\")
+    lines += ["\\hline", "\\end{tabular}", ""]
+    write_text_atomic(path, "\n".join(lines))
 
 
 def _find_row(
@@ -144,7 +192,6 @@ def _format_value(value: Any) -> str:
 
 
 def _write_summary_anchor(path: Path, rows: list[dict[str, Any]]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
     anchors = []
     a_no_acc = _find_row(
         rows,
@@ -242,19 +289,19 @@ def _write_summary_anchor(path: Path, rows: list[dict[str, Any]]) -> None:
             "replay": "-",
         }
     )
-    c_replay = _find_row(
-        rows,
-        suite="C",
-        metric="completion.hash",
-        scenario="",
-        tier="",
-    )
-    replay_text = "-"
-    if c_replay:
-        n = int(c_replay.get("n", 0))
-        mean = float(c_replay.get("mean", 0.0))
-        success = int(round(mean * n)) if n else 0
-        replay_text = f"{success}/{n} (hash match)" if n else "-"
+    # Each completion.hash value is that run's hash-match flag. The hash tag
+    # splits the records into one group per distinct hash, so pool them all.
+    c_replay = [
+        row
+        for row in rows
+        if row.get("suite") == "C"
+        and row.get("metric_name") == "completion.hash"
+        and row.get("scenario") == ""
+        and row.get("memory_tier") == ""
+    ]
+    n = sum(int(row.get("n", 0)) for row in c_replay)
+    success = int(round(sum(float(row.get("mean", 0.0)) * int(row.get("n", 0)) for row in c_replay)))
+    replay_text = f"{success}/{n} (hash match)" if n else "-"
     anchors.append(
         {
             "anchor": "C replay",
@@ -294,24 +341,49 @@ def _write_summary_anchor(path: Path, rows: list[dict[str, Any]]) -> None:
         ]
         lines.append(" & ".join(values) + " \\\\")
     lines += ["\\hline", "\\end{tabular}", ""]
-    path.write_text("\n".join(lines), encoding="utf-8")
+    write_text_atomic(path, "\n".join(lines))
 
 
-def load_metrics_from_paths(paths: list[Path]) -> list[dict[str, Any]]:
-    seen: set[str] = set()
-    records: list[dict[str, Any]] = []
-    for path in paths:
-        if not path.exists() or not path.is_file():
-            continue
-        for record in load_metrics(path):
-            key = json.dumps(record, sort_keys=True)
-            if key in seen:
-                continue
-            seen.add(key)
-            records.append(record)
+def _iter_path(path: Path, *, quarantine: Quarantine | None = None) -> Iterable[MetricRecord]:
+    if is_metrics_log(path):
+        return MetricsLog(path).iter_records()
+    return iter_metrics(path, quarantine=quarantine)
+
+
+def iter_metrics_from_paths(paths: list[Path], *, quarantine: Quarantine | None = None) -> Iterable[MetricRecord]:
+    from analysis_lib import dedup_records
+
+    files = [path for path in paths if path.exists() and path.is_file()]
+    if not is_profiling():
+        return dedup_records(record for path in files for record in _iter_path(path, quarantine=quarantine))
+    with profile_stage("decode") as stage:
+        raw = [record for path in files for record in _iter_path(path, quarantine=quarantine)]
+        stage.items = len(raw)
+    with profile_stage("dedup") as stage:
+        records = list(dedup_records(raw))
+        stage.items = len(records)
     return records
 
 
+def metrics_source(
+    paths: list[Path],
+    *,
+    quarantine: Quarantine | None = None,
+) -> Iterable[MetricRecord] | MetricsLog:
+    # A lone metrics log is grouped column-wise straight from the memory map;
+    # anything else (JSONL, or a log mixed with JSONL) is decoded per record.
+    if len(paths) == 1 and paths[0].is_file() and is_metrics_log(paths[0]):
+        with profile_stage("open_log") as stage:
+            log = MetricsLog(paths[0])
+            stage.items = len(log)
+        return log
+    return iter_metrics_from_paths(paths, quarantine=quarantine)
+
+
+def load_metrics_from_paths(paths: list[Path], *, quarantine: Quarantine | None = None) -> list[MetricRecord]:
+    return list(iter_metrics_from_paths(paths, quarantine=quarantine))
+
+
 def _expand_metrics_paths(values: list[str]) -> list[Path]:
     if not values:
         return []
@@ -343,15 +415,174 @@ def _latest_artifacts(root: Path) -> list[Path]:
     return metrics_paths
 
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Aggregate system-paper metrics into analysis tables.")
+def _write_analysis(
+    analysis: dict[str, Any],
+    sources: list[str],
+    output_dir: Path,
+    tables_dir: Path,
+) -> None:
+    analysis["generated_at"] = datetime.now(timezone.utc).isoformat()
+    analysis["source_metrics"] = sources
+
+    with profile_stage("writers") as stage, output_generation(output_dir, tables_dir):
+        _write_json(output_dir / "analysis.json", analysis)
+        rows = _flatten_groups(analysis["groups"], analysis["comparisons"])
+        _write_csv(output_dir / "analysis.csv", rows)
+        _write_csv(tables_dir / "metrics_summary.csv", rows)
+        _write_json(tables_dir / "metrics_summary.json", rows)
+        _write_tex(tables_dir / "metrics_summary.tex", rows)
+        _write_summary_anchor(tables_dir / "summary_anchor.tex", rows)
+        stage.items = len(rows)
+
+
+def _write_analysis_outputs(
+    records: Iterable[MetricRecord] | MetricsLog,
+    metric_paths: list[Path],
+    output_dir: Path,
+    tables_dir: Path,
+    *,
+    sketch_config: SketchConfig | None = None,
+    bootstrap_config: PoissonBootstrapConfig | None = None,
+    values_config: ValuesConfig | None = None,
+    timeline_config: TimelineConfig | None = None,
+    quarantine: Quarantine | None = None,
+    cross_check: CrossCheckConfig | None = None,
+    spill_config: SpillConfig | None = None,
+) -> None:
+    from analysis_lib import aggregate_metrics
+    from backend_lib import cross_check_outputs, using_backend
+
+    if cross_check is not None and not isinstance(records, MetricsLog):
+        records = list(records)
+    analysis = aggregate_metrics(
+        records,
+        sketch_config=sketch_config,
+        bootstrap_config=bootstrap_config,
+        values_config=values_config,
+        timeline_config=timeline_config,
+        spill_config=spill_config,
+    )
+    if cross_check is not None:
+        with profile_stage("cross_check"), using_backend(cross_check.backend):
+            reference = aggregate_metrics(
+                records,
+                sketch_config=sketch_config,
+                bootstrap_config=bootstrap_config,
+                values_config=values_config,
+                timeline_config=timeline_config,
+                spill_config=spill_config,
+            )
+        mismatches = cross_check_outputs(analysis, reference, cross_check)
+        pair = f"{analysis['stats_backend']} vs {reference['stats_backend']}"
+        if mismatches:
+            shown = "\n".join(f"  {path}: {left!r} != {right!r}" for path, left, right in mismatches[:10])
+            raise SystemExit(
+                f"cross-check failed: {pair} differ in {len(mismatches)} values "
+                f"(rtol={cross_check.rtol:g}, atol={cross_check.atol:g})\n{shown}"
+            )
+        analysis["cross_check"] = {
+            "backend": reference["stats_backend"],
+            "rtol": cross_check.rtol,
+            "atol": cross_check.atol,
+            "mismatches": 0,
+        }
+        print(f"cross-check: {pair} agree (rtol={cross_check.rtol:g}, atol={cross_check.atol:g})")
+    if quarantine is not None:
+        analysis["ingest"] = quarantine.report()
+    _write_analysis(analysis, [str(path) for path in metric_paths], output_dir, tables_dir)
+
+
+def _watch(
+    metrics_inputs: list[str],
+    output_dir: Path,
+    tables_dir: Path,
+    figures_dir: Path | None,
+    *,
+    poll_interval: float,
+    debounce: float,
+    sketch_config: SketchConfig | None,
+    bootstrap_config: PoissonBootstrapConfig | None,
+    values_config: ValuesConfig | None,
+    timeline_config: TimelineConfig | None,
+    quarantine: Quarantine | None,
+) -> int:
+    if figures_dir is not None:
+        from plots_lib import generate_figures
+
+    # After a failed refresh the figures of that batch are stale, so the next
+    # refresh redraws all of them instead of only the newly changed metrics.
+    stale = False
+
+    def _on_update(records: list[MetricRecord], changed: set[str] | None) -> None:
+        nonlocal stale
+        if stale:
+            changed, stale = None, False
+        metric_paths = _expand_metrics_paths(metrics_inputs)
+        try:
+            _write_analysis_outputs(
+                records,
+                metric_paths,
+                output_dir,
+                tables_dir,
+                sketch_config=sketch_config,
+                bootstrap_config=bootstrap_config,
+                values_config=values_config,
+                timeline_config=timeline_config,
+                quarantine=quarantine,
+            )
+        except Exception as exc:
+            # A watcher outlives bad batches: report and wait for the next write.
+            print(f"watch: analysis skipped: {type(exc).__name__}: {exc}")
+            stale = True
+            return
+        if figures_dir is not None:
+            try:
+                generate_figures(output_dir / "analysis.json", figures_dir, metric_names=changed)
+            except Exception as exc:
+                print(f"watch: figures skipped: {type(exc).__name__}: {exc}")
+                stale = True
+        scope = "all" if changed is None else ", ".join(sorted(changed))
+        print(f"watch: {len(records)} records, updated {scope}")
+
+    try:
+        asyncio.run(
+            watch_metrics(
+                lambda: _expand_metrics_paths(metrics_inputs),
+                _on_update,
+                poll_interval=poll_interval,
+                debounce=debounce,
+                quarantine=quarantine,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if quarantine is not None:
+            quarantine.close()
+    return 0
+
+
+def _add_metrics_args(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         "--metrics",
         type=str,
         action="append",
         default=[],
-        help="Metrics JSONL path or directory (repeatable).",
+        help=f"Metrics JSONL path, directory or *{METRICS_LOG_SUFFIX} metrics log (repeatable).",
     )
+    parser.add_argument(
+        "--quarantine",
+        type=str,
+        default=None,
+        help="Skip malformed metrics lines and record them (with file:line) in this JSONL file.",
+    )
+
+
+def _add_db_arg(parser: argparse.ArgumentParser, *, required: bool = False, help_text: str) -> None:
+    parser.add_argument("--db", type=str, required=required, default=None, help=help_text)
+
+
+def _add_output_args(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         "--output-dir",
         type=str,
@@ -364,30 +595,746 @@ def main() -> int:
         default="research/papers/event-driven-agentic-memory/tables",
         help="Directory for tables outputs.",
     )
-    args = parser.parse_args()
 
-    metrics_inputs = args.metrics or [
+
+def _add_aggregation_args(parser: argparse.ArgumentParser) -> None:
+    from analysis_lib import PoissonBootstrapConfig, SketchConfig
+
+    parser.add_argument(
+        "--sketch",
+        action="store_true",
+        help="Summarize large groups with constant-memory streaming sketches (approximate quantiles).",
+    )
+    parser.add_argument(
+        "--sketch-threshold",
+        type=int,
+        default=SketchConfig.threshold,
+        help="Group size above which --sketch drops raw values and reports sketch estimates.",
+    )
+    parser.add_argument(
+        "--sketch-k",
+        type=int,
+        default=SketchConfig.k,
+        help="KLL sketch accuracy parameter; quantile rank error scales as ~1/k.",
+    )
+    parser.add_argument(
+        "--poisson-bootstrap",
+        action="store_true",
+        help="Compute mean CIs with a single-pass, mergeable Poisson bootstrap during ingestion.",
+    )
+    parser.add_argument(
+        "--bootstrap-replicates",
+        type=int,
+        default=PoissonBootstrapConfig.n_replicates,
+        help="Number of Poisson bootstrap replicates.",
+    )
+    parser.add_argument(
+        "--bootstrap-seed",
+        type=int,
+        default=PoissonBootstrapConfig.seed,
+        help="Seed for Poisson bootstrap weights.",
+    )
+    parser.add_argument(
+        "--values-mode",
+        type=str,
+        default="full",
+        help="Raw values written per group: full, reservoir:K (deterministic K-sample) or none.",
+    )
+
+
+def _add_backend_arg(parser: argparse.ArgumentParser) -> None:
+    from backend_lib import backend_names
+
+    parser.add_argument(
+        "--stats-backend",
+        type=str,
+        default="auto",
+        help=f"Statistics engine: {', '.join(backend_names())} (auto uses scipy, else numpy; numba must be asked for).",
+    )
+
+
+def _stats_backend(args: argparse.Namespace) -> None:
+    from backend_lib import set_backend
+
+    try:
+        set_backend(args.stats_backend)
+    except ValueError as exc:
+        raise SystemExit(f"--stats-backend: {exc}") from exc
+
+
+def _add_timeline_args(parser: argparse.ArgumentParser) -> None:
+    from analysis_lib import TimelineConfig
+
+    parser.add_argument(
+        "--timeline-window",
+        type=float,
+        default=TimelineConfig.window_s,
+        help="Bucket width in seconds for Suite B throughput/error/latency timelines.",
+    )
+    parser.add_argument(
+        "--warmup",
+        type=float,
+        default=TimelineConfig.warmup_s,
+        help="Seconds trimmed from the start of each run for steady-state timeline numbers.",
+    )
+    parser.add_argument(
+        "--cooldown",
+        type=float,
+        default=TimelineConfig.cooldown_s,
+        help="Seconds trimmed from the end of each run for steady-state timeline numbers.",
+    )
+
+
+def _timeline_config(args: argparse.Namespace) -> TimelineConfig:
+    from analysis_lib import TimelineConfig
+
+    if args.timeline_window <= 0:
+        raise SystemExit("--timeline-window must be positive")
+    return TimelineConfig(window_s=args.timeline_window, warmup_s=args.warmup, cooldown_s=args.cooldown)
+
+
+def _metrics_inputs(args: argparse.Namespace) -> list[str]:
+    return args.metrics or [
         "research/papers/event-driven-agentic-memory/output/metrics.jsonl",
         "artifacts",
     ]
+
+
+def _quarantine(args: argparse.Namespace) -> Quarantine | None:
+    return Quarantine(Path(args.quarantine)) if args.quarantine else None
+
+
+def _report_quarantine(quarantine: Quarantine | None) -> None:
+    if quarantine is None:
+        return
+    quarantine.close()
+    report = quarantine.report()
+    reasons = ", ".join(f"{reason}={count}" for reason, count in report["reasons"].items())
+    line = f"decode: {report['decoded']} records, {report['rejected']} rejected"
+    if report["rejected"]:
+        line += f" ({reasons}); see {report['quarantine']}"
+    print(line)
+
+
+def _aggregation_configs(
+    args: argparse.Namespace,
+) -> tuple[SketchConfig | None, PoissonBootstrapConfig | None, ValuesConfig | None]:
+    from analysis_lib import PoissonBootstrapConfig, SketchConfig, ValuesConfig
+
+    sketch_config = SketchConfig(threshold=args.sketch_threshold, k=args.sketch_k) if args.sketch else None
+    bootstrap_config = (
+        PoissonBootstrapConfig(n_replicates=args.bootstrap_replicates, seed=args.bootstrap_seed)
+        if args.poisson_bootstrap
+        else None
+    )
+    try:
+        values_config = ValuesConfig.parse(args.values_mode)
+    except ValueError as exc:
+        raise SystemExit(f"--values-mode: {exc}") from exc
+    return sketch_config, bootstrap_config, None if values_config.mode == "full" else values_config
+
+
+def _cmd_partial(argv: list[str]) -> int:
+    from partial_lib import build_partial, write_partial
+
+    parser = argparse.ArgumentParser(
+        prog="analyze_metrics.py partial",
+        description="Reduce local metrics into a mergeable partial-aggregate file.",
+    )
+    _add_metrics_args(parser)
+    _add_aggregation_args(parser)
+    parser.add_argument("--out", type=str, required=True, help="Partial file path (.json or .json.gz).")
+    args = parser.parse_args(argv)
+
+    metric_paths = _expand_metrics_paths(_metrics_inputs(args))
+    if not metric_paths:
+        raise SystemExit("No metrics files found for analysis.")
+    sketch_config, bootstrap_config, values_config = _aggregation_configs(args)
+    quarantine = _quarantine(args)
+    try:
+        payload = build_partial(
+            metrics_source(metric_paths, quarantine=quarantine),
+            source_metrics=[str(path) for path in metric_paths],
+            sketch_config=sketch_config,
+            bootstrap_config=bootstrap_config,
+            values_config=values_config,
+        )
+    except RecordError as exc:
+        raise SystemExit(f"{exc} (use --quarantine PATH to skip malformed lines)") from exc
+    _report_quarantine(quarantine)
+    out = Path(args.out)
+    write_partial(out, payload)
+    print(f"partial: wrote {out} ({len(payload['groups'])} groups, {out.stat().st_size} bytes)")
+    return 0
+
+
+def _cmd_merge(argv: list[str]) -> int:
+    from analysis_lib import aggregate_groups
+    from partial_lib import merge_partials, read_partial
+
+    parser = argparse.ArgumentParser(
+        prog="analyze_metrics.py merge",
+        description="Merge partial-aggregate files into analysis tables.",
+    )
+    parser.add_argument("partials", nargs="+", help="Partial files, in the order their metrics should be read.")
+    _add_output_args(parser)
+    _add_timeline_args(parser)
+    _add_backend_arg(parser)
+    args = parser.parse_args(argv)
+    _stats_backend(args)
+
+    with consistent_read(*map(Path, args.partials)):
+        partials = [read_partial(Path(path)) for path in args.partials]
+    groups, timeline, replay, sketch_config, bootstrap_config, values_config, sources = merge_partials(partials)
+    analysis = aggregate_groups(
+        groups,
+        sketch_config=sketch_config,
+        bootstrap_config=bootstrap_config,
+        values_config=values_config,
+        timeline=timeline,
+        timeline_config=_timeline_config(args),
+        replay=replay,
+    )
     output_dir = Path(args.output_dir)
     tables_dir = Path(args.tables_dir)
+    _write_analysis(analysis, sources, output_dir, tables_dir)
+    print(f"merge: wrote {output_dir / 'analysis.json'} from {len(partials)} partials")
+    return 0
+
+
+def _cmd_convert(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="analyze_metrics.py convert",
+        description="Append metrics JSONL files to a compact binary metrics log.",
+    )
+    _add_metrics_args(parser)
+    parser.add_argument(
+        "--out",
+        type=str,
+        required=True,
+        help=f"Metrics log path (conventionally *{METRICS_LOG_SUFFIX}; appended to if it exists).",
+    )
+    args = parser.parse_args(argv)
+
+    out = Path(args.out)
+    metric_paths = [
+        path
+        for path in _expand_metrics_paths(_metrics_inputs(args))
+        if path.is_file() and path.resolve() != out.resolve()
+    ]
+    if not metric_paths:
+        raise SystemExit("No metrics files found to convert.")
+    quarantine = _quarantine(args)
+    try:
+        appended, duplicates = convert_to_log(iter_metrics_from_paths(metric_paths, quarantine=quarantine), out)
+    except RecordError as exc:
+        raise SystemExit(f"{exc} (use --quarantine PATH to skip malformed lines)") from exc
+    _report_quarantine(quarantine)
+    print(
+        f"convert: appended {appended} records ({duplicates} already in the log) from {len(metric_paths)} files "
+        f"to {out} ({out.stat().st_size} bytes)"
+    )
+    return 0
+
 
-    metric_paths = _expand_metrics_paths(metrics_inputs)
+def _cmd_ingest(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="analyze_metrics.py ingest",
+        description="Load metrics JSONL files into a local SQLite warehouse.",
+    )
+    _add_db_arg(parser, required=True, help_text="Warehouse database path (created if missing).")
+    _add_metrics_args(parser)
+    args = parser.parse_args(argv)
+
+    metric_paths = [path for path in _expand_metrics_paths(_metrics_inputs(args)) if path.is_file()]
+    if not metric_paths:
+        raise SystemExit("No metrics files found to ingest.")
+    quarantine = _quarantine(args)
+    inserted = duplicates = skipped = 0
+    with MetricsWarehouse(Path(args.db)) as warehouse:
+        for path in metric_paths:
+            try:
+                result = warehouse.ingest_file(path, quarantine=quarantine)
+            except RecordError as exc:
+                raise SystemExit(f"{exc} (use --quarantine PATH to skip malformed lines)") from exc
+            inserted += result.inserted
+            duplicates += result.duplicates
+            skipped += int(result.skipped)
+    _report_quarantine(quarantine)
+    print(
+        f"ingest: {inserted} new records ({duplicates} duplicates) from {len(metric_paths) - skipped} files "
+        f"into {args.db}; {skipped} unchanged files skipped"
+    )
+    return 0
+
+
+def _cmd_query(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="analyze_metrics.py query",
+        description="Group-by summaries straight from the metrics warehouse.",
+    )
+    _add_db_arg(parser, required=True, help_text="Warehouse database built by 'ingest'.")
+    parser.add_argument("--metric", type=str, required=True, help="Metric name (glob patterns allowed).")
+    parser.add_argument("--suite", type=str, default=None, help="Restrict to one suite.")
+    parser.add_argument(
+        "--by",
+        type=str,
+        action="append",
+        default=[],
+        help="Tag key(s) to group by (repeatable or comma-separated).",
+    )
+    parser.add_argument(
+        "--where",
+        type=str,
+        action="append",
+        default=[],
+        help="Tag filter key=value (repeatable).",
+    )
+    parser.add_argument("--json", action="store_true", help="Print rows as JSON instead of a table.")
+    args = parser.parse_args(argv)
+
+    by = [key.strip() for value in args.by for key in value.split(",") if key.strip()]
+    where: dict[str, str] = {}
+    for clause in args.where:
+        key, sep, value = clause.partition("=")
+        if not sep or not key.strip():
+            raise SystemExit(f"--where expects key=value, got {clause!r}")
+        where[key.strip()] = value.strip()
+    db_path = Path(args.db)
+    if not db_path.exists():
+        raise SystemExit(f"warehouse not found: {db_path}")
+    with MetricsWarehouse(db_path) as warehouse:
+        rows = warehouse.query(args.metric, by=by, where=where, suite=args.suite)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+    headers = ["metric_name", *by, "n", "mean", "std", "min", "max"]
+    cells = [
+        [f"{row[key]:.6g}" if isinstance(row[key], float) else str(row[key]) for key in headers] for row in rows
+    ]
+    widths = [max([len(header)] + [len(cell[i]) for cell in cells]) for i, header in enumerate(headers)]
+    for line in [headers, *cells]:
+        print("  ".join(cell.ljust(width) for cell, width in zip(line, widths)).rstrip())
+    return 0
+
+
+def _cmd_ablation(argv: list[str]) -> int:
+    from ablation_lib import (
+        ABLATION_COLUMNS,
+        SUMMARY_COLUMNS,
+        AblationConfig,
+        compute_ablation,
+        input_fingerprint,
+        nest_summaries,
+        read_cached,
+        write_cached,
+    )
+
+    parser = argparse.ArgumentParser(
+        prog="analyze_metrics.py ablation",
+        description="Regenerate the per case x tier summaries and tier-vs-baseline ablation tables.",
+    )
+    _add_metrics_args(parser)
+    parser.add_argument(
+        "--stats-dir",
+        type=str,
+        default="research/papers/event-driven-agentic-memory/output/stats",
+        help="Directory for a_summaries.{csv,json}, a_ablation.csv and table_a_ablation.tex.",
+    )
+    parser.add_argument(
+        "--baseline-tier",
+        type=str,
+        default=AblationConfig.baseline_tier,
+        help="Memory tier every other tier is contrasted against.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="Cache directory, one result per configuration (default: <stats-dir>/.cache).",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Recompute even if a cached result exists.")
+    args = parser.parse_args(argv)
+
+    metric_paths = [path for path in _expand_metrics_paths(_metrics_inputs(args)) if path.is_file()]
     if not metric_paths:
         raise SystemExit("No metrics files found for analysis.")
-    records = load_metrics_from_paths(metric_paths)
-    analysis = aggregate_metrics(records)
-    analysis["generated_at"] = datetime.now(timezone.utc).isoformat()
-    analysis["source_metrics"] = [str(path) for path in metric_paths]
-
-    _write_json(output_dir / "analysis.json", analysis)
-    rows = _flatten_groups(analysis["groups"], analysis["comparisons"])
-    _write_csv(output_dir / "analysis.csv", rows)
-    _write_csv(tables_dir / "metrics_summary.csv", rows)
-    _write_json(tables_dir / "metrics_summary.json", rows)
-    _write_tex(tables_dir / "metrics_summary.tex", rows)
-    _write_summary_anchor(tables_dir / "summary_anchor.tex", rows)
+    config = AblationConfig(baseline_tier=canonical_tier(args.baseline_tier) or args.baseline_tier)
+    stats_dir = Path(args.stats_dir)
+    cache_dir = Path(args.cache_dir) if args.cache_dir else stats_dir / ".cache"
+    fingerprint = input_fingerprint(metric_paths, config)
+    result = None if args.no_cache else read_cached(cache_dir, config, fingerprint)
+    cached = result is not None
+    if result is None:
+        quarantine = _quarantine(args)
+        try:
+            result = compute_ablation(iter_metrics_from_paths(metric_paths, quarantine=quarantine), config)
+        except RecordError as exc:
+            raise SystemExit(f"{exc} (use --quarantine PATH to skip malformed lines)") from exc
+        _report_quarantine(quarantine)
+        write_cached(cache_dir, config, fingerprint, result)
+
+    with output_generation(stats_dir):
+        _write_csv(stats_dir / "a_summaries.csv", result["summaries"], SUMMARY_COLUMNS)
+        _write_json(stats_dir / "a_summaries.json", nest_summaries(result["summaries"]))
+        _write_csv(stats_dir / "a_ablation.csv", result["ablation"], ABLATION_COLUMNS)
+        _write_ablation_tex(stats_dir / "table_a_ablation.tex", result["ablation"])
+    source = "cache" if cached else f"{len(metric_paths)} metrics files"
+    print(
+        f"ablation: wrote {len(result['ablation'])} contrasts vs {config.baseline_tier} "
+        f"and {len(result['summaries'])} summaries to {stats_dir} (from {source})"
+    )
+    return 0
+
+
+def _write_sequential(path: Path, runs: RunMeans, config: SequentialConfig) -> dict[str, Any]:
+    from sequential_lib import advise
+
+    # Stopping decisions build on the previous advice, so the read and the
+    # write happen under one lock of the advice directory.
+    with output_generation(path.parent):
+        try:
+            previous = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            previous = None
+        advice = advise(runs, config, previous)
+        _write_json(path, advice)
+    return advice
+
+
+def _cmd_sequential(argv: list[str]) -> int:
+    from sequential_lib import RunMeans, SequentialConfig
+
+    parser = argparse.ArgumentParser(
+        prog="analyze_metrics.py sequential",
+        description="Advise runners which conditions can stop, using group-sequential tests on primary metrics.",
+    )
+    _add_metrics_args(parser)
+    parser.add_argument(
+        "--state",
+        type=str,
+        default="research/papers/event-driven-agentic-memory/output/sequential.json",
+        help="Decision file runners poll; also holds the looks taken so far.",
+    )
+    parser.add_argument("--alpha", type=float, default=SequentialConfig.alpha, help="Overall type I error.")
+    parser.add_argument(
+        "--min-effect-size",
+        type=float,
+        default=SequentialConfig.min_effect_size_d,
+        help="Cohen's d the planned run count is powered for.",
+    )
+    parser.add_argument(
+        "--max-runs",
+        type=int,
+        default=None,
+        help="Runs per arm after which a condition stops regardless (default: from --min-effect-size).",
+    )
+    parser.add_argument(
+        "--min-runs",
+        type=int,
+        default=SequentialConfig.min_runs,
+        help="Runs per arm before the first look.",
+    )
+    parser.add_argument("--watch", action="store_true", help="Keep running and update decisions as runs land.")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between metrics file polls.")
+    parser.add_argument("--debounce", type=float, default=2.0, help="Seconds of quiet before an update.")
+    args = parser.parse_args(argv)
+
+    config = SequentialConfig(
+        alpha=args.alpha,
+        min_effect_size_d=args.min_effect_size,
+        max_runs=args.max_runs,
+        min_runs=args.min_runs,
+    )
+    state = Path(args.state)
+    metrics_inputs = _metrics_inputs(args)
+
+    def _summary(advice: dict[str, Any]) -> str:
+        counts = advice["counts"]
+        return (
+            f"{counts['stop']}/{counts['conditions']} conditions decided "
+            f"(max {advice['config']['max_runs']} runs per arm) -> {state}"
+        )
+
+    if args.watch:
+        quarantine = _quarantine(args)
+
+        def _on_update(records: list[MetricRecord], changed: set[str] | None) -> None:
+            runs = RunMeans(config.primary_metrics)
+            for record in records:
+                runs.add(record)
+            print(f"sequential: {len(records)} records, {_summary(_write_sequential(state, runs, config))}")
+
+        try:
+            asyncio.run(
+                watch_metrics(
+                    lambda: _expand_metrics_paths(metrics_inputs),
+                    _on_update,
+                    poll_interval=args.poll_interval,
+                    debounce=args.debounce,
+                    quarantine=quarantine,
+                    label="sequential",
+                )
+            )
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if quarantine is not None:
+                quarantine.close()
+        return 0
+
+    metric_paths = [path for path in _expand_metrics_paths(metrics_inputs) if path.is_file()]
+    if not metric_paths:
+        raise SystemExit("No metrics files found for analysis.")
+    quarantine = _quarantine(args)
+    runs = RunMeans(config.primary_metrics)
+    try:
+        for record in iter_metrics_from_paths(metric_paths, quarantine=quarantine):
+            runs.add(record)
+    except RecordError as exc:
+        raise SystemExit(f"{exc} (use --quarantine PATH to skip malformed lines)") from exc
+    _report_quarantine(quarantine)
+    print(f"sequential: {_summary(_write_sequential(state, runs, config))}")
+    return 0
+
+
+def _cmd_compare(argv: list[str]) -> int:
+    from regression_lib import DEFAULT_TOLERANCES, GateConfig, Tolerance, compare_analyses
+
+    parser = argparse.ArgumentParser(
+        prog="analyze_metrics.py compare",
+        description="Gate a candidate analysis.json against a baseline; exits 1 on a significant regression.",
+    )
+    parser.add_argument("baseline", help="Baseline analysis.json.")
+    parser.add_argument("candidate", help="Candidate analysis.json.")
+    parser.add_argument(
+        "--tolerance",
+        type=str,
+        action="append",
+        default=[],
+        help=(
+            "METRIC=+N%% fails when the mean rises more than N%%, METRIC=-N when it drops more than N "
+            f"(repeatable; default {' '.join(DEFAULT_TOLERANCES).replace('%', '%%')})."
+        ),
+    )
+    parser.add_argument("--alpha", type=float, default=GateConfig.alpha, help="Significance level for a regression.")
+    parser.add_argument("--report", type=str, default=None, help="Write the JSON report to this path.")
+    parser.add_argument(
+        "--fail-on-missing",
+        action="store_true",
+        help="Also fail when a gated baseline group is absent from the candidate.",
+    )
+    _add_backend_arg(parser)
+    args = parser.parse_args(argv)
+    _stats_backend(args)
+
+    try:
+        tolerances = {t.metric: t for t in map(Tolerance.parse, [*DEFAULT_TOLERANCES, *args.tolerance])}
+    except ValueError as exc:
+        raise SystemExit(str(exc)) from exc
+    analyses = []
+    with consistent_read(Path(args.baseline), Path(args.candidate)):
+        for path in (args.baseline, args.candidate):
+            try:
+                analyses.append(json.loads(Path(path).read_text(encoding="utf-8")))
+            except (OSError, ValueError) as exc:
+                raise SystemExit(f"cannot read analysis {path}: {exc}") from exc
+    report = compare_analyses(*analyses, GateConfig(tolerances=tuple(tolerances.values()), alpha=args.alpha))
+    report["baseline"], report["candidate"] = args.baseline, args.candidate
+    if args.report:
+        _write_json(Path(args.report), report)
+
+    for row in report["results"]:
+        if row["status"] == "pass" and row["reason"] == "within_tolerance":
+            continue
+        tags = ",".join(f"{k}={v}" for k, v in sorted(row["tags"].items()))
+        pct = f"{row['delta_pct']:+.1%}" if row["delta_pct"] is not None else "n/a"
+        p = row["p_mann_whitney"] if row["p_mann_whitney"] is not None else row["p_welch"]
+        print(
+            f"{row['status'].upper():4} {row['metric_name']} [{tags}] {row['mean_baseline']:.4g} -> "
+            f"{row['mean_candidate']:.4g} ({pct}, limit {row['tolerance']}, p={p if p is None else f'{p:.3g}'}) "
+            f"{row['reason']}"
+        )
+    for group in report["missing"]:
+        tags = ",".join(f"{k}={v}" for k, v in sorted(group["tags"].items()))
+        print(f"MISS {group['metric_name']} [{tags}] not in candidate")
+    counts = report["counts"]
+    failed = not report["passed"] or (args.fail_on_missing and counts["missing"] > 0)
+    print(
+        f"compare: {'FAIL' if failed else 'PASS'} - {counts['failed']} regressions in {counts['compared']} groups "
+        f"({counts['missing']} missing, {counts['new']} new)"
+    )
+    return 1 if failed else 0
+
+
+SUBCOMMANDS = {
+    "partial": _cmd_partial,
+    "merge": _cmd_merge,
+    "convert": _cmd_convert,
+    "ingest": _cmd_ingest,
+    "query": _cmd_query,
+    "ablation": _cmd_ablation,
+    "sequential": _cmd_sequential,
+    "compare": _cmd_compare,
+}
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in SUBCOMMANDS:
+        return SUBCOMMANDS[argv[0]](argv[1:])
+
+    from backend_lib import CrossCheckConfig, get_backend
+
+    parser = argparse.ArgumentParser(
+        description="Aggregate system-paper metrics into analysis tables.",
+        epilog=f"Subcommands: {', '.join(SUBCOMMANDS)} (run '<subcommand> --help' for details).",
+    )
+    _add_metrics_args(parser)
+    _add_db_arg(parser, help_text="Read records from a warehouse built by 'ingest' instead of JSONL files.")
+    _add_output_args(parser)
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and refresh outputs as metrics files grow.",
+    )
+    parser.add_argument(
+        "--figures-dir",
+        type=str,
+        default=None,
+        help="Directory for figures refreshed in watch mode (optional).",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between metrics file polls in watch mode.",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=2.0,
+        help="Quiet seconds required after a write burst before refreshing in watch mode.",
+    )
+    _add_aggregation_args(parser)
+    _add_timeline_args(parser)
+    _add_backend_arg(parser)
+    parser.add_argument(
+        "--cross-check",
+        type=str,
+        default=None,
+        metavar="BACKEND",
+        help="Recompute the analysis with this second backend and fail unless every output matches.",
+    )
+    parser.add_argument(
+        "--cross-check-rtol",
+        type=float,
+        default=CrossCheckConfig.rtol,
+        help="Relative tolerance for --cross-check.",
+    )
+    parser.add_argument(
+        "--cross-check-atol",
+        type=float,
+        default=CrossCheckConfig.atol,
+        help="Absolute tolerance for --cross-check.",
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=str,
+        default=None,
+        metavar="SIZE",
+        help="Memory budget for exact grouping (e.g. 2G); past it, values spill to partitioned temp files.",
+    )
+    parser.add_argument(
+        "--spill-dir",
+        type=str,
+        default=None,
+        help="Directory for --max-memory spill files (default: the system temp dir).",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        nargs="?",
+        const="profile.json",
+        default=None,
+        help="Write a per-stage timing/memory report (and a .trace.json Chrome trace) to this path.",
+    )
+    args = parser.parse_args(argv)
+
+    metrics_inputs = _metrics_inputs(args)
+    output_dir = Path(args.output_dir)
+    tables_dir = Path(args.tables_dir)
+    sketch_config, bootstrap_config, values_config = _aggregation_configs(args)
+    timeline_config = _timeline_config(args)
+    _stats_backend(args)
+    cross_check = None
+    if args.cross_check:
+        try:
+            get_backend(args.cross_check)
+        except ValueError as exc:
+            raise SystemExit(f"--cross-check: {exc}") from exc
+        cross_check = CrossCheckConfig(args.cross_check, rtol=args.cross_check_rtol, atol=args.cross_check_atol)
+    spill_config = None
+    if args.max_memory:
+        try:
+            max_memory = parse_size(args.max_memory)
+        except ValueError as exc:
+            raise SystemExit(f"--max-memory: {exc}") from exc
+        spill_config = SpillConfig(max_memory, temp_dir=Path(args.spill_dir) if args.spill_dir else None)
+
+    if args.watch:
+        if args.db:
+            raise SystemExit("--watch reads JSONL files; it cannot be combined with --db")
+        if cross_check is not None:
+            raise SystemExit("--cross-check runs once; it cannot be combined with --watch")
+        if spill_config is not None:
+            raise SystemExit("--watch keeps every record in memory; it cannot be combined with --max-memory")
+        return _watch(
+            metrics_inputs,
+            output_dir,
+            tables_dir,
+            Path(args.figures_dir) if args.figures_dir else None,
+            poll_interval=args.poll_interval,
+            debounce=args.debounce,
+            sketch_config=sketch_config,
+            bootstrap_config=bootstrap_config,
+            values_config=values_config,
+            timeline_config=timeline_config,
+            quarantine=_quarantine(args),
+        )
+
+    with profiling(Path(args.profile) if args.profile else None):
+        if args.db:
+            metric_paths = [Path(args.db)]
+            if not metric_paths[0].exists():
+                raise SystemExit(f"warehouse not found: {args.db}")
+            quarantine = None
+            records = iter_warehouse_records(metric_paths[0])
+        else:
+            with profile_stage("expand_paths") as stage:
+                metric_paths = _expand_metrics_paths(metrics_inputs)
+                stage.items = len(metric_paths)
+            if not metric_paths:
+                raise SystemExit("No metrics files found for analysis.")
+            quarantine = _quarantine(args)
+            records = metrics_source(metric_paths, quarantine=quarantine)
+        try:
+            _write_analysis_outputs(
+                records,
+                metric_paths,
+                output_dir,
+                tables_dir,
+                sketch_config=sketch_config,
+                bootstrap_config=bootstrap_config,
+                values_config=values_config,
+                timeline_config=timeline_config,
+                quarantine=quarantine,
+                cross_check=cross_check,
+                spill_config=spill_config,
+            )
+        except RecordError as exc:
+            raise SystemExit(f"{exc} (use --quarantine PATH to skip malformed lines)") from exc
+    _report_quarantine(quarantine)
     print(f"analysis: wrote {output_dir / 'analysis.json'} and tables in {tables_dir}")
     return 0
 
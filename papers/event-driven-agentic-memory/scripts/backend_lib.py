@@ -0,0 +1,433 @@
+from __future__ import annotations
+
+import importlib.util
+import math
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, TypeAlias, cast
+
+import numpy as np
+from numpy.typing import NDArray
+
+try:  # pragma: no cover - optional dependency in some environments
+    from scipy import special as _special  # type: ignore[import-untyped]
+    from scipy import stats as _stats  # type: ignore[import-untyped]
+except Exception:  # pragma: no cover - fallback when scipy not present
+    _special = None
+    _stats = None
+
+FloatArray: TypeAlias = NDArray[np.float64]
+CountArray: TypeAlias = NDArray[np.int64]
+
+# scipy's ks_2samp switches from the exact to the asymptotic p-value above this size.
+KS_EXACT_MAX_N = 10000
+# Below this effective size n1*n2/(n1+n2), kstwo.sf is far from the two-sample
+# null (and its small-n methods are not reproduced here), so both backends stay
+# exact even when one sample is large.
+KS_EXACT_MAX_EN = 140
+# scipy's mannwhitneyu uses the exact null distribution unless both samples exceed this.
+MWU_EXACT_MAX_N = 8
+# numba is opt-in: its JIT warm-up costs more than it saves on a paper-sized run.
+AUTO_ORDER = ("scipy", "numpy")
+
+
+@dataclass(frozen=True)
+class TestResult:
+    stat: float | None
+    p_value: float | None
+
+
+def _mwu_exact_sf(u: int, n1: int, n2: int) -> float:
+    # Null distribution of U is the Gaussian binomial [n1+n2 choose m]_q =
+    # prod_i (1 - q^(n+i)) / (1 - q^i); dividing by (1 - q^i) is a strided
+    # cumulative sum, so each factor costs O(n1*n2).
+    m, n = sorted((n1, n2))
+    size = m * n + 1
+    pmf = np.zeros(size)
+    pmf[0] = 1.0
+    for i in range(1, m + 1):
+        shift = n + i
+        if shift < size:
+            pmf[shift:] -= pmf[: size - shift].copy()
+        for r in range(i):
+            pmf[r::i] = np.cumsum(pmf[r::i])
+    return float(pmf[u:].sum() / pmf.sum())
+
+
+def _ks_exact_sf(n1: int, n2: int, h: int) -> float:
+    # Fraction of lattice paths from (0, 0) to (n1, n2) that leave the band
+    # |i/n1 - j/n2| < h/lcm. Every path into a cell outside the band counts,
+    # and the band cells of a row form one interval fed by a running sum, so
+    # each row is one logaddexp.accumulate; log counts avoid both overflow
+    # and the cancellation of 1 - P(inside) for tiny p-values.
+    g = math.gcd(n1, n2)
+    step_i, step_j = n2 // g, n1 // g
+    log_fact = np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, n1 + n2 + 1, dtype=float)))])
+    j = np.arange(n2 + 1)
+    row = np.full(n2 + 1, -np.inf)
+    for i in range(n1 + 1):
+        lo = max(0, (i * step_i - h) // step_j + 1)
+        hi = min(n2, -((-(i * step_i + h)) // step_j) - 1)
+        outside = log_fact[i + j] - log_fact[i] - log_fact[j]
+        if lo <= hi:
+            feed = row[lo : hi + 1] if i else np.full(hi - lo + 1, -np.inf)
+            if lo > 0:
+                feed = np.concatenate([[outside[lo - 1]], feed])
+            band = np.logaddexp.accumulate(feed)[-(hi - lo + 1) :]
+            outside[lo : hi + 1] = band
+        row = outside
+    return float(math.exp(row[n2] - log_fact[n1 + n2] + log_fact[n1] + log_fact[n2]))
+
+
+def _smirnov_sf(n: int, x: float) -> float:
+    # One-sided P(D+_n >= x) from the Birnbaum-Tingey sum, evaluated in logs.
+    j = np.arange(0, int(math.floor(n * (1.0 - x))) + 1, dtype=float)
+    log_binom = np.concatenate([[0.0], np.cumsum(np.log((n - j[1:] + 1.0) / j[1:]))])
+    with np.errstate(divide="ignore"):
+        logs = log_binom + (n - j) * np.log1p(-x - j / n) + (j - 1.0) * np.log(x + j / n)
+    top = float(np.max(logs))
+    return float(x * math.exp(top) * np.sum(np.exp(logs - top)))
+
+
+def _pelz_good_cdf(n: int, x: float) -> float:
+    z = math.sqrt(n) * x
+    z2, z3, z4, z6 = z**2, z**3, z**4, z**6
+    pi2, pi4, pi6 = math.pi**2, math.pi**4, math.pi**6
+    qlog = -pi2 / 8 / z2
+    if qlog < math.log(np.finfo(float).tiny):
+        return 0.0
+    q = math.exp(qlog)
+    maxk = int(math.ceil(16 * z / math.pi))
+    m = 2.0 * np.arange(1, maxk + 1) - 1.0
+    qpow = q ** (m**2)
+    coeffs = np.stack(
+        [
+            np.ones_like(m),
+            -z2 + pi2 / 4 * m**2,
+            6 * z6 + 2 * z4 + (2 * z4 - 5 * z2) * pi2 / 4 * m**2 + pi4 * (1 - 2 * z2) / 16 * m**4,
+            -30 * z6
+            - 90 * z**8
+            + pi2 * (135 * z4 - 96 * z6) / 4 * m**2
+            + pi4 * (-60 * z2 + 212 * z4) / 16 * m**4
+            + pi6 * (5 - 30 * z2) / 64 * m**6,
+        ]
+    )
+    terms = coeffs @ qpow * math.sqrt(2 * math.pi) / np.array([z, 6 * z4, 72 * z**7, 6480 * z**10])
+    ks = np.arange(1, maxk + 1, dtype=float)
+    qk = math.exp(-pi2 / 2 / z2) ** (ks**2)
+    terms[2] += np.sum(ks**2 * qk) * pi2 * math.sqrt(2 * math.pi) / (-36 * z3)
+    terms[3] += np.sum((3 * z2 - (math.pi * ks) ** 2) * ks**2 * qk) * pi2 * math.sqrt(2 * math.pi) / (216 * z6)
+    return float(np.sum(terms / np.power(float(n), np.arange(4) / 2.0)))
+
+
+def _kolmogorov_sf(n: int, x: float) -> float:
+    # Large-sample branch of scipy's kstwo.sf: the exact one-sided sum in the
+    # tail and the Pelz-Good expansion elsewhere. scipy switches to the
+    # Durbin/Pomeranz matrix methods for n <= 140, which are not reproduced.
+    if x >= 1.0:
+        return 0.0
+    if x <= 0.0:
+        return 1.0
+    t = n * x
+    if t <= 0.5:
+        return 1.0
+    if t <= 1.0:
+        return float(1.0 - math.exp(math.lgamma(n + 1) - n * math.log(n) + n * math.log(2 * t - 1)))
+    if t >= n - 1:
+        return float(2 * (1.0 - x) ** n)
+    nx2 = t * x
+    if nx2 >= 370.0:
+        return 0.0
+    if x >= 0.5 or nx2 >= 2.2:
+        return float(np.clip(2 * _smirnov_sf(n, x), 0.0, 1.0))
+    return float(np.clip(1.0 - _pelz_good_cdf(n, x), 0.0, 1.0))
+
+
+def _ks_exact(n1: int, n2: int) -> bool:
+    g = math.gcd(n1, n2)
+    if n1 // g >= np.iinfo(np.int32).max / (n2 // g):
+        # The lattice is too fine for scipy's exact count; it would fall back too.
+        return False
+    return max(n1, n2) <= KS_EXACT_MAX_N or n1 * n2 / (n1 + n2) <= KS_EXACT_MAX_EN
+
+
+class NumpyBackend:
+    name = "numpy"
+
+    def mean(self, arr: FloatArray) -> float:
+        return float(np.mean(arr))
+
+    def median(self, arr: FloatArray) -> float:
+        return float(np.median(arr))
+
+    def std(self, arr: FloatArray) -> float:
+        return float(np.std(arr, ddof=1))
+
+    def resample_means(self, arr: FloatArray, n_samples: int, seed: int) -> FloatArray:
+        rng = np.random.default_rng(seed)
+        boot = rng.choice(arr, size=(n_samples, arr.size), replace=True)
+        return cast(FloatArray, boot.mean(axis=1))
+
+    def cliffs_delta(self, a: FloatArray, b: FloatArray) -> float:
+        sorted_b = np.sort(b)
+        wins = int(np.searchsorted(sorted_b, a, side="left").sum())
+        losses = int((sorted_b.size - np.searchsorted(sorted_b, a, side="right")).sum())
+        return float((wins - losses) / (a.size * b.size))
+
+    def _norm_sf(self, z: float) -> float:
+        return 0.5 * math.erfc(z / math.sqrt(2.0))
+
+    def _mwu(self, u1: float, n1: int, n2: int, ties: FloatArray) -> TestResult:
+        u = max(u1, n1 * n2 - u1)
+        if (n1 > MWU_EXACT_MAX_N and n2 > MWU_EXACT_MAX_N) or np.any(ties > 1):
+            n = n1 + n2
+            tie_term = float(np.sum(ties**3 - ties))
+            s = math.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))))
+            numerator = u - n1 * n2 / 2 - 0.5
+            z = numerator / s if s > 0 else math.copysign(math.inf, numerator)
+            p = 2.0 * self._norm_sf(z)
+        else:
+            p = 2.0 * _mwu_exact_sf(int(u), n1, n2)
+        return TestResult(stat=float(u1), p_value=float(np.clip(p, 0.0, 1.0)))
+
+    def mann_whitney_u(self, a: FloatArray, b: FloatArray) -> TestResult:
+        _, inverse, ties = np.unique(np.concatenate([a, b]), return_inverse=True, return_counts=True)
+        t = ties.astype(float)
+        ranks = np.cumsum(t) - (t - 1.0) / 2.0
+        u1 = float(np.sum(ranks[inverse.reshape(-1)[: a.size]])) - a.size * (a.size + 1) / 2
+        return self._mwu(u1, int(a.size), int(b.size), t)
+
+    def mann_whitney_u_counts(self, values: FloatArray, ca: CountArray, cb: CountArray) -> TestResult:
+        t = (ca + cb).astype(float)
+        n1, n2 = int(ca.sum()), int(cb.sum())
+        ranks = np.cumsum(t) - t + (t + 1.0) / 2.0
+        u1 = float(ca @ ranks) - n1 * (n1 + 1) / 2
+        return self._mwu(u1, n1, n2, t)
+
+    def _ks_pvalue(self, d: float, n1: int, n2: int) -> tuple[float, float]:
+        if _ks_exact(n1, n2):
+            lcm = (n1 // math.gcd(n1, n2)) * n2
+            h = int(np.round(d * lcm))
+            if h == 0:
+                return h / lcm, 1.0
+            small, large = sorted((n1, n2))
+            return h / lcm, float(np.clip(_ks_exact_sf(small, large, h), 0.0, 1.0))
+        m, n = sorted([float(n1), float(n2)], reverse=True)
+        return d, _kolmogorov_sf(int(round(m * n / (m + n))), d)
+
+    def _ks_from_diffs(self, diffs: FloatArray, n1: int, n2: int) -> TestResult:
+        min_s = float(np.clip(-np.min(diffs), 0, 1))
+        max_s = float(np.max(diffs))
+        d, p = self._ks_pvalue(min_s if min_s > max_s else max_s, n1, n2)
+        return TestResult(stat=float(d), p_value=p)
+
+    def ks_test(self, a: FloatArray, b: FloatArray) -> TestResult:
+        sorted_a, sorted_b = np.sort(a), np.sort(b)
+        data = np.concatenate([sorted_a, sorted_b])
+        diffs = (
+            np.searchsorted(sorted_a, data, side="right") / a.size
+            - np.searchsorted(sorted_b, data, side="right") / b.size
+        )
+        return self._ks_from_diffs(diffs, int(a.size), int(b.size))
+
+    def ks_test_counts(self, values: FloatArray, ca: CountArray, cb: CountArray) -> TestResult:
+        n1, n2 = int(ca.sum()), int(cb.sum())
+        return self._ks_from_diffs(np.cumsum(ca) / n1 - np.cumsum(cb) / n2, n1, n2)
+
+    def benjamini_hochberg(self, p_values: list[float | None]) -> list[float | None]:
+        indexed = [(i, float(p)) for i, p in enumerate(p_values) if p is not None]
+        adjusted: list[float | None] = [None] * len(p_values)
+        if not indexed:
+            return adjusted
+        m = len(indexed)
+        ranked = sorted(indexed, key=lambda item: item[1])
+        running = 1.0
+        for rank in range(m, 0, -1):
+            idx, p = ranked[rank - 1]
+            running = min(running, p * m / rank)
+            adjusted[idx] = min(1.0, running)
+        return adjusted
+
+
+class ScipyBackend(NumpyBackend):
+    name = "scipy"
+
+    def __init__(self) -> None:
+        if _stats is None or _special is None:
+            raise ImportError("scipy is not installed")
+
+    def _norm_sf(self, z: float) -> float:
+        return float(_special.ndtr(-z))
+
+    def mann_whitney_u(self, a: FloatArray, b: FloatArray) -> TestResult:
+        res = _stats.mannwhitneyu(a, b, alternative="two-sided")
+        return TestResult(stat=float(res.statistic), p_value=float(res.pvalue))
+
+    def mann_whitney_u_counts(self, values: FloatArray, ca: CountArray, cb: CountArray) -> TestResult:
+        t = (ca + cb).astype(float)
+        n1, n2 = int(ca.sum()), int(cb.sum())
+        if not (n1 > MWU_EXACT_MAX_N and n2 > MWU_EXACT_MAX_N) and not np.any(t > 1):
+            return self.mann_whitney_u(np.repeat(values, ca), np.repeat(values, cb))
+        # Average ranks of tied blocks, then scipy's tie-corrected normal
+        # approximation with continuity correction.
+        ranks = np.cumsum(t) - t + (t + 1.0) / 2.0
+        u1 = float(ca @ ranks) - n1 * (n1 + 1) / 2
+        u = max(u1, n1 * n2 - u1)
+        n = n1 + n2
+        tie_term = np.sum(t**3 - t)
+        s = np.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = (np.float64(u) - n1 * n2 / 2 - 0.5) / s
+        p = float(np.clip(_special.ndtr(-z) * 2, 0.0, 1.0))
+        return TestResult(stat=u1, p_value=p)
+
+    def ks_test(self, a: FloatArray, b: FloatArray) -> TestResult:
+        # Pick the method explicitly: scipy's "auto" looks only at max(n1, n2).
+        res = _stats.ks_2samp(a, b, method="exact" if _ks_exact(a.size, b.size) else "asymp")
+        return TestResult(stat=float(res.statistic), p_value=float(res.pvalue))
+
+    def ks_test_counts(self, values: FloatArray, ca: CountArray, cb: CountArray) -> TestResult:
+        n1, n2 = int(ca.sum()), int(cb.sum())
+        if _ks_exact(n1, n2):
+            # The exact p-value ks_test would pick for the raw samples.
+            res = _stats.ks_2samp(np.repeat(values, ca), np.repeat(values, cb), method="exact")
+            return TestResult(stat=float(res.statistic), p_value=float(res.pvalue))
+        diffs = np.cumsum(ca) / n1 - np.cumsum(cb) / n2
+        min_s = float(np.clip(-np.min(diffs), 0, 1))
+        max_s = float(np.max(diffs))
+        d = min_s if min_s > max_s else max_s
+        m, n = sorted([float(n1), float(n2)], reverse=True)
+        prob = _stats.kstwo.sf(d, np.round(m * n / (m + n)))
+        return TestResult(stat=float(d), p_value=float(np.clip(prob, 0, 1)))
+
+
+class NumbaBackend(ScipyBackend if _stats is not None else NumpyBackend):  # type: ignore[misc]
+    name = "numba"
+
+    def __init__(self) -> None:
+        import numba  # type: ignore[import-not-found]
+
+        @numba.njit(nogil=True)
+        def _row_means(arr: Any, idx: Any) -> Any:  # pragma: no cover - compiled
+            out = np.empty(idx.shape[0])
+            for r in range(idx.shape[0]):
+                total = 0.0
+                for c in range(idx.shape[1]):
+                    total += arr[idx[r, c]]
+                out[r] = total / idx.shape[1]
+            return out
+
+        self._row_means = _row_means
+
+    def resample_means(self, arr: FloatArray, n_samples: int, seed: int) -> FloatArray:
+        # Same index stream as Generator.choice, reduced without materializing
+        # the float resample matrix.
+        idx = np.random.default_rng(seed).integers(0, arr.size, size=(n_samples, arr.size))
+        return cast(FloatArray, self._row_means(np.ascontiguousarray(arr), idx))
+
+
+_FACTORIES: dict[str, Callable[[], NumpyBackend]] = {}
+_INSTANCES: dict[str, NumpyBackend] = {}
+_ACTIVE: NumpyBackend | None = None
+
+
+def register_backend(name: str, factory: Callable[[], NumpyBackend]) -> None:
+    _FACTORIES[name] = factory
+    _INSTANCES.pop(name, None)
+
+
+register_backend("numpy", NumpyBackend)
+register_backend("scipy", ScipyBackend)
+register_backend("numba", NumbaBackend)
+
+
+def backend_names() -> list[str]:
+    return ["auto", *_FACTORIES]
+
+
+def _installed(name: str) -> bool:
+    if name == "numba":
+        return importlib.util.find_spec("numba") is not None
+    if name == "scipy":
+        return _stats is not None
+    return name in _FACTORIES
+
+
+def get_backend(name: str) -> NumpyBackend:
+    if name == "auto":
+        name = next(n for n in AUTO_ORDER if n in _FACTORIES and _installed(n))
+    if name not in _FACTORIES:
+        raise ValueError(f"unknown stats backend {name!r}; expected one of {', '.join(backend_names())}")
+    backend = _INSTANCES.get(name)
+    if backend is None:
+        try:
+            backend = _INSTANCES[name] = _FACTORIES[name]()
+        except ImportError as exc:
+            raise ValueError(f"stats backend {name!r} is unavailable: {exc}") from exc
+    return backend
+
+
+def active_backend() -> NumpyBackend:
+    global _ACTIVE
+    if _ACTIVE is None:
+        _ACTIVE = get_backend("auto")
+    return _ACTIVE
+
+
+def set_backend(name: str) -> NumpyBackend:
+    global _ACTIVE
+    _ACTIVE = get_backend(name)
+    return _ACTIVE
+
+
+@contextmanager
+def using_backend(name: str) -> Iterator[NumpyBackend]:
+    global _ACTIVE
+    previous = _ACTIVE
+    _ACTIVE = get_backend(name)
+    try:
+        yield _ACTIVE
+    finally:
+        _ACTIVE = previous
+
+
+@dataclass(frozen=True)
+class CrossCheckConfig:
+    backend: str
+    rtol: float = 1e-6
+    atol: float = 1e-9
+
+
+def cross_check_outputs(
+    left: Any,
+    right: Any,
+    config: CrossCheckConfig,
+    path: str = "",
+    ignore: frozenset[str] = frozenset({"generated_at", "stats_backend"}),
+) -> list[tuple[str, Any, Any]]:
+    if isinstance(left, dict) and isinstance(right, dict):
+        mismatches: list[tuple[str, Any, Any]] = []
+        for key in sorted(left.keys() | right.keys(), key=str):
+            if key in ignore:
+                continue
+            if key not in left or key not in right:
+                mismatches.append((f"{path}.{key}", left.get(key), right.get(key)))
+                continue
+            mismatches.extend(cross_check_outputs(left[key], right[key], config, f"{path}.{key}", ignore))
+        return mismatches
+    if isinstance(left, list) and isinstance(right, list):
+        if len(left) != len(right):
+            return [(f"{path}[len]", len(left), len(right))]
+        mismatches = []
+        for i, (a, b) in enumerate(zip(left, right)):
+            mismatches.extend(cross_check_outputs(a, b, config, f"{path}[{i}]", ignore))
+        return mismatches
+    numeric = (int, float)
+    if isinstance(left, numeric) and isinstance(right, numeric) and not isinstance(left, bool):
+        if math.isclose(left, right, rel_tol=config.rtol, abs_tol=config.atol) or (
+            math.isnan(left) and math.isnan(right)
+        ):
+            return []
+        return [(path, left, right)]
+    return [] if left == right else [(path, left, right)]
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from analysis_lib import (
+    FrequentistProtocolConfig,
+    _annotate_frequentist_protocol,
+    _build_comparisons,
+    _group_metrics,
+    aggregate_groups,
+    dedup_records,
+    iter_metrics,
+)
+from analyze_metrics import _write_analysis
+from stats_lib import bootstrap_ci
+from synth_metrics import write_metrics
+
+STAGES = ("load", "dedup", "group", "bootstrap", "comparisons", "writers", "figures")
+
+
+@dataclass(frozen=True)
+class StageResult:
+    stage: str
+    seconds: float
+    peak_bytes: int
+    items: int
+
+
+StageFn = Callable[[dict[str, Any]], int]
+
+
+def _noop(state: dict[str, Any]) -> int:
+    return 0
+
+
+def _stage_plan(data_path: Path, work_dir: Path) -> list[tuple[str, StageFn, StageFn]]:
+    def _load(state: dict[str, Any]) -> int:
+        state["raw"] = list(iter_metrics(data_path))
+        return len(state["raw"])
+
+    def _dedup(state: dict[str, Any]) -> int:
+        state["records"] = list(dedup_records(state["raw"]))
+        return len(state["records"])
+
+    def _group(state: dict[str, Any]) -> int:
+        state["groups"] = _group_metrics(state["records"])
+        return len(state["groups"])
+
+    def _bootstrap(state: dict[str, Any]) -> int:
+        for group in state["groups"]:
+            bootstrap_ci(group.values, stat="mean")
+        return len(state["groups"])
+
+    def _comparisons(state: dict[str, Any]) -> int:
+        comparisons = _build_comparisons(state["groups"])
+        _annotate_frequentist_protocol(comparisons, config=FrequentistProtocolConfig())
+        return len(comparisons)
+
+    def _prepare_writers(state: dict[str, Any]) -> int:
+        state["analysis"] = aggregate_groups(state["groups"])
+        return 0
+
+    def _writers(state: dict[str, Any]) -> int:
+        analysis = state["analysis"]
+        _write_analysis(analysis, [str(data_path)], work_dir / "output", work_dir / "tables")
+        return len(analysis["groups"])
+
+    def _figures(state: dict[str, Any]) -> int:
+        from plots_lib import generate_figures
+
+        generate_figures(work_dir / "output" / "analysis.json", work_dir / "figures")
+        return len(list((work_dir / "figures").glob("*")))
+
+    return [
+        ("load", _noop, _load),
+        ("dedup", _noop, _dedup),
+        ("group", _noop, _group),
+        ("bootstrap", _noop, _bootstrap),
+        ("comparisons", _noop, _comparisons),
+        ("writers", _prepare_writers, _writers),
+        ("figures", _noop, _figures),
+    ]
+
+
+def run_benchmark(data_path: Path, *, stages: tuple[str, ...], repeat: int) -> list[StageResult]:
+    with tempfile.TemporaryDirectory(prefix="bench-metrics-") as tmp:
+        work_dir = Path(tmp)
+        plan = _stage_plan(data_path, work_dir)
+        last = max(i for i, (stage, _, _) in enumerate(plan) if stage in stages)
+        plan = plan[: last + 1]
+        best: dict[str, float] = {}
+        items: dict[str, int] = {}
+        for _ in range(max(repeat, 1)):
+            state: dict[str, Any] = {}
+            for stage, setup, fn in plan:
+                setup(state)
+                start = time.perf_counter()
+                items[stage] = fn(state)
+                elapsed = time.perf_counter() - start
+                best[stage] = min(best.get(stage, elapsed), elapsed)
+
+        peaks: dict[str, int] = {}
+        state = {}
+        tracemalloc.start()
+        try:
+            for stage, setup, fn in plan:
+                setup(state)
+                tracemalloc.reset_peak()
+                base, _ = tracemalloc.get_traced_memory()
+                fn(state)
+                _, peak = tracemalloc.get_traced_memory()
+                peaks[stage] = max(peak - base, 0)
+        finally:
+            tracemalloc.stop()
+
+    return [
+        StageResult(stage=stage, seconds=best[stage], peak_bytes=peaks[stage], items=items[stage])
+        for stage, _, _ in plan
+        if stage in stages
+    ]
+
+
+def _size_label(n: int) -> str:
+    exponent = len(str(n)) - 1
+    return f"1e{exponent}" if n == 10**exponent else str(n)
+
+
+def _ensure_dataset(data_dir: Path, n: int, seed: int) -> Path:
+    path = data_dir / f"synth_{_size_label(n)}_seed{seed}.jsonl"
+    if not path.exists():
+        write_metrics(path, n, seed=seed)
+    return path
+
+
+def compare_to_baseline(
+    current: dict[str, dict[str, dict[str, float]]],
+    baseline: dict[str, dict[str, dict[str, float]]],
+    *,
+    time_threshold: float,
+    memory_threshold: float,
+    min_seconds: float,
+) -> list[str]:
+    regressions: list[str] = []
+    for size, stages in current.items():
+        for stage, result in stages.items():
+            ref = baseline.get(size, {}).get(stage)
+            if ref is None:
+                continue
+            seconds, ref_seconds = float(result["seconds"]), float(ref["seconds"])
+            if seconds > ref_seconds * (1.0 + time_threshold) and seconds - ref_seconds > min_seconds:
+                regressions.append(f"{size}/{stage}: {seconds:.4f}s vs baseline {ref_seconds:.4f}s")
+            peak, ref_peak = float(result["peak_bytes"]), float(ref["peak_bytes"])
+            if ref_peak > 0 and peak > ref_peak * (1.0 + memory_threshold):
+                regressions.append(f"{size}/{stage}: peak {peak / 1e6:.1f}MB vs baseline {ref_peak / 1e6:.1f}MB")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the analysis pipeline on synthetic metrics.")
+    parser.add_argument("--sizes", type=str, default="1e3,1e4,1e5", help="Comma-separated record counts.")
+    parser.add_argument("--stages", type=str, default=",".join(STAGES), help="Comma-separated stages to report.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions; the fastest run is kept.")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic data seed.")
+    parser.add_argument(
+        "--data-dir",
+        type=str,
+        default=str(Path(tempfile.gettempdir()) / "bench-metrics-data"),
+        help="Cache directory for generated datasets.",
+    )
+    parser.add_argument("--baseline", type=str, default="bench/baseline.json", help="Baseline results JSON.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline.")
+    parser.add_argument("--output", type=str, default=None, help="Optional path for this run's results JSON.")
+    parser.add_argument("--time-threshold", type=float, default=0.25, help="Allowed relative slowdown per stage.")
+    parser.add_argument("--memory-threshold", type=float, default=0.25, help="Allowed relative peak-memory growth.")
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=0.01,
+        help="Ignore slowdowns smaller than this many seconds (timer noise).",
+    )
+    args = parser.parse_args()
+
+    sizes = [int(float(size)) for size in args.sizes.split(",") if size.strip()]
+    stages = tuple(stage.strip() for stage in args.stages.split(",") if stage.strip())
+    unknown = set(stages).difference(STAGES)
+    if unknown:
+        raise SystemExit(f"unknown stages: {sorted(unknown)}")
+    data_dir = Path(args.data_dir)
+
+    results: dict[str, dict[str, dict[str, float]]] = {}
+    for n in sizes:
+        data_path = _ensure_dataset(data_dir, n, args.seed)
+        label = _size_label(n)
+        results[label] = {}
+        for result in run_benchmark(data_path, stages=stages, repeat=args.repeat):
+            results[label][result.stage] = {
+                "seconds": result.seconds,
+                "peak_bytes": float(result.peak_bytes),
+                "items": float(result.items),
+            }
+            print(
+                f"bench: {label:>6} {result.stage:<12} {result.seconds:9.4f}s "
+                f"{result.peak_bytes / 1e6:9.2f}MB  items={result.items}"
+            )
+
+    payload = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
+        print(f"bench: saved baseline {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print(f"bench: no baseline at {baseline_path}; run with --save-baseline to create one")
+        return 0
+
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    regressions = compare_to_baseline(
+        results,
+        baseline.get("results", {}),
+        time_threshold=args.time_threshold,
+        memory_threshold=args.memory_threshold,
+        min_seconds=args.min_seconds,
+    )
+    for line in regressions:
+        print(f"bench: REGRESSION {line}")
+    if regressions:
+        return 1
+    print(f"bench: no regressions against {baseline_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
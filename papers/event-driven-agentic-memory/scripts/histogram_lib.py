@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+# Bucket i covers (base**(i - 1), base**i] with base = 1 + growth, so a reported
+# percentile is the bucket's upper edge and overstates the true value by at most
+# `growth` (1% by default, roughly HDR with two significant digits).
+DEFAULT_HISTOGRAM_GROWTH = 0.01
+LATENCY_HISTOGRAM_METRIC = "load.latency_ms"
+HISTOGRAM_PERCENTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99, "p99_9": 0.999}
+
+
+@dataclass
+class LatencyHistogram:
+    growth: float = DEFAULT_HISTOGRAM_GROWTH
+    counts: dict[int, int] = field(default_factory=dict)
+    zero_count: int = 0
+    total: float = 0.0
+    min_value: float = math.inf
+    max_value: float = -math.inf
+
+    @property
+    def count(self) -> int:
+        return self.zero_count + sum(self.counts.values())
+
+    @property
+    def mean(self) -> float:
+        count = self.count
+        return self.total / count if count else 0.0
+
+    @property
+    def relative_error(self) -> float:
+        return self.growth
+
+    def bucket_index(self, value: float) -> int:
+        return int(math.ceil(math.log(value) / math.log1p(self.growth) - 1e-9))
+
+    def upper_bound(self, index: int) -> float:
+        return math.exp(index * math.log1p(self.growth))
+
+    def add(self, value: float, count: int = 1) -> None:
+        if count <= 0:
+            return
+        value = float(value)
+        if value <= 0.0:
+            self.zero_count += count
+        else:
+            index = self.bucket_index(value)
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += value * count
+        self.min_value = min(self.min_value, value)
+        self.max_value = max(self.max_value, value)
+
+    def extend(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: LatencyHistogram) -> None:
+        if not math.isclose(other.growth, self.growth):
+            raise ValueError(f"cannot merge histograms with growth {self.growth} and {other.growth}")
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.total += other.total
+        self.min_value = min(self.min_value, other.min_value)
+        self.max_value = max(self.max_value, other.max_value)
+
+    def _cumulative(self) -> tuple[np.ndarray, np.ndarray]:
+        indices = sorted(self.counts)
+        edges = np.asarray([0.0] + [self.upper_bound(i) for i in indices], dtype=float)
+        cum = np.cumsum([self.zero_count] + [self.counts[i] for i in indices]).astype(float)
+        return edges, cum
+
+    def quantiles(self, qs: Iterable[float]) -> list[float]:
+        q_arr = np.clip(np.asarray(list(qs), dtype=float), 0.0, 1.0)
+        count = self.count
+        if count == 0:
+            return [0.0] * int(q_arr.size)
+        edges, cum = self._cumulative()
+        ranks = np.maximum(np.ceil(q_arr * count), 1.0)
+        idx = np.minimum(np.searchsorted(cum, ranks, side="left"), edges.size - 1)
+        out = np.clip(edges[idx], self.min_value, self.max_value)
+        return [float(v) for v in out]
+
+    def quantile(self, q: float) -> float:
+        return self.quantiles([q])[0]
+
+    def percentiles(self) -> dict[str, float]:
+        values = self.quantiles(HISTOGRAM_PERCENTILES.values())
+        return dict(zip(HISTOGRAM_PERCENTILES, values))
+
+    def to_payload(self) -> dict[str, Any]:
+        indices = sorted(self.counts)
+        return {
+            "scheme": "log",
+            "growth": self.growth,
+            "buckets": [[index, self.counts[index]] for index in indices],
+            "zero_count": self.zero_count,
+            "sum": self.total,
+            "min": self.min_value if self.count else None,
+            "max": self.max_value if self.count else None,
+        }
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> LatencyHistogram:
+        scheme = payload.get("scheme", "log")
+        if scheme != "log":
+            raise ValueError(f"unsupported histogram scheme: {scheme!r}")
+        hist = cls(growth=float(payload.get("growth", DEFAULT_HISTOGRAM_GROWTH)))
+        for index, count in payload.get("buckets") or []:
+            if int(count) > 0:
+                hist.counts[int(index)] = hist.counts.get(int(index), 0) + int(count)
+        hist.zero_count = int(payload.get("zero_count") or 0)
+        if not hist.count:
+            return hist
+        # Producers may send buckets only; fall back to bucket edges and midpoints.
+        low = 0.0 if hist.zero_count or not hist.counts else hist.upper_bound(min(hist.counts) - 1)
+        high = hist.upper_bound(max(hist.counts)) if hist.counts else 0.0
+        hist.min_value = float(payload["min"]) if payload.get("min") is not None else low
+        hist.max_value = float(payload["max"]) if payload.get("max") is not None else high
+        if payload.get("sum") is not None:
+            hist.total = float(payload["sum"])
+        else:
+            shrink = 1.0 / math.sqrt(1.0 + hist.growth)
+            hist.total = sum(count * hist.upper_bound(i) * shrink for i, count in hist.counts.items())
+        return hist
+
+
+def percentile_curve(
+    hist: LatencyHistogram,
+    *,
+    min_q: float = 0.5,
+    max_nines: float = 4.0,
+    points: int = 200,
+) -> tuple[np.ndarray, np.ndarray]:
+    nines = np.linspace(-np.log10(1.0 - min_q), max_nines, points)
+    qs = 1.0 - 10.0 ** (-nines)
+    return qs, np.asarray(hist.quantiles(qs), dtype=float)
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import json
+import struct
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from types import TracebackType
+
+import numpy as np
+
+from histogram_lib import LatencyHistogram
+from record_lib import MetricRecord
+
+# An append-only sequence of chunks after an 8-byte magic. STRS chunks extend a
+# single string dictionary (suites, metric names, run ids, cases, tag sets as
+# JSON, histogram payloads); RECS chunks are packed RECORD_DTYPE rows pointing
+# into it. Strings are always written before the records that use them, so a
+# torn trailing chunk only loses the last batch and is dropped on read.
+METRICS_LOG_MAGIC = b"EDAMLOG1"
+METRICS_LOG_SUFFIX = ".mlog"
+_CHUNK = struct.Struct("<4sIQ")
+_STRS = b"STRS"
+_RECS = b"RECS"
+NO_STRING = 0xFFFFFFFF
+NO_TS = np.iinfo(np.int64).min
+LOG_BATCH = 65536
+RECORD_DTYPE = np.dtype(
+    [
+        ("ts", "<i8"),
+        ("suite", "<u4"),
+        ("metric", "<u4"),
+        ("tagset", "<u4"),
+        ("run", "<u4"),
+        ("case", "<u4"),
+        ("histogram", "<u4"),
+        ("value", "<f8"),
+        ("digest", "V16"),
+    ]
+)
+
+
+def is_metrics_log(path: Path) -> bool:
+    if path.suffix == METRICS_LOG_SUFFIX:
+        return True
+    try:
+        with path.open("rb") as handle:
+            return handle.read(len(METRICS_LOG_MAGIC)) == METRICS_LOG_MAGIC
+    except OSError:
+        return False
+
+
+def _decode_strings(blob: bytes, count: int) -> list[str]:
+    lengths = np.frombuffer(blob, dtype="<u4", count=count)
+    ends = (lengths.astype(np.int64).cumsum() + 4 * count).tolist()
+    starts = [4 * count] + ends[:-1]
+    return [blob[start:end].decode("utf-8") for start, end in zip(starts, ends)]
+
+
+def _encode_strings(strings: list[str]) -> bytes:
+    encoded = [text.encode("utf-8") for text in strings]
+    return np.asarray([len(b) for b in encoded], dtype="<u4").tobytes() + b"".join(encoded)
+
+
+@dataclass(frozen=True)
+class _Chunk:
+    tag: bytes
+    count: int
+    offset: int
+    nbytes: int
+
+
+def _scan(path: Path) -> tuple[list[_Chunk], int]:
+    chunks: list[_Chunk] = []
+    size = path.stat().st_size
+    with path.open("rb") as handle:
+        if handle.read(len(METRICS_LOG_MAGIC)) != METRICS_LOG_MAGIC:
+            raise ValueError(f"not a metrics log: {path}")
+        end = len(METRICS_LOG_MAGIC)
+        while end + _CHUNK.size <= size:
+            tag, count, nbytes = _CHUNK.unpack(handle.read(_CHUNK.size))
+            body = end + _CHUNK.size
+            if tag not in (_STRS, _RECS) or body + nbytes > size:
+                break
+            if tag == _RECS and nbytes != count * RECORD_DTYPE.itemsize:
+                break
+            chunks.append(_Chunk(tag, count, body, nbytes))
+            end = body + nbytes
+            handle.seek(end)
+    return chunks, end
+
+
+class MetricsLog:
+    def __init__(self, path: Path) -> None:
+        if not path.exists():
+            raise FileNotFoundError(f"metrics log not found: {path}")
+        self.path = path
+        chunks, self.end = _scan(path)
+        self.strings: list[str] = []
+        self.blocks: list[np.ndarray] = []
+        with path.open("rb") as handle:
+            for chunk in chunks:
+                if chunk.tag == _STRS:
+                    handle.seek(chunk.offset)
+                    self.strings += _decode_strings(handle.read(chunk.nbytes), chunk.count)
+                elif chunk.count:
+                    self.blocks.append(
+                        np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=chunk.offset, shape=(chunk.count,))
+                    )
+
+    def __len__(self) -> int:
+        return sum(len(block) for block in self.blocks)
+
+    def iter_blocks(self, rows: int = 1 << 20) -> Iterator[np.ndarray]:
+        for block in self.blocks:
+            for start in range(0, len(block), rows):
+                yield block[start : start + rows]
+
+    def iter_records(self) -> Iterator[MetricRecord]:
+        strings = self.strings
+        tagsets: dict[int, dict[str, object]] = {}
+        for block in self.iter_blocks():
+            for ts, suite, metric, tagset, run, case, histogram, value, digest in block.tolist():
+                tags = tagsets.get(tagset)
+                if tags is None:
+                    tags = tagsets[tagset] = json.loads(strings[tagset])
+                payload = None if histogram == NO_STRING else json.loads(strings[histogram])
+                yield MetricRecord(
+                    suite=strings[suite],
+                    metric_name=strings[metric],
+                    value=value,
+                    run_id=strings[run],
+                    case=strings[case],
+                    ts=None if ts == NO_TS else ts,
+                    tags=tags,
+                    histogram=None if payload is None else LatencyHistogram.from_payload(payload),
+                    _digest=bytes(digest),
+                )
+
+
+class MetricsLogWriter:
+    def __init__(self, path: Path, *, batch_size: int = LOG_BATCH) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self.appended = 0
+        self.duplicates = 0
+        self._index: dict[str, int] = {}
+        self._new_strings: list[str] = []
+        self._pending: list[MetricRecord] = []
+        self._seen: set[bytes] = set()
+        self._existing = np.empty(0, dtype="S16")
+        if path.exists():
+            # Reopening drops a torn trailing chunk and dedups new records
+            # against everything already in the log by content digest.
+            log = MetricsLog(path)
+            self._index = {text: i for i, text in enumerate(log.strings)}
+            if log.blocks:
+                self._existing = np.sort(np.concatenate([block["digest"] for block in log.blocks]).view("S16"))
+            end = log.end
+            del log
+            self._handle = path.open("r+b")
+            self._handle.truncate(end)
+            self._handle.seek(end)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = path.open("wb")
+            self._handle.write(METRICS_LOG_MAGIC)
+
+    def __enter__(self) -> MetricsLogWriter:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def _intern(self, text: str) -> int:
+        index = self._index.get(text)
+        if index is None:
+            index = self._index[text] = len(self._index)
+            self._new_strings.append(text)
+        return index
+
+    def add(self, record: MetricRecord) -> None:
+        digest = record.digest
+        if digest in self._seen:
+            self.duplicates += 1
+            return
+        self._seen.add(digest)
+        self._pending.append(record)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def extend(self, records: Iterable[MetricRecord]) -> None:
+        for record in records:
+            self.add(record)
+
+    def flush(self) -> None:
+        records = self._pending
+        self._pending = []
+        if self._existing.size and records:
+            digests = np.asarray([record.digest for record in records], dtype="S16")
+            pos = np.searchsorted(self._existing, digests).clip(max=self._existing.size - 1)
+            known = self._existing[pos] == digests
+            self.duplicates += int(known.sum())
+            records = [record for record, dup in zip(records, known.tolist()) if not dup]
+        if not records:
+            return
+        rows = np.empty(len(records), dtype=RECORD_DTYPE)
+        intern = self._intern
+        rows[:] = [
+            (
+                NO_TS if r.ts is None else r.ts,
+                intern(r.suite),
+                intern(r.metric_name),
+                intern(json.dumps(r.tags, separators=(",", ":"))),
+                intern(r.run_id),
+                intern(r.case),
+                NO_STRING if r.histogram is None else intern(json.dumps(r.histogram.to_payload())),
+                r.value,
+                r.digest,
+            )
+            for r in records
+        ]
+        if self._new_strings:
+            blob = _encode_strings(self._new_strings)
+            self._handle.write(_CHUNK.pack(_STRS, len(self._new_strings), len(blob)) + blob)
+            self._new_strings = []
+        self._handle.write(_CHUNK.pack(_RECS, len(rows), rows.nbytes) + rows.tobytes())
+        self._handle.flush()
+        self.appended += len(rows)
+
+    def close(self) -> None:
+        if self._handle.closed:
+            return
+        self.flush()
+        self._handle.close()
+
+
+def convert_to_log(records: Iterable[MetricRecord], path: Path) -> tuple[int, int]:
+    with MetricsLogWriter(path) as writer:
+        writer.extend(records)
+    return writer.appended, writer.duplicates
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+import os
+import tempfile
+from collections.abc import Iterator
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # type: ignore[assignment]
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_FORMAT = "output-manifest/2"
+LOCK_DIR = Path(tempfile.gettempdir()) / "output-locks"
+_TMP_IDS = itertools.count()
+
+
+@dataclass
+class _Generation:
+    directory: Path
+    number: int
+    manifest: dict[str, Any]
+    pending: list[tuple[Path, Path]] = field(default_factory=list)
+
+
+_ACTIVE: list[_Generation] = []
+
+
+def _active_for(path: Path) -> _Generation | None:
+    parent = path.resolve().parent
+    matches = [g for g in _ACTIVE if parent == g.directory or g.directory in parent.parents]
+    return max(matches, key=lambda g: len(g.directory.parts), default=None)
+
+
+@contextmanager
+def atomic_path(path: Path) -> Iterator[Path]:
+    # Writers fill a hidden sibling that is renamed over the target, so readers
+    # see the old file or the new one, never a torn one. Inside an
+    # output_generation the rename waits until the whole generation succeeds.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.stem}.{os.getpid()}-{next(_TMP_IDS)}.tmp{path.suffix}")
+    try:
+        yield tmp
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    generation = _active_for(path)
+    if generation is None:
+        os.replace(tmp, path)
+    else:
+        generation.pending.append((tmp, path))
+
+
+def write_text_atomic(path: Path, text: str) -> None:
+    with atomic_path(path) as tmp:
+        tmp.write_text(text, encoding="utf-8")
+
+
+def write_bytes_atomic(path: Path, data: bytes) -> None:
+    with atomic_path(path) as tmp:
+        tmp.write_bytes(data)
+
+
+def lock_path(directory: Path) -> Path:
+    # Lock files live outside the artifact directories, keyed by the resolved
+    # path, so a build leaves nothing behind in tracked output. flock is
+    # host-local anyway, so a host-local temp directory loses nothing.
+    key = hashlib.blake2b(str(directory.resolve()).encode("utf-8"), digest_size=16).hexdigest()
+    return LOCK_DIR / f"{key}.lock"
+
+
+@contextmanager
+def locked(directory: Path, *, shared: bool = False) -> Iterator[None]:
+    # Advisory: every writer here takes it exclusively for a whole generation;
+    # readers that need several files from one generation take it shared.
+    directory.mkdir(parents=True, exist_ok=True)
+    if fcntl is None:
+        yield
+        return
+    LOCK_DIR.mkdir(parents=True, exist_ok=True)
+    with lock_path(directory).open("a") as handle:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def consistent_read(*paths: Path) -> Iterator[None]:
+    # Holds the shared lock of each input's directory, so files read together
+    # come from one generation instead of straddling a writer's renames. A
+    # directory this process is already writing is skipped: flock would
+    # block on our own exclusive lock.
+    active = {g.directory for g in _ACTIVE}
+    directories = sorted({p.resolve().parent for p in paths} - active)
+    with ExitStack() as stack:
+        for directory in directories:
+            if directory.is_dir():
+                stack.enter_context(locked(directory, shared=True))
+        yield
+
+
+def read_manifest(directory: Path) -> dict[str, Any]:
+    try:
+        manifest = json.loads((directory / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"format": MANIFEST_FORMAT, "generation": 0, "files": {}}
+    if manifest.get("format") != MANIFEST_FORMAT:
+        return {"format": MANIFEST_FORMAT, "generation": 0, "files": {}}
+    return manifest
+
+
+def _commit(generation: _Generation) -> None:
+    # Only content-derived fields: no host, pid, clock or mtime, which would
+    # differ on every rebuild of identical outputs.
+    files = dict(generation.manifest.get("files", {}))
+    for tmp, path in generation.pending:
+        os.replace(tmp, path)
+        files[path.resolve().relative_to(generation.directory).as_posix()] = {
+            "generation": generation.number,
+            "size": path.stat().st_size,
+        }
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "generation": generation.number,
+        "files": dict(sorted(files.items())),
+    }
+    write_text_atomic(generation.directory / MANIFEST_NAME, json.dumps(manifest, indent=2))
+
+
+@contextmanager
+def output_generation(*directories: Path) -> Iterator[None]:
+    # Locks are taken in path order so concurrent jobs sharing several
+    # directories cannot deadlock. Files are published, and the manifest's
+    # generation bumped, only if the block finishes.
+    active = {g.directory for g in _ACTIVE}
+    resolved = sorted({d.resolve() for d in directories} - active)
+    generations: list[_Generation] = []
+    with ExitStack() as stack:
+        for directory in resolved:
+            stack.enter_context(locked(directory))
+            manifest = read_manifest(directory)
+            generations.append(_Generation(directory, int(manifest.get("generation", 0)) + 1, manifest))
+        _ACTIVE.extend(generations)
+        try:
+            yield
+        except BaseException:
+            for generation in generations:
+                for tmp, _ in generation.pending:
+                    tmp.unlink(missing_ok=True)
+            raise
+        finally:
+            del _ACTIVE[len(_ACTIVE) - len(generations) :]
+        for generation in generations:
+            if generation.pending:
+                _commit(generation)
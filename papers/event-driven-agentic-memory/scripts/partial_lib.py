@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import base64
+import gzip
+import json
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from analysis_lib import (
+    MetricGroup,
+    MetricGrouper,
+    PoissonBootstrapConfig,
+    SketchConfig,
+    ValuesConfig,
+)
+from histogram_lib import LatencyHistogram
+from metrics_log_lib import MetricsLog
+from output_lib import write_bytes_atomic
+from record_lib import MetricRecord
+from sketch_lib import KLLSketch, PoissonBootstrap, Reservoir, StreamingSummary, Welford
+from replay_lib import ReplayIndex
+from timeline_lib import TimelineCollector
+
+PARTIAL_FORMAT = "metrics-partial/1"
+DIGEST_SIZE = 16
+
+
+def _encode_floats(values: Iterable[float]) -> str:
+    arr = np.asarray(list(values), dtype="<f8")
+    return base64.b64encode(arr.tobytes()).decode("ascii")
+
+
+def _decode_floats(text: str) -> list[float]:
+    return np.frombuffer(base64.b64decode(text), dtype="<f8").tolist()
+
+
+def _encode_summary(summary: StreamingSummary) -> dict[str, Any]:
+    return {
+        "k": summary.k,
+        "n": summary.moments.n,
+        "mean": summary.moments.mean,
+        "m2": summary.moments.m2,
+        "min": summary.min_value,
+        "max": summary.max_value,
+        "compactors": [_encode_floats(items) for items in summary.sketch.compactors],
+    }
+
+
+def _decode_summary(payload: dict[str, Any]) -> StreamingSummary:
+    summary = StreamingSummary(
+        k=int(payload["k"]),
+        moments=Welford(n=int(payload["n"]), mean=float(payload["mean"]), m2=float(payload["m2"])),
+        min_value=float(payload["min"]),
+        max_value=float(payload["max"]),
+    )
+    summary.sketch = KLLSketch.restore(
+        summary.k,
+        summary.moments.n,
+        [_decode_floats(items) for items in payload["compactors"]],
+    )
+    return summary
+
+
+def _encode_bootstrap(bootstrap: PoissonBootstrap) -> dict[str, Any]:
+    bootstrap.flush()
+    return {
+        "n_replicates": bootstrap.n_replicates,
+        "seed": bootstrap.seed,
+        "n": bootstrap.n,
+        "sums": _encode_floats(bootstrap.sums),
+        "weights": _encode_floats(bootstrap.weights),
+    }
+
+
+def _decode_bootstrap(payload: dict[str, Any]) -> PoissonBootstrap:
+    bootstrap = PoissonBootstrap(int(payload["n_replicates"]), seed=int(payload["seed"]))
+    bootstrap.n = int(payload["n"])
+    bootstrap.sums = np.asarray(_decode_floats(payload["sums"]), dtype=float)
+    bootstrap.weights = np.asarray(_decode_floats(payload["weights"]), dtype=float)
+    return bootstrap
+
+
+def _encode_reservoir(reservoir: Reservoir) -> dict[str, Any]:
+    items = reservoir.items()
+    return {
+        "k": reservoir.k,
+        "n": reservoir.n,
+        "keys": [key for key, _ in items],
+        "values": _encode_floats(value for _, value in items),
+    }
+
+
+def _decode_reservoir(payload: dict[str, Any]) -> Reservoir:
+    reservoir = Reservoir(int(payload["k"]))
+    for key, value in zip(payload["keys"], _decode_floats(payload["values"]), strict=True):
+        reservoir.add(value, int(key))
+    reservoir.n = int(payload["n"])
+    return reservoir
+
+
+def _config_payload(
+    sketch_config: SketchConfig | None,
+    bootstrap_config: PoissonBootstrapConfig | None,
+    values_config: ValuesConfig | None,
+) -> dict[str, Any]:
+    return {
+        "values": None if values_config is None else {"mode": values_config.mode, "k": values_config.k},
+        "sketch": None if sketch_config is None else {"threshold": sketch_config.threshold, "k": sketch_config.k},
+        "bootstrap": (
+            None
+            if bootstrap_config is None
+            else {
+                "n_replicates": bootstrap_config.n_replicates,
+                "seed": bootstrap_config.seed,
+                "ci": bootstrap_config.ci,
+            }
+        ),
+    }
+
+
+def build_partial(
+    records: Iterable[MetricRecord] | MetricsLog,
+    *,
+    source_metrics: list[str],
+    sketch_config: SketchConfig | None = None,
+    bootstrap_config: PoissonBootstrapConfig | None = None,
+    values_config: ValuesConfig | None = None,
+) -> dict[str, Any]:
+    timeline = TimelineCollector(track_digests=True)
+    replay = ReplayIndex(track_digests=True)
+    grouper = MetricGrouper(
+        sketch_config=sketch_config,
+        bootstrap_config=bootstrap_config,
+        values_config=values_config,
+        track_digests=True,
+        timeline=timeline,
+        replay=replay,
+    )
+    grouper.add_records(records)
+    groups: list[dict[str, Any]] = []
+    for group in grouper.groups():
+        approximate = group.approximate
+        groups.append(
+            {
+                "suite": group.suite,
+                "metric_name": group.metric_name,
+                "tags": group.tags,
+                "run_ids": sorted(set(group.run_ids)),
+                "approximate": approximate,
+                "values": _encode_floats(group.values),
+                "digests": base64.b64encode(b"".join(group.digests)).decode("ascii"),
+                "summary": _encode_summary(group.summary) if approximate and group.summary is not None else None,
+                "bootstrap": (
+                    _encode_bootstrap(group.bootstrap) if approximate and group.bootstrap is not None else None
+                ),
+                "reservoir": (
+                    _encode_reservoir(group.reservoir) if approximate and group.reservoir is not None else None
+                ),
+                "histograms": [
+                    [base64.b64encode(digest).decode("ascii"), histogram.to_payload()]
+                    for digest, histogram in grouper.histogram_parts(group)
+                ],
+            }
+        )
+    return {
+        "format": PARTIAL_FORMAT,
+        "config": _config_payload(sketch_config, bootstrap_config, values_config),
+        "source_metrics": source_metrics,
+        "groups": groups,
+        "timeline": {
+            "digests": base64.b64encode(b"".join(timeline.digests)).decode("ascii"),
+            "run_ids": timeline.run_ids,
+            "scenarios": timeline.scenarios,
+            "metrics": timeline.metrics,
+            "ts": timeline.ts,
+            "values": _encode_floats(timeline.values),
+        },
+        "replay": {
+            "digests": base64.b64encode(b"".join(replay.digests)).decode("ascii"),
+            "cases": replay.cases,
+            "run_ids": replay.run_ids,
+            "modes": replay.modes,
+            "steps": replay.steps,
+            "hashes": replay.hashes,
+            "hash_ids": replay.hash_ids,
+        },
+    }
+
+
+def write_partial(path: Path, payload: dict[str, Any]) -> None:
+    data = json.dumps(payload, sort_keys=True).encode("utf-8")
+    if path.suffix == ".gz":
+        data = gzip.compress(data, mtime=0)
+    write_bytes_atomic(path, data)
+
+
+def read_partial(path: Path) -> dict[str, Any]:
+    data = path.read_bytes()
+    if data[:2] == b"\x1f\x8b":
+        data = gzip.decompress(data)
+    payload = json.loads(data.decode("utf-8"))
+    if payload.get("format") != PARTIAL_FORMAT:
+        raise ValueError(f"unsupported partial format in {path}: {payload.get('format')!r}")
+    return payload
+
+
+def _merge_timeline(timeline: TimelineCollector, payload: dict[str, Any], seen: set[bytes]) -> None:
+    raw = base64.b64decode(payload["digests"])
+    digests = [raw[i : i + DIGEST_SIZE] for i in range(0, len(raw), DIGEST_SIZE)]
+    rows = zip(
+        digests,
+        payload["run_ids"],
+        payload["scenarios"],
+        payload["metrics"],
+        payload["ts"],
+        _decode_floats(payload["values"]),
+        strict=True,
+    )
+    for digest, run_id, scenario, metric_name, ts, value in rows:
+        if digest in seen:
+            continue
+        seen.add(digest)
+        timeline.add_sample(run_id, scenario, metric_name, int(ts), value)
+
+
+def _merge_replay(replay: ReplayIndex, payload: dict[str, Any], seen: set[bytes]) -> None:
+    raw = base64.b64decode(payload["digests"])
+    digests = [raw[i : i + DIGEST_SIZE] for i in range(0, len(raw), DIGEST_SIZE)]
+    hashes = payload["hashes"]
+    rows = zip(
+        digests,
+        payload["cases"],
+        payload["run_ids"],
+        payload["modes"],
+        payload["steps"],
+        payload["hash_ids"],
+        strict=True,
+    )
+    for digest, case, run_id, mode, step, hash_id in rows:
+        if digest in seen:
+            continue
+        seen.add(digest)
+        replay.add_sample(case, run_id, mode, step, hashes[hash_id])
+
+
+def merge_partials(
+    partials: list[dict[str, Any]],
+) -> tuple[
+    list[MetricGroup],
+    TimelineCollector,
+    ReplayIndex,
+    SketchConfig | None,
+    PoissonBootstrapConfig | None,
+    ValuesConfig | None,
+    list[str],
+]:
+    if not partials:
+        raise ValueError("no partials to merge")
+    config = partials[0]["config"]
+    for partial in partials[1:]:
+        if partial["config"] != config:
+            raise ValueError("cannot merge partials built with different aggregation settings")
+    sketch_config = SketchConfig(**config["sketch"]) if config["sketch"] else None
+    bootstrap_config = PoissonBootstrapConfig(**config["bootstrap"]) if config["bootstrap"] else None
+    values_config = ValuesConfig(**config["values"]) if config.get("values") else None
+
+    grouper = MetricGrouper(
+        sketch_config=sketch_config,
+        bootstrap_config=bootstrap_config,
+        values_config=values_config,
+    )
+    timeline = TimelineCollector()
+    replay = ReplayIndex()
+    seen: set[bytes] = set()
+    seen_samples: set[bytes] = set()
+    sources: list[str] = []
+    for partial in partials:
+        sources.extend(partial.get("source_metrics", []))
+        if partial.get("timeline"):
+            _merge_timeline(timeline, partial["timeline"], seen_samples)
+        if partial.get("replay"):
+            _merge_replay(replay, partial["replay"], seen_samples)
+        for payload in partial["groups"]:
+            suite = str(payload["suite"])
+            metric_name = str(payload["metric_name"])
+            tags = {str(k): str(v) for k, v in payload["tags"].items()}
+            if payload["approximate"]:
+                grouper.add_summarized(
+                    MetricGroup(
+                        suite=suite,
+                        metric_name=metric_name,
+                        tags=tags,
+                        values=[],
+                        run_ids=list(payload["run_ids"]),
+                        summary=_decode_summary(payload["summary"]),
+                        bootstrap=_decode_bootstrap(payload["bootstrap"]) if payload["bootstrap"] else None,
+                        reservoir=_decode_reservoir(payload["reservoir"]) if payload.get("reservoir") else None,
+                    )
+                )
+                for encoded, histogram in payload.get("histograms", []):
+                    digest = base64.b64decode(encoded)
+                    if digest not in seen:
+                        seen.add(digest)
+                        grouper.add_histogram(suite, metric_name, tags, LatencyHistogram.from_payload(histogram))
+                continue
+            raw = base64.b64decode(payload["digests"])
+            digests = [raw[i : i + DIGEST_SIZE] for i in range(0, len(raw), DIGEST_SIZE)]
+            fresh: set[bytes] = set()
+            for value, digest in zip(_decode_floats(payload["values"]), digests, strict=True):
+                if digest in seen:
+                    continue
+                seen.add(digest)
+                fresh.add(digest)
+                grouper.add_value(suite, metric_name, tags, value, "", digest)
+            for encoded, histogram in payload.get("histograms", []):
+                if base64.b64decode(encoded) in fresh:
+                    grouper.add_histogram(suite, metric_name, tags, LatencyHistogram.from_payload(histogram))
+            grouper.add_run_ids(suite, metric_name, tags, payload["run_ids"])
+    return grouper.groups(), timeline, replay, sketch_config, bootstrap_config, values_config, sources
@@ -3,11 +3,13 @@ from __future__ import annotations
 
 import argparse
 from pathlib import Path
+from typing import Any
 
-from plots_lib import generate_figures
+from plots_lib import DEFAULT_POINT_BUDGET, FIGURE_FORMATS, FigureOutput, generate_figures
+from profile_lib import profiling
 
 
-def main() -> int:
+def main(argv: list[str] | None = None) -> int:
     parser = argparse.ArgumentParser(description="Plot system-paper figures from analysis JSON.")
     parser.add_argument(
         "--analysis",
@@ -15,15 +17,62 @@ def main() -> int:
         default="research/papers/event-driven-agentic-memory/output/analysis.json",
         help="Path to analysis JSON.",
     )
+    parser.add_argument(
+        "--db",
+        type=str,
+        default=None,
+        help="Aggregate straight from a metrics warehouse (analyze_metrics.py ingest) instead of --analysis.",
+    )
     parser.add_argument(
         "--figures-dir",
         type=str,
         default="research/papers/event-driven-agentic-memory/figures",
         help="Directory for figure outputs.",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--formats",
+        type=str,
+        default="png",
+        help=f"Comma-separated output formats ({', '.join(FIGURE_FORMATS)}); drafts default to PNG only.",
+    )
+    parser.add_argument("--dpi", type=int, default=FigureOutput.dpi, help="Resolution for raster output.")
+    parser.add_argument(
+        "--point-budget",
+        type=int,
+        default=DEFAULT_POINT_BUDGET,
+        help="Maximum points per ECDF/step series; larger series are decimated (ECDF error <= 1/budget).",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        nargs="?",
+        const="profile_plots.json",
+        default=None,
+        help="Write a per-stage timing/memory report (and a .trace.json Chrome trace) to this path.",
+    )
+    args = parser.parse_args(argv)
+
+    formats = tuple(dict.fromkeys(fmt.strip().lower() for fmt in args.formats.split(",") if fmt.strip()))
+    unknown = set(formats).difference(FIGURE_FORMATS)
+    if not formats or unknown:
+        raise SystemExit(f"--formats must list one or more of {', '.join(FIGURE_FORMATS)}")
+    output = FigureOutput(formats=formats, dpi=args.dpi)
+
+    with profiling(Path(args.profile) if args.profile else None):
+        analysis: Path | dict[str, Any] = Path(args.analysis)
+        if args.db:
+            from analysis_lib import TimelineConfig, aggregate_metrics
+            from warehouse_lib import iter_warehouse_records
 
-    generate_figures(Path(args.analysis), Path(args.figures_dir))
+            if not Path(args.db).exists():
+                raise SystemExit(f"warehouse not found: {args.db}")
+            analysis = aggregate_metrics(iter_warehouse_records(Path(args.db)), timeline_config=TimelineConfig())
+        generate_figures(
+            analysis,
+            Path(args.figures_dir),
+            point_budget=args.point_budget,
+            output=output,
+        )
     return 0
 
 
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
 import json
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, cast
 
@@ -9,19 +12,108 @@ import matplotlib
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 from matplotlib.figure import Figure
+from matplotlib.transforms import Bbox
 from mpl_toolkits.axes_grid1.inset_locator import inset_axes
 import numpy as np
 
+from histogram_lib import HISTOGRAM_PERCENTILES, LATENCY_HISTOGRAM_METRIC, LatencyHistogram, percentile_curve
+from output_lib import atomic_path, consistent_read, output_generation
+from profile_lib import profile_stage
+from stats_lib import binned_kde
+from timeline_lib import TIMELINE_METRICS
+
+
+DEFAULT_POINT_BUDGET = 512
+FIGURE_FORMATS = ("png", "svg", "pdf")
+VECTOR_FORMATS = {"svg", "pdf"}
+
+
+@dataclass(frozen=True)
+class FigureOutput:
+    formats: tuple[str, ...] = ("png",)
+    dpi: int = 200
+
+
+_OUTPUT = FigureOutput()
+_POINT_BUDGET = DEFAULT_POINT_BUDGET
+
+
+@contextmanager
+def _figure_output(output: FigureOutput | None, point_budget: int = DEFAULT_POINT_BUDGET) -> Iterator[None]:
+    global _OUTPUT, _POINT_BUDGET
+    previous = _OUTPUT, _POINT_BUDGET
+    _OUTPUT, _POINT_BUDGET = output or FigureOutput(), point_budget
+    try:
+        yield
+    finally:
+        _OUTPUT, _POINT_BUDGET = previous
+
 
 def _load_analysis(path: Path) -> dict[str, Any]:
-    data = json.loads(path.read_text(encoding="utf-8"))
+    with consistent_read(path):
+        data = json.loads(path.read_text(encoding="utf-8"))
     return cast(dict[str, Any], data)
 
 
+def _rasterize_dense(fig: Figure, max_points: int) -> None:
+    # Decimated series never exceed the point budget and a filled outline has
+    # two edges, so twice the budget only catches artists drawn without
+    # decimation, which would otherwise bloat the SVG.
+    for ax in fig.axes:
+        for line in ax.lines:
+            if len(line.get_xdata()) > max_points:
+                line.set_rasterized(True)
+        for collection in ax.collections:
+            n = len(collection.get_offsets()) + sum(len(path.vertices) for path in collection.get_paths())
+            if n > max_points:
+                collection.set_rasterized(True)
+
+
+def _ecdf_points(values: Any, budget: int = DEFAULT_POINT_BUDGET) -> tuple[np.ndarray, np.ndarray]:
+    arr = np.asarray(values, dtype=float)
+    if arr.size <= budget:
+        return np.sort(arr), np.arange(1, arr.size + 1, dtype=float) / float(max(arr.size, 1))
+    # Steps through the ECDF at `budget` evenly spaced probabilities stay within
+    # 1/budget of the exact ECDF everywhere.
+    probs = np.arange(1, budget + 1, dtype=float) / float(budget)
+    return np.quantile(arr, probs, method="inverted_cdf"), probs
+
+
+def _decimate_steps(x: np.ndarray, y: np.ndarray, budget: int = DEFAULT_POINT_BUDGET) -> tuple[np.ndarray, np.ndarray]:
+    if x.size <= budget:
+        return x, y
+    keep: set[int] = {0, x.size - 1}
+    for chunk in np.array_split(np.arange(x.size), max(budget // 2 - 1, 1)):
+        finite = chunk[np.isfinite(y[chunk])]
+        if finite.size:
+            keep.add(int(finite[np.argmin(y[finite])]))
+            keep.add(int(finite[np.argmax(y[finite])]))
+    idx = np.asarray(sorted(keep))
+    return x[idx], y[idx]
+
+
+def _tight_bbox(fig: Figure, dpi: float) -> Bbox:
+    original = fig.dpi
+    fig.set_dpi(dpi)
+    try:
+        bbox = fig.get_tightbbox(fig.canvas.get_renderer())
+    finally:
+        fig.set_dpi(original)
+    return bbox.padded(float(matplotlib.rcParams["savefig.pad_inches"]))
+
+
 def _save_fig(fig: Figure, out_dir: Path, name: str) -> None:
-    out_dir.mkdir(parents=True, exist_ok=True)
-    fig.savefig(out_dir / f"{name}.png", dpi=200, bbox_inches="tight")
-    fig.savefig(out_dir / f"{name}.svg", bbox_inches="tight")
+    output = _OUTPUT
+    with profile_stage("savefig") as stage:
+        # Lay out once and reuse the tight bbox for every format; raster formats
+        # go first so rasterizing dense artists only affects vector outputs.
+        bbox = _tight_bbox(fig, output.dpi)
+        for fmt in sorted(output.formats, key=lambda f: f in VECTOR_FORMATS):
+            if fmt in VECTOR_FORMATS:
+                _rasterize_dense(fig, 2 * _POINT_BUDGET)
+            with atomic_path(out_dir / f"{name}.{fmt}") as tmp:
+                fig.savefig(tmp, format=fmt, dpi=output.dpi, bbox_inches=bbox)
+        stage.items = len(output.formats)
     plt.close(fig)
 
 
@@ -97,54 +189,79 @@ def plot_accuracy_by_tier(
     _save_fig(fig, out_dir, out_name)
 
 
-def plot_latency_summary(groups: list[dict[str, Any]], out_dir: Path) -> None:
+def plot_latency_summary(
+    groups: list[dict[str, Any]],
+    out_dir: Path,
+    *,
+    point_budget: int = DEFAULT_POINT_BUDGET,
+) -> None:
     avg_groups = _group_by(groups, "load.avg_ms", "B")
     p50_groups = _group_by(groups, "load.p50_ms", "B")
     p95_groups = _group_by(groups, "load.p95_ms", "B")
-    if not avg_groups or not p50_groups or not p95_groups:
+    hist_groups = [g for g in _group_by(groups, LATENCY_HISTOGRAM_METRIC, "B") if g.get("histogram")]
+    if not hist_groups and (not avg_groups or not p50_groups or not p95_groups):
         fig, ax = plt.subplots(figsize=(7, 4))
         ax.text(0.5, 0.5, "No Suite B latency data", ha="center", va="center")
         ax.set_axis_off()
         _save_fig(fig, out_dir, "latency_summary")
         return
     scenario_order = ["baseline", "fault-light", "fault-heavy"]
-    scenarios = [s for s in scenario_order if any(g["tags"].get("scenario") == s for g in p95_groups)]
-    if not scenarios:
-        scenarios = sorted({g["tags"].get("scenario", "") for g in p95_groups})
+    present = {g["tags"].get("scenario", "") for g in (hist_groups or p95_groups)}
+    scenarios = [s for s in scenario_order if s in present] or sorted(present)
 
     fig, ax = plt.subplots(figsize=(7.2, 4.4))
     palette = {"baseline": "#1d4ed8", "fault-light": "#0f766e", "fault-heavy": "#b91c1c"}
-    percentile_x = np.array([50.0, 95.0], dtype=float)
 
-    for scenario in scenarios:
-        p50 = next((g for g in p50_groups if g["tags"].get("scenario") == scenario), None)
-        p95 = next((g for g in p95_groups if g["tags"].get("scenario") == scenario), None)
-        if p50 is None or p95 is None:
-            continue
-        y = np.array([float(p50.get("mean", 0.0)), float(p95.get("mean", 0.0))], dtype=float)
-        color = palette.get(scenario, "#334155")
-        ax.plot(percentile_x, y, marker="o", linewidth=2.0, markersize=6, color=color, label=scenario)
+    if hist_groups:
+        max_nines = 4.0
+        for scenario in scenarios:
+            g = next((x for x in hist_groups if x["tags"].get("scenario") == scenario), None)
+            if g is None:
+                continue
+            hist = LatencyHistogram.from_payload(g["histogram"]["buckets"])
+            qs, latencies = percentile_curve(hist, max_nines=max_nines)
+            color = palette.get(scenario, "#334155")
+            ax.plot(-np.log10(1.0 - qs), latencies, linewidth=2.0, color=color, label=f"{scenario} (n={hist.count})")
+            marks = g["histogram"]["percentiles"]
+            mark_x = [-np.log10(1.0 - HISTOGRAM_PERCENTILES[name]) for name in marks]
+            ax.scatter(mark_x, list(marks.values()), s=18, color=color, zorder=3)
+        ticks = np.concatenate(([np.log10(2.0)], np.arange(1.0, max_nines + 1.0)))
+        ax.set_xticks(ticks)
+        ax.set_xticklabels([f"{100.0 * (1.0 - 10.0 ** -t):g}" for t in ticks])
+        ax.set_xlim(ticks[0], max_nines)
+        ax.set_yscale("log")
+        ax.set_title("Suite B Latency Percentile Curves (merged histograms)")
+    else:
+        percentile_x = np.array([50.0, 95.0], dtype=float)
+        for scenario in scenarios:
+            p50 = next((g for g in p50_groups if g["tags"].get("scenario") == scenario), None)
+            p95 = next((g for g in p95_groups if g["tags"].get("scenario") == scenario), None)
+            if p50 is None or p95 is None:
+                continue
+            y = np.array([float(p50.get("mean", 0.0)), float(p95.get("mean", 0.0))], dtype=float)
+            color = palette.get(scenario, "#334155")
+            ax.plot(percentile_x, y, marker="o", linewidth=2.0, markersize=6, color=color, label=scenario)
+        ax.set_xlim(48, 97)
+        ax.set_title("Suite B Latency Percentile Curves")
 
     ax.set_xlabel("Percentile")
     ax.set_ylabel("Latency (ms)")
-    ax.set_title("Suite B Latency Percentile Curves")
-    ax.set_xlim(48, 97)
     ax.grid(alpha=0.2, linestyle="--")
-    ax.legend(frameon=False, fontsize=8)
-
-    inset = inset_axes(ax, width="40%", height="40%", loc="upper right", borderpad=1.0)
-    for scenario in scenarios:
-        g = next((x for x in p95_groups if x["tags"].get("scenario") == scenario), None)
-        if g is None:
-            continue
-        values = sorted(float(v) for v in (g.get("values") or []))
-        if not values:
-            continue
-        y = np.arange(1, len(values) + 1, dtype=float) / float(len(values))
-        inset.step(values, y, where="post", linewidth=1.2, color=palette.get(scenario, "#334155"))
-    inset.set_title("ECDF (p95/run)", fontsize=7)
-    inset.tick_params(axis="both", labelsize=6)
-    inset.grid(alpha=0.15, linestyle=":")
+    ax.legend(frameon=False, fontsize=8, loc="upper left")
+
+    if p95_groups:
+        inset = inset_axes(ax, width="40%", height="40%", loc="lower right", borderpad=1.0)
+        for scenario in scenarios:
+            g = next((x for x in p95_groups if x["tags"].get("scenario") == scenario), None)
+            if g is None:
+                continue
+            if not g.get("values"):
+                continue
+            x, y = _ecdf_points(g["values"], point_budget)
+            inset.step(x, y, where="post", linewidth=1.2, color=palette.get(scenario, "#334155"))
+        inset.set_title("ECDF (p95/run)", fontsize=7)
+        inset.tick_params(axis="both", labelsize=6)
+        inset.grid(alpha=0.15, linestyle=":")
 
     _save_fig(fig, out_dir, "latency_summary")
 
@@ -228,7 +345,13 @@ def plot_rq2_reliability_frontier(groups: list[dict[str, Any]], out_dir: Path) -
     _save_fig(fig, out_dir, "rq2_reliability_frontier")
 
 
-def plot_rq3_replay_consistency(groups: list[dict[str, Any]], out_dir: Path) -> None:
+def plot_rq3_replay_consistency(
+    groups: list[dict[str, Any]],
+    out_dir: Path,
+    replay: dict[str, Any] | None = None,
+) -> None:
+    if replay and replay.get("traces"):
+        _plot_replay_divergence(replay, out_dir)
     rows = [g for g in groups if g.get("suite") == "C" and g.get("metric_name") == "completion.hash"]
     buckets: dict[str, tuple[float, int]] = {"stubbed": (0.0, 0), "auto": (0.0, 0)}
     for g in rows:
@@ -269,6 +392,40 @@ def plot_rq3_replay_consistency(groups: list[dict[str, Any]], out_dir: Path) ->
     _save_fig(fig, out_dir, "rq3_replay_consistency")
 
 
+def _plot_replay_divergence(replay: dict[str, Any], out_dir: Path) -> None:
+    modes = {mode: m for mode, m in replay["modes"].items() if m["traces"]}
+    labels = [mode for mode in ("stubbed", "auto") if mode in modes] + sorted(set(modes) - {"stubbed", "auto"})
+    colors = ["#0ea5e9", "#0284c7", "#7dd3fc"]
+    fig, (ax, ax_hist) = plt.subplots(1, 2, figsize=(10, 4.2), gridspec_kw={"width_ratios": [1, 1.4]})
+    bars = ax.bar(labels, [modes[m]["consensus_rate"] for m in labels], color=colors[: len(labels)])
+    ax.set_ylim(0.0, 1.05)
+    ax.set_ylabel("Share of traces")
+    ax.set_title("Traces Matching Reference")
+    ax.grid(axis="y", alpha=0.2, linestyle="--")
+    for bar, mode in zip(bars, labels, strict=False):
+        n = modes[mode]["traces"]
+        ax.text(bar.get_x() + bar.get_width() / 2, bar.get_height() + 0.02, f"n={n}", ha="center", fontsize=8)
+
+    steps = sorted({step for m in labels for step, _ in modes[m]["first_divergence"]})
+    if steps:
+        width = 0.8 / len(labels)
+        for i, mode in enumerate(labels):
+            counts = dict((step, count) for step, count in modes[mode]["first_divergence"])
+            xs = np.arange(len(steps)) + (i - (len(labels) - 1) / 2) * width
+            ax_hist.bar(xs, [counts.get(step, 0) for step in steps], width, label=mode, color=colors[i % len(colors)])
+        ax_hist.set_xticks(np.arange(len(steps)))
+        ax_hist.set_xticklabels([str(step) for step in steps])
+        ax_hist.legend(frameon=False, fontsize=8)
+    else:
+        ax_hist.text(0.5, 0.5, "No diverging traces", ha="center", va="center")
+    ax_hist.set_xlabel("First diverging step")
+    ax_hist.set_ylabel("Traces")
+    ax_hist.set_title("Replay Divergence")
+    ax_hist.grid(axis="y", alpha=0.2, linestyle="--")
+    fig.suptitle("Replay Divergence from the Modal Hash by Evaluation Mode")
+    _save_fig(fig, out_dir, "replay_divergence")
+
+
 def plot_graceful_degradation_profile(groups: list[dict[str, Any]], out_dir: Path) -> None:
     rows = [g for g in groups if g.get("metric_name") == "degradation.useful_count"]
     if not rows:
@@ -358,6 +515,50 @@ def plot_throughput_errors(groups: list[dict[str, Any]], out_dir: Path) -> None:
     _save_fig(fig, out_dir, "throughput_errors")
 
 
+def plot_throughput_timeline(
+    timelines: dict[str, Any],
+    out_dir: Path,
+    *,
+    point_budget: int = DEFAULT_POINT_BUDGET,
+) -> None:
+    scenario_order = ["baseline", "fault-light", "fault-heavy"]
+    present = list(timelines.get("scenarios", {}))
+    scenarios = [s for s in scenario_order if s in present] + sorted(s for s in present if s not in scenario_order)
+    palette = {"baseline": "#1d4ed8", "fault-light": "#0f766e", "fault-heavy": "#b91c1c"}
+    panels = (("rps", "RPS per run", 1.0), ("error_rate", "Error rate (%)", 100.0), ("latency_ms", "Latency (ms)", 1.0))
+
+    fig, axes = plt.subplots(len(panels), 1, figsize=(7.2, 6.4), sharex=True)
+    for scenario in scenarios:
+        timeline = timelines["scenarios"][scenario]
+        t = np.asarray(timeline["t_s"], dtype=float)
+        for ax, (key, _, scale) in zip(axes, panels):
+            y = np.asarray([np.nan if v is None else float(v) * scale for v in timeline[key]], dtype=float)
+            x, y = _decimate_steps(t, y, point_budget)
+            ax.step(x, y, where="post", linewidth=1.6, color=palette.get(scenario, "#334155"), label=scenario)
+
+    config = timelines.get("config", {})
+    for ax, (_, label, _) in zip(axes, panels):
+        if float(config.get("warmup_s", 0.0)) > 0:
+            ax.axvspan(0.0, float(config["warmup_s"]), color="#94a3b8", alpha=0.2, linewidth=0)
+        ax.set_ylabel(label)
+        ax.grid(alpha=0.2, linestyle="--")
+    axes[0].legend(frameon=False, fontsize=8, ncol=len(scenarios))
+    axes[0].set_title(f"Suite B Timeline ({float(config.get('window_s', 1.0)):g}s buckets, time since run start)")
+    axes[-1].set_xlabel("Time since run start (s)")
+    _save_fig(fig, out_dir, "throughput_timeline")
+
+
+def _violin_density(group: dict[str, Any]) -> tuple[np.ndarray, np.ndarray] | None:
+    kde = group.get("kde")
+    if kde is None:
+        result = binned_kde(group.get("values") or [])
+        if result is None:
+            return None
+        kde = {"lo": result.lo, "hi": result.hi, "density": result.density}
+    density = np.asarray(kde["density"], dtype=float)
+    return np.linspace(float(kde["lo"]), float(kde["hi"]), density.size), density
+
+
 def plot_violin(
     groups: list[dict[str, Any]],
     metric_name: str,
@@ -375,12 +576,10 @@ def plot_violin(
         _save_fig(fig, out_dir, out_name)
         return
     tiers = _tier_order(sorted({g["tags"].get("memory_tier", "") for g in metric_groups}))
-    data: list[list[float]] = [
-        list(next((g.get("values") for g in metric_groups if g["tags"].get("memory_tier") == t), []) or [])
-        for t in tiers
-    ]
-    if all(len(set(series)) <= 1 for series in data if series):
-        means = [float(series[0]) if series else 0.0 for series in data]
+    by_tier = [next((g for g in metric_groups if g["tags"].get("memory_tier") == t), None) for t in tiers]
+    densities = [_violin_density(g) if g is not None else None for g in by_tier]
+    if all(d is None for d in densities):
+        means = [float(g.get("mean", 0.0)) if g is not None else 0.0 for g in by_tier]
         fig, ax = plt.subplots(figsize=(7, 4))
         ax.bar(tiers, means, color="#52796f")
         ax.set_ylabel(metric_name.replace("suite_a.", "").replace("_", " ").title())
@@ -389,7 +588,19 @@ def plot_violin(
         _save_fig(fig, out_dir, out_name)
         return
     fig, ax = plt.subplots(figsize=(7, 4))
-    ax.violinplot(data, showmeans=True)
+    color = "#1f77b4"
+    for pos, (group, violin) in enumerate(zip(by_tier, densities, strict=True), start=1):
+        if group is None:
+            continue
+        mean_val = float(group.get("mean", 0.0))
+        if violin is None:
+            ax.hlines(mean_val, pos - 0.25, pos + 0.25, color=color)
+            continue
+        y, density = violin
+        half = 0.4 * density / float(density.max())
+        ax.fill_betweenx(y, pos - half, pos + half, facecolor=color, edgecolor=color, alpha=0.3)
+        ax.hlines([y[0], y[-1], mean_val], pos - 0.1, pos + 0.1, color=color)
+        ax.vlines(pos, y[0], y[-1], color=color)
     ax.set_xticks(range(1, len(tiers) + 1))
     ax.set_xticklabels(tiers)
     ax.set_ylabel(metric_name.replace("suite_a.", "").replace("_", " ").title())
@@ -397,37 +608,94 @@ def plot_violin(
     _save_fig(fig, out_dir, out_name)
 
 
-def generate_figures(analysis_path: Path, figures_dir: Path) -> None:
-    analysis = _load_analysis(analysis_path)
-    groups: list[dict[str, Any]] = list(analysis.get("groups", []))
-    plot_event_traceability_map(figures_dir)
-    plot_rq1_quality_tradeoff(groups, figures_dir)
-    plot_rq2_reliability_frontier(groups, figures_dir)
-    plot_rq3_replay_consistency(groups, figures_dir)
-    plot_graceful_degradation_profile(groups, figures_dir)
-    plot_accuracy_by_tier(groups, figures_dir, scenario="baseline")
-    plot_accuracy_by_tier(
-        groups,
-        figures_dir,
-        scenario="adversarial",
-        title="Suite A Adversarial Accuracy by Memory Tier",
-        out_name="accuracy_by_tier_adversarial",
-    )
-    plot_latency_summary(groups, figures_dir)
-    plot_throughput_errors(groups, figures_dir)
-    plot_violin(
-        groups,
-        "suite_a.drift",
-        "Suite A Drift by Memory Tier",
-        "drift_violin",
-        figures_dir,
-        scenario="baseline",
-    )
-    plot_violin(
-        groups,
-        "suite_a.faithfulness",
-        "Suite A Faithfulness by Memory Tier",
-        "faithfulness_violin",
-        figures_dir,
-        scenario="baseline",
-    )
+def _plot(name: str, fn: Callable[..., None], *args: Any, **kwargs: Any) -> None:
+    with profile_stage(f"plot:{name}"):
+        fn(*args, **kwargs)
+
+
+def generate_figures(
+    analysis: Path | dict[str, Any],
+    figures_dir: Path,
+    *,
+    metric_names: set[str] | None = None,
+    point_budget: int = DEFAULT_POINT_BUDGET,
+    output: FigureOutput | None = None,
+) -> None:
+    with _figure_output(output, point_budget), output_generation(figures_dir):
+        _generate_figures(analysis, figures_dir, metric_names=metric_names, point_budget=point_budget)
+
+
+def _generate_figures(
+    analysis: Path | dict[str, Any],
+    figures_dir: Path,
+    *,
+    metric_names: set[str] | None,
+    point_budget: int,
+) -> None:
+    with profile_stage("load_analysis") as stage:
+        if isinstance(analysis, Path):
+            analysis = _load_analysis(analysis)
+        groups: list[dict[str, Any]] = list(analysis.get("groups", []))
+        stage.items = len(groups)
+
+    def _wanted(*metrics: str) -> bool:
+        if metric_names is None:
+            return True
+        return any(metric in metric_names for metric in metrics)
+
+    if metric_names is None:
+        _plot("event_traceability_map", plot_event_traceability_map, figures_dir)
+    if _wanted("suite_a.accuracy", "suite_a.drift"):
+        _plot("rq1_quality_tradeoff", plot_rq1_quality_tradeoff, groups, figures_dir)
+    if _wanted("load.p95_ms", "load.errors", "load.requests"):
+        _plot("rq2_reliability_frontier", plot_rq2_reliability_frontier, groups, figures_dir)
+    if _wanted("completion.hash"):
+        _plot(
+            "rq3_replay_consistency",
+            plot_rq3_replay_consistency,
+            groups,
+            figures_dir,
+            replay=analysis.get("replay"),
+        )
+    if _wanted("degradation.useful_count"):
+        _plot("graceful_degradation_profile", plot_graceful_degradation_profile, groups, figures_dir)
+    if _wanted("suite_a.accuracy"):
+        _plot("accuracy_by_tier", plot_accuracy_by_tier, groups, figures_dir, scenario="baseline")
+        _plot(
+            "accuracy_by_tier_adversarial",
+            plot_accuracy_by_tier,
+            groups,
+            figures_dir,
+            scenario="adversarial",
+            title="Suite A Adversarial Accuracy by Memory Tier",
+            out_name="accuracy_by_tier_adversarial",
+        )
+    if _wanted("load.avg_ms", "load.p50_ms", "load.p95_ms", LATENCY_HISTOGRAM_METRIC):
+        _plot("latency_summary", plot_latency_summary, groups, figures_dir, point_budget=point_budget)
+    if _wanted("load.rps", "load.errors", "load.requests"):
+        _plot("throughput_errors", plot_throughput_errors, groups, figures_dir)
+    timelines = analysis.get("timelines")
+    if timelines and _wanted(*TIMELINE_METRICS):
+        _plot("throughput_timeline", plot_throughput_timeline, timelines, figures_dir, point_budget=point_budget)
+    if _wanted("suite_a.drift"):
+        _plot(
+            "drift_violin",
+            plot_violin,
+            groups,
+            "suite_a.drift",
+            "Suite A Drift by Memory Tier",
+            "drift_violin",
+            figures_dir,
+            scenario="baseline",
+        )
+    if _wanted("suite_a.faithfulness"):
+        _plot(
+            "faithfulness_violin",
+            plot_violin,
+            groups,
+            "suite_a.faithfulness",
+            "Suite A Faithfulness by Memory Tier",
+            "faithfulness_violin",
+            figures_dir,
+            scenario="baseline",
+        )
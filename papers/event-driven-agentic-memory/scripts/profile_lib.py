@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, ContextManager
+
+
+@dataclass
+class StageEvent:
+    name: str
+    path: str
+    start_ns: int
+    wall_ns: int = 0
+    cpu_ns: int = 0
+    peak_bytes: int = 0
+    items: int = 0
+
+
+@dataclass
+class _Frame:
+    event: StageEvent
+    cpu_start: int
+    mem_start: int
+    mem_peak: int
+
+
+class _NullStage:
+    items = 0
+
+    def __enter__(self) -> _NullStage:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+
+_NULL_STAGE = _NullStage()
+
+
+@dataclass
+class Profiler:
+    trace_memory: bool = True
+    events: list[StageEvent] = field(default_factory=list)
+    _stack: list[_Frame] = field(default_factory=list)
+    _origin_ns: int = field(default_factory=time.perf_counter_ns)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageEvent]:
+        path = "/".join([frame.event.name for frame in self._stack] + [name])
+        mem_start = 0
+        if self.trace_memory and tracemalloc.is_tracing():
+            if self._stack:
+                parent = self._stack[-1]
+                parent.mem_peak = max(parent.mem_peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            mem_start = tracemalloc.get_traced_memory()[0]
+        event = StageEvent(name=name, path=path, start_ns=time.perf_counter_ns() - self._origin_ns)
+        frame = _Frame(event=event, cpu_start=time.process_time_ns(), mem_start=mem_start, mem_peak=mem_start)
+        self._stack.append(frame)
+        try:
+            yield event
+        finally:
+            event.wall_ns = time.perf_counter_ns() - self._origin_ns - event.start_ns
+            event.cpu_ns = time.process_time_ns() - frame.cpu_start
+            self._stack.pop()
+            if self.trace_memory and tracemalloc.is_tracing():
+                frame.mem_peak = max(frame.mem_peak, tracemalloc.get_traced_memory()[1])
+                event.peak_bytes = max(frame.mem_peak - frame.mem_start, 0)
+                if self._stack:
+                    parent = self._stack[-1]
+                    parent.mem_peak = max(parent.mem_peak, frame.mem_peak)
+                tracemalloc.reset_peak()
+            self.events.append(event)
+
+    def report(self) -> dict[str, Any]:
+        stages: dict[str, dict[str, Any]] = {}
+        for event in sorted(self.events, key=lambda e: e.start_ns):
+            row = stages.setdefault(
+                event.path,
+                {"stage": event.path, "calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "peak_bytes": 0, "items": 0},
+            )
+            row["calls"] += 1
+            row["wall_s"] += event.wall_ns / 1e9
+            row["cpu_s"] += event.cpu_ns / 1e9
+            row["peak_bytes"] = max(row["peak_bytes"], event.peak_bytes)
+            row["items"] += int(event.items)
+        total_ns = max((e.start_ns + e.wall_ns for e in self.events), default=0)
+        return {
+            "total_wall_s": total_ns / 1e9,
+            "memory_traced": self.trace_memory,
+            "stages": list(stages.values()),
+        }
+
+    def chrome_trace(self) -> dict[str, Any]:
+        pid = os.getpid()
+        return {
+            "displayTimeUnit": "ms",
+            "traceEvents": [
+                {
+                    "name": event.name,
+                    "cat": "stage",
+                    "ph": "X",
+                    "ts": event.start_ns / 1e3,
+                    "dur": event.wall_ns / 1e3,
+                    "pid": pid,
+                    "tid": 0,
+                    "args": {
+                        "path": event.path,
+                        "cpu_ms": event.cpu_ns / 1e6,
+                        "peak_bytes": event.peak_bytes,
+                        "items": event.items,
+                    },
+                }
+                for event in sorted(self.events, key=lambda e: e.start_ns)
+            ],
+        }
+
+    def write(self, report_path: Path) -> Path:
+        trace_path = report_path.with_name(report_path.name.removesuffix(".json") + ".trace.json")
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(self.report(), indent=2), encoding="utf-8")
+        trace_path.write_text(json.dumps(self.chrome_trace()), encoding="utf-8")
+        return trace_path
+
+
+_ACTIVE: Profiler | None = None
+
+
+def profile_stage(name: str) -> ContextManager[Any]:
+    if _ACTIVE is None:
+        return _NULL_STAGE
+    return _ACTIVE.stage(name)
+
+
+def is_profiling() -> bool:
+    return _ACTIVE is not None
+
+
+@contextmanager
+def profiling(report_path: Path | None, *, trace_memory: bool = True) -> Iterator[Profiler | None]:
+    global _ACTIVE
+    if report_path is None:
+        yield None
+        return
+    profiler = Profiler(trace_memory=trace_memory)
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    _ACTIVE = profiler
+    try:
+        yield profiler
+    finally:
+        _ACTIVE = None
+        if started_tracing:
+            tracemalloc.stop()
+        trace_path = profiler.write(report_path)
+        print(f"profile: wrote {report_path} and {trace_path}")
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+from collections import Counter
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any, cast
+
+from histogram_lib import LatencyHistogram
+
+SCALAR_TYPES = frozenset({str, int, float, bool, type(None)})
+
+# field -> (kind, required). JSON null counts as missing, numbers must be finite
+# (ints are widened to float, bools rejected) and tag values must be scalars
+# (null included; tags are stringified later). Only the fields that decide what
+# is measured are strict: "text" metadata takes any scalar and is coerced with
+# str(), and an integral float is accepted as an int.
+METRIC_RECORD_SCHEMA: dict[str, tuple[str, bool]] = {
+    "suite": ("str", True),
+    "metric_name": ("str", True),
+    "value": ("number", False),
+    "run_id": ("text", False),
+    "case": ("text", False),
+    "ts": ("int", False),
+    "tags": ("tags", False),
+    "histogram": ("histogram", False),
+}
+_DEFAULTS = {"str": '""', "text": '""', "int": "None", "tags": "{}"}
+TIER_ORDER = ("no-memory", "summary", "vector", "graph", "hybrid")
+VOLATILE_TAG_KEYS = {
+    "run_name",
+    "source_run_id",
+    "source_uid",
+    "step",
+    "snapshot_id",
+    "snapshot_created_at",
+}
+
+
+class RecordError(ValueError):
+    def __init__(self, reason: str, message: str) -> None:
+        super().__init__(message)
+        self.reason = reason
+
+
+def record_digest(record: dict[str, Any]) -> bytes:
+    key = json.dumps(record, sort_keys=True)
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+
+
+@dataclass(slots=True)
+class MetricRecord:
+    suite: str
+    metric_name: str
+    value: float
+    run_id: str = ""
+    case: str = ""
+    ts: int | None = None
+    tags: dict[str, Any] = field(default_factory=dict)
+    histogram: LatencyHistogram | None = None
+    raw: dict[str, Any] = field(default_factory=dict, repr=False)
+    _digest: bytes | None = field(default=None, repr=False)
+
+    @property
+    def digest(self) -> bytes:
+        if self._digest is None:
+            self._digest = record_digest(self.raw)
+        return self._digest
+
+
+def _check(name: str, kind: str, value: Any) -> Any:
+    if kind == "str" and type(value) is str:
+        return value
+    if kind == "text" and type(value) in SCALAR_TYPES:
+        return str(value)
+    if kind == "int" and type(value) is int:
+        return value
+    if kind == "int" and type(value) is float and value.is_integer():
+        return int(value)
+    if kind == "number" and type(value) in (int, float):
+        value = float(value)
+        if not math.isfinite(value):
+            raise RecordError("non_finite", f"{name} is not finite: {value!r}")
+        return value
+    if kind == "tags" and type(value) is dict:
+        for key, tag in value.items():
+            if type(tag) not in SCALAR_TYPES:
+                raise RecordError("type", f"tag {key!r} must be a scalar, got {type(tag).__name__}")
+        return value
+    if kind == "histogram" and type(value) is dict:
+        try:
+            return LatencyHistogram.from_payload(value)
+        except (KeyError, TypeError, ValueError) as exc:
+            raise RecordError("histogram", f"bad histogram: {exc}") from None
+    expected = {"tags": "object", "histogram": "object", "text": "a scalar"}.get(kind, kind)
+    raise RecordError("type", f"{name} must be {expected}, got {type(value).__name__}")
+
+
+def _validate(schema: dict[str, tuple[str, bool]], raw: Any) -> MetricRecord:
+    if type(raw) is not dict:
+        raise RecordError("type", f"record must be an object, got {type(raw).__name__}")
+    out: dict[str, Any] = {}
+    for name, (kind, required) in schema.items():
+        value = raw.get(name)
+        if value is None or value == "" and required or value == {} and kind == "histogram":
+            if required:
+                raise RecordError("missing", f"missing {name}")
+            continue
+        out[name] = _check(name, kind, value)
+    if "value" not in out:
+        if "histogram" not in out:
+            raise RecordError("missing", "missing value")
+        out["value"] = out["histogram"].mean
+    return MetricRecord(raw=raw, **out)
+
+
+def _field_source(name: str, kind: str, required: bool) -> list[str]:
+    var = f"f_{name}"
+    lines = [f"    {var} = get({name!r})"]
+    if kind == "histogram":
+        return lines + [f"    if {var}:", "        return slow(raw)", f"    {var} = None"]
+    if kind == "number":
+        return lines + [
+            f"    if {var}.__class__ is not float:",
+            f"        if {var}.__class__ is not int:",
+            "            return slow(raw)",
+            f"        {var} = float({var})",
+            f"    elif {var} - {var}:",
+            "        return slow(raw)",
+        ]
+    cls = {"str": "str", "text": "str", "int": "int", "tags": "dict"}[kind]
+    if required:
+        lines += [f"    if {var}.__class__ is not {cls} or not {var}:", "        return slow(raw)"]
+    else:
+        lines += [
+            f"    if {var} is None:",
+            f"        {var} = {_DEFAULTS[kind]}",
+            f"    elif {var}.__class__ is not {cls}:",
+            "        return slow(raw)",
+        ]
+    if kind == "tags":
+        lines += [f"    for tag in {var}.values():", "        if tag.__class__ not in scalar:", "            return slow(raw)"]
+    return lines
+
+
+def compile_decoder(schema: dict[str, tuple[str, bool]] = METRIC_RECORD_SCHEMA) -> Callable[[Any], MetricRecord]:
+    # The generated fast path only type-checks; anything unusual (ints to widen,
+    # nulls, histograms, bad input) falls through to _validate, which decodes or
+    # raises a RecordError naming the problem.
+    lines = ["def decode(raw):", "    if raw.__class__ is not dict:", "        return slow(raw)", "    get = raw.get"]
+    for name, (kind, required) in schema.items():
+        lines += _field_source(name, kind, required)
+    args = ", ".join(f"{name}=f_{name}" for name in schema)
+    lines.append(f"    return record({args}, raw=raw)")
+    namespace: dict[str, Any] = {
+        "slow": lambda raw: _validate(schema, raw),
+        "record": MetricRecord,
+        "scalar": SCALAR_TYPES,
+    }
+    exec(compile("\n".join(lines), f"<decoder {id(schema):x}>", "exec"), namespace)
+    return cast(Callable[[Any], MetricRecord], namespace["decode"])
+
+
+decode_record = compile_decoder()
+
+
+@dataclass
+class Quarantine:
+    path: Path | None = None
+    decoded: int = 0
+    reasons: Counter[str] = field(default_factory=Counter)
+    _handle: IO[str] | None = field(default=None, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
+
+    @property
+    def rejected(self) -> int:
+        return sum(self.reasons.values())
+
+    def reject(self, location: str, line: str, error: RecordError) -> None:
+        self.reasons[error.reason] += 1
+        if self.path is None:
+            return
+        if self._handle is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = self.path.open("w", encoding="utf-8")
+        entry = {"location": location, "reason": error.reason, "error": str(error), "line": line}
+        self._handle.write(json.dumps(entry) + "\n")
+        self._handle.flush()
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "decoded": self.decoded,
+            "rejected": self.rejected,
+            "reasons": dict(sorted(self.reasons.items())),
+            "quarantine": str(self.path) if self.path is not None and self.rejected else None,
+        }
+
+
+def decode_lines(
+    lines: Iterator[str],
+    source: str,
+    *,
+    quarantine: Quarantine | None = None,
+    start: int = 1,
+) -> Iterator[MetricRecord]:
+    decode = decode_record
+    loads = json.loads
+    for lineno, line in enumerate(lines, start=start):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            try:
+                raw = loads(line)
+            except ValueError as exc:
+                raise RecordError("json", f"invalid JSON: {exc}") from None
+            record = decode(raw)
+        except RecordError as exc:
+            if quarantine is None:
+                raise RecordError(exc.reason, f"{source}:{lineno}: {exc}") from None
+            quarantine.reject(f"{source}:{lineno}", line, exc)
+            continue
+        if quarantine is not None:
+            quarantine.decoded += 1
+        yield record
+
+
+def iter_metrics(path: Path, *, quarantine: Quarantine | None = None) -> Iterator[MetricRecord]:
+    if not path.exists():
+        raise FileNotFoundError(f"metrics file not found: {path}")
+    with path.open("r", encoding="utf-8") as handle:
+        yield from decode_lines(handle, str(path), quarantine=quarantine)
+
+
+def canonical_tier(value: str | None) -> str | None:
+    if value is None:
+        return None
+    raw = value.strip().lower()
+    if raw == "recent":
+        return "no-memory"
+    return raw
+
+
+def normalize_tags(tags: dict[str, Any]) -> dict[str, str]:
+    normalized: dict[str, str] = {}
+    for key, value in tags.items():
+        key_str = str(key)
+        if key_str in VOLATILE_TAG_KEYS:
+            continue
+        normalized[key_str] = str(value)
+    tier = normalized.get("memory_tier")
+    if tier is not None:
+        normalized["memory_tier"] = canonical_tier(tier) or tier
+    return normalized
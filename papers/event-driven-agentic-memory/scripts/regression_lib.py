@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from record_lib import normalize_tags
+from stats_lib import (
+    cliffs_delta,
+    cliffs_delta_counts,
+    cohens_d_batch,
+    mann_whitney_u,
+    mann_whitney_u_counts,
+    value_counts,
+    welch_t_pvalues,
+)
+
+GATE_FORMAT = "regression-gate/1"
+DEFAULT_TOLERANCES = ("load.p95_ms=+10%", "load.rps=-10%", "load.errors=+10%")
+_SPEC = re.compile(r"^([+-])(\d+(?:\.\d*)?|\.\d+)(%?)$")
+
+GroupKey = tuple[str, str, tuple[tuple[str, str], ...]]
+
+
+@dataclass(frozen=True)
+class Tolerance:
+    metric: str
+    direction: int
+    limit: float
+    relative: bool
+
+    @classmethod
+    def parse(cls, text: str) -> Tolerance:
+        metric, sep, spec = text.partition("=")
+        match = _SPEC.match(spec.strip())
+        if not sep or not metric.strip() or match is None:
+            raise ValueError(
+                f"bad tolerance {text!r}; expected METRIC=+N% (higher is worse) or METRIC=-N (lower is worse)"
+            )
+        sign, number, percent = match.groups()
+        limit = float(number) / 100.0 if percent else float(number)
+        return cls(metric=metric.strip(), direction=1 if sign == "+" else -1, limit=limit, relative=bool(percent))
+
+    @property
+    def spec(self) -> str:
+        sign = "+" if self.direction > 0 else "-"
+        return f"{sign}{self.limit * 100:g}%" if self.relative else f"{sign}{self.limit:g}"
+
+
+@dataclass(frozen=True)
+class GateConfig:
+    tolerances: tuple[Tolerance, ...] = tuple(Tolerance.parse(text) for text in DEFAULT_TOLERANCES)
+    alpha: float = 0.05
+
+
+def _index(analysis: dict[str, Any], metrics: set[str]) -> dict[GroupKey, dict[str, Any]]:
+    index: dict[GroupKey, dict[str, Any]] = {}
+    for group in analysis.get("groups", []):
+        if group.get("metric_name") not in metrics:
+            continue
+        tags = normalize_tags(group.get("tags", {}))
+        index[(str(group["suite"]), str(group["metric_name"]), tuple(sorted(tags.items())))] = group
+    return index
+
+
+def _values_mode(analysis: dict[str, Any]) -> str:
+    return str(analysis.get("values", {}).get("mode", "full"))
+
+
+def _rank_tests(baseline: list[float], candidate: list[float]) -> tuple[float | None, float | None]:
+    if not baseline or not candidate:
+        return None, None
+    counts_b, counts_c = value_counts(baseline), value_counts(candidate)
+    if counts_b is not None and counts_c is not None and counts_b.integral and counts_c.integral:
+        return cliffs_delta_counts(counts_c, counts_b), mann_whitney_u_counts(counts_c, counts_b).p_value
+    return cliffs_delta(candidate, baseline), mann_whitney_u(candidate, baseline).p_value
+
+
+def _describe(key: GroupKey) -> dict[str, Any]:
+    return {"suite": key[0], "metric_name": key[1], "tags": dict(key[2])}
+
+
+def compare_analyses(
+    baseline: dict[str, Any],
+    candidate: dict[str, Any],
+    config: GateConfig,
+) -> dict[str, Any]:
+    tolerances = {t.metric: t for t in config.tolerances}
+    base_index = _index(baseline, set(tolerances))
+    cand_index = _index(candidate, set(tolerances))
+    shared = sorted(base_index.keys() & cand_index.keys())
+    # Rank tests on a reservoir subsample would test k values as if they were
+    # the whole group; only complete samples get them, otherwise Welch decides.
+    rank_tests = _values_mode(baseline) == "full" and _values_mode(candidate) == "full"
+    results: list[dict[str, Any]] = []
+    if shared:
+        # Effect sizes, Welch p-values and tolerance checks run as arrays over
+        # every shared group; only the rank tests need the raw values per pair.
+        def _column(index: dict[GroupKey, dict[str, Any]], field: str) -> np.ndarray:
+            return np.asarray([float(index[key].get(field) or 0.0) for key in shared])
+
+        n_b, mean_b, std_b = (_column(base_index, f) for f in ("n", "mean", "std"))
+        n_c, mean_c, std_c = (_column(cand_index, f) for f in ("n", "mean", "std"))
+        direction = np.asarray([tolerances[key[1]].direction for key in shared], dtype=float)
+        limit = np.asarray([tolerances[key[1]].limit for key in shared])
+        relative = np.asarray([tolerances[key[1]].relative for key in shared])
+        delta = mean_c - mean_b
+        delta_pct = np.divide(delta, np.abs(mean_b), out=np.full(delta.shape, np.nan), where=mean_b != 0)
+        allowed = np.where(relative, limit * np.abs(mean_b), limit)
+        worse = direction * delta
+        d = cohens_d_batch(n_c, mean_c, std_c**2, n_b, mean_b, std_b**2)
+        p_welch = welch_t_pvalues(mean_c, std_c**2, n_c, mean_b, std_b**2, n_b)
+
+        for i, key in enumerate(shared):
+            cliffs, p_mw = None, None
+            if rank_tests:
+                cliffs, p_mw = _rank_tests(base_index[key].get("values") or [], cand_index[key].get("values") or [])
+            p = p_mw if p_mw is not None else float(p_welch[i])
+            significant = not np.isnan(p) and p < config.alpha
+            if worse[i] > allowed[i]:
+                status, reason = ("fail", "regression") if significant else ("pass", "not_significant")
+            else:
+                status, reason = "pass", "improved" if worse[i] < 0 and significant else "within_tolerance"
+            results.append(
+                {
+                    **_describe(key),
+                    "status": status,
+                    "reason": reason,
+                    "tolerance": tolerances[key[1]].spec,
+                    "n_baseline": int(n_b[i]),
+                    "n_candidate": int(n_c[i]),
+                    "mean_baseline": float(mean_b[i]),
+                    "mean_candidate": float(mean_c[i]),
+                    "delta_mean": float(delta[i]),
+                    "delta_pct": None if np.isnan(delta_pct[i]) else float(delta_pct[i]),
+                    "allowed_delta": float(direction[i] * allowed[i]),
+                    "cohens_d": float(d[i]),
+                    "cliffs_delta": cliffs,
+                    "p_mann_whitney": p_mw,
+                    "p_welch": None if np.isnan(p_welch[i]) else float(p_welch[i]),
+                    "test": "welch" if p_mw is None else "mann_whitney",
+                }
+            )
+    failed = sum(r["status"] == "fail" for r in results)
+    return {
+        "format": GATE_FORMAT,
+        "alpha": config.alpha,
+        "tolerances": {t.metric: t.spec for t in config.tolerances},
+        "values_mode": {"baseline": _values_mode(baseline), "candidate": _values_mode(candidate)},
+        "passed": failed == 0,
+        "counts": {
+            "compared": len(results),
+            "failed": failed,
+            "missing": len(base_index.keys() - cand_index.keys()),
+            "new": len(cand_index.keys() - base_index.keys()),
+        },
+        "results": results,
+        "missing": [_describe(key) for key in sorted(base_index.keys() - cand_index.keys())],
+        "new": [_describe(key) for key in sorted(cand_index.keys() - base_index.keys())],
+    }
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+
+from record_lib import MetricRecord
+
+REPLAY_SUITE = "C"
+REPLAY_METRIC = "completion.hash"
+STUB_PREFIX = "[stub]"
+REPLAY_RUNS_LISTED = 50
+_CONFLICT = -1
+
+
+def replay_mode(tags: dict[str, Any]) -> str:
+    if str(tags.get("hash", "")).startswith(STUB_PREFIX):
+        return "stubbed"
+    if str(tags.get("llm_mode", "")).strip().lower() == "stub":
+        return "stubbed"
+    return "auto"
+
+
+@dataclass
+class ReplayIndex:
+    track_digests: bool = False
+    cases: list[str] = field(default_factory=list)
+    run_ids: list[str] = field(default_factory=list)
+    modes: list[str] = field(default_factory=list)
+    steps: list[int | None] = field(default_factory=list)
+    hash_ids: list[int] = field(default_factory=list)
+    hashes: list[str] = field(default_factory=list)
+    digests: list[bytes] = field(default_factory=list)
+    _hash_index: dict[str, int] = field(default_factory=dict, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.hash_ids)
+
+    def add_record(self, record: MetricRecord, digest: bytes | None = None) -> None:
+        if record.metric_name != REPLAY_METRIC or record.suite != REPLAY_SUITE:
+            return
+        tags = record.tags
+        step = tags.get("step")
+        try:
+            step = int(step) if step is not None else None
+        except (TypeError, ValueError):
+            step = None
+        digest_tag = str(tags.get("hash", ""))
+        if digest_tag.startswith(STUB_PREFIX):
+            digest_tag = digest_tag[len(STUB_PREFIX) :].strip()
+        self.add_sample(record.case, record.run_id, replay_mode(tags), step, digest_tag, digest)
+
+    def add_sample(
+        self,
+        case: str,
+        run_id: str,
+        mode: str,
+        step: int | None,
+        digest_tag: str,
+        digest: bytes | None = None,
+    ) -> None:
+        hash_id = self._hash_index.get(digest_tag)
+        if hash_id is None:
+            hash_id = self._hash_index[digest_tag] = len(self.hashes)
+            self.hashes.append(digest_tag)
+        self.cases.append(case)
+        self.run_ids.append(run_id)
+        self.modes.append(mode)
+        self.steps.append(step)
+        self.hash_ids.append(hash_id)
+        if self.track_digests and digest is not None:
+            self.digests.append(digest)
+
+
+def _histogram(counter: Counter[int]) -> list[list[int]]:
+    return [[step, count] for step, count in sorted(counter.items())]
+
+
+def build_replay_report(index: ReplayIndex) -> dict[str, Any]:
+    # Traces are compared against the modal hash of each (mode, case, step), so
+    # every replay is checked once against the index instead of against every
+    # other replay. This is a divergence index only: whether a run passed is
+    # the record's own value (its hash-match flag), which the anchor and the
+    # RQ3 bars use, since live completions legitimately differ between runs.
+    traces: dict[tuple[str, str], dict[int, int]] = {}
+    trace_modes: dict[tuple[str, str], str] = {}
+    for case, run_id, mode, step, hash_id in zip(index.cases, index.run_ids, index.modes, index.steps, index.hash_ids):
+        key = (case, run_id)
+        steps = traces.setdefault(key, {})
+        if step is None:
+            step = len(steps)
+        previous = steps.get(step)
+        steps[step] = hash_id if previous is None or previous == hash_id else _CONFLICT
+        if mode == "stubbed" or key not in trace_modes:
+            trace_modes[key] = mode
+
+    counts: dict[tuple[str, str], dict[int, Counter[int]]] = {}
+    for key, steps in traces.items():
+        by_step = counts.setdefault((trace_modes[key], key[0]), {})
+        for step, hash_id in steps.items():
+            by_step.setdefault(step, Counter())[hash_id] += 1
+    reference: dict[tuple[str, str], list[tuple[int, int]]] = {}
+    for cell, by_step in counts.items():
+        reference[cell] = [
+            (step, min((h for h in counter if h != _CONFLICT), key=lambda h: (-counter[h], h), default=_CONFLICT))
+            for step, counter in sorted(by_step.items())
+        ]
+
+    cells: dict[tuple[str, str], dict[str, Any]] = {}
+    for key, steps in traces.items():
+        cell = (trace_modes[key], key[0])
+        report = cells.setdefault(
+            cell,
+            {"traces": 0, "first": Counter(), "kinds": Counter(), "runs": []},
+        )
+        report["traces"] += 1
+        for step, expected in reference[cell]:
+            actual = steps.get(step)
+            if actual != expected:
+                kind = "missing" if actual is None else "conflict" if actual == _CONFLICT else "hash"
+                report["first"][step] += 1
+                report["kinds"][kind] += 1
+                report["runs"].append({"run_id": key[1], "first_step": step, "kind": kind})
+                break
+
+    case_rows: list[dict[str, Any]] = []
+    modes: dict[str, dict[str, Any]] = {}
+    for (mode, case), report in sorted(cells.items()):
+        diverged = sum(report["first"].values())
+        mismatches = Counter(
+            {
+                step: report["traces"] - counts[(mode, case)][step][expected]
+                for step, expected in reference[(mode, case)]
+                if report["traces"] - counts[(mode, case)][step][expected]
+            }
+        )
+        case_rows.append(
+            {
+                "case": case,
+                "mode": mode,
+                "steps": len(reference[(mode, case)]),
+                "traces": report["traces"],
+                "diverged": diverged,
+                "consensus_rate": 1.0 - diverged / report["traces"],
+                "first_divergence": _histogram(report["first"]),
+                "step_mismatches": _histogram(mismatches),
+                "kinds": dict(sorted(report["kinds"].items())),
+                "diverged_runs": sorted(report["runs"], key=lambda r: (r["first_step"], r["run_id"]))[
+                    :REPLAY_RUNS_LISTED
+                ],
+            }
+        )
+        totals = modes.setdefault(mode, {"traces": 0, "diverged": 0, "first": Counter()})
+        totals["traces"] += report["traces"]
+        totals["diverged"] += diverged
+        totals["first"].update(report["first"])
+
+    n_traces = sum(m["traces"] for m in modes.values())
+    n_diverged = sum(m["diverged"] for m in modes.values())
+    return {
+        "metric": REPLAY_METRIC,
+        "reference": "modal hash per (mode, case, step)",
+        "records": len(index),
+        "traces": n_traces,
+        "diverged": n_diverged,
+        "consensus_rate": 1.0 - n_diverged / n_traces if n_traces else None,
+        "modes": {
+            mode: {
+                "traces": m["traces"],
+                "diverged": m["diverged"],
+                "consensus_rate": 1.0 - m["diverged"] / m["traces"],
+                "first_divergence": _histogram(m["first"]),
+            }
+            for mode, m in sorted(modes.items())
+        },
+        "cases": case_rows,
+    }
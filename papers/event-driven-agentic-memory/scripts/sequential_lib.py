@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from statistics import NormalDist
+from typing import Any
+
+from analysis_lib import (
+    DEFAULT_PRIMARY_METRICS,
+    FrequentistProtocolConfig,
+    _group_key_without,
+)
+from record_lib import MetricRecord, decode_record, normalize_tags
+from stats_lib import required_n_two_sample_t
+
+SEQUENTIAL_FORMAT = "sequential-advice/1"
+SEQUENTIAL_METHOD = (
+    "group-sequential z-tests on per-run means; Lan-DeMets O'Brien-Fleming alpha spending across looks, "
+    "Bonferroni across a condition's primary metrics"
+)
+
+TagKey = tuple[tuple[str, str], ...]
+GroupKey = tuple[str, str, TagKey]
+
+
+@dataclass(frozen=True)
+class SequentialConfig:
+    alpha: float = FrequentistProtocolConfig.alpha
+    power_target: float = FrequentistProtocolConfig.power_target
+    min_effect_size_d: float = FrequentistProtocolConfig.min_effect_size_d
+    max_runs: int | None = None
+    min_runs: int = 3
+    primary_metrics: tuple[str, ...] = DEFAULT_PRIMARY_METRICS
+
+    def planned_runs(self) -> int:
+        if self.max_runs is not None:
+            return self.max_runs
+        n = required_n_two_sample_t(
+            effect_size_d=self.min_effect_size_d,
+            alpha=self.alpha,
+            power=self.power_target,
+        )
+        return max(int(n or self.min_runs), self.min_runs)
+
+
+def obf_alpha_spent(t: float, alpha: float) -> float:
+    if t <= 0.0:
+        return 0.0
+    normal = NormalDist()
+    z = normal.inv_cdf(1.0 - alpha / 2.0)
+    return min(alpha, 2.0 * (1.0 - normal.cdf(z / math.sqrt(min(t, 1.0)))))
+
+
+class RunMeans:
+    def __init__(self, metrics: Iterable[str]) -> None:
+        self.metrics = frozenset(metrics)
+        self._runs: dict[GroupKey, dict[str, list[float]]] = {}
+        self._seen: set[bytes] = set()
+
+    def add(self, record: MetricRecord | dict[str, Any]) -> None:
+        if type(record) is dict:
+            record = decode_record(record)
+        if record.metric_name not in self.metrics or record.digest in self._seen:
+            return
+        self._seen.add(record.digest)
+        tags = normalize_tags(record.tags)
+        key = (record.suite, record.metric_name, tuple(sorted(tags.items())))
+        runs = self._runs.setdefault(key, {})
+        run_id = record.run_id or f"#{sum(len(v) for v in runs.values())}"
+        acc = runs.setdefault(run_id, [0.0, 0.0])
+        acc[0] += record.value
+        acc[1] += 1.0
+
+    def values(self, key: GroupKey) -> list[float]:
+        return [total / count for total, count in self._runs.get(key, {}).values()]
+
+    def keys(self) -> list[GroupKey]:
+        return list(self._runs)
+
+
+def _pairs(keys: list[GroupKey]) -> list[tuple[GroupKey, GroupKey]]:
+    by_label: dict[tuple[str, str, TagKey, str], GroupKey] = {}
+    for key in keys:
+        tags = dict(key[2])
+        if "memory_tier" in tags:
+            by_label[(key[0], key[1], _group_key_without(tags, "memory_tier"), f"tier:{tags['memory_tier']}")] = key
+        elif "scenario" in tags:
+            by_label[(key[0], key[1], _group_key_without(tags, "scenario"), f"scenario:{tags['scenario']}")] = key
+    pairs = []
+    for (suite, metric, base, label), key in by_label.items():
+        baseline_label = "tier:no-memory" if label.startswith("tier:") else "scenario:baseline"
+        baseline = by_label.get((suite, metric, base, baseline_label))
+        if baseline is not None and baseline != key:
+            pairs.append((key, baseline))
+    return pairs
+
+
+def condition_id(suite: str, tags: dict[str, str]) -> str:
+    return f"{suite}:" + ",".join(f"{k}={v}" for k, v in sorted(tags.items()))
+
+
+def _moments(values: list[float]) -> tuple[int, float, float]:
+    n = len(values)
+    if n == 0:
+        return 0, 0.0, 0.0
+    mean = sum(values) / n
+    var = sum((v - mean) ** 2 for v in values) / (n - 1) if n > 1 else 0.0
+    return n, mean, var
+
+
+def _look(
+    compare: list[float],
+    baseline: list[float],
+    previous: dict[str, Any] | None,
+    *,
+    alpha: float,
+    planned: int,
+    config: SequentialConfig,
+) -> dict[str, Any]:
+    n_c, mean_c, var_c = _moments(compare)
+    n_b, mean_b, var_b = _moments(baseline)
+    n = min(n_c, n_b)
+    looks = list(previous.get("looks", [])) if previous else []
+    spent = float(looks[-1]["alpha_spent"]) if looks else 0.0
+    row: dict[str, Any] = {
+        "n_compare": n_c,
+        "n_baseline": n_b,
+        "mean_compare": mean_c,
+        "mean_baseline": mean_b,
+        "delta_mean": mean_c - mean_b,
+        "alpha": alpha,
+        "looks": looks,
+    }
+    if n < config.min_runs:
+        row.update(decision="continue", reason="collecting", z=None, boundary=None, alpha_spent=spent)
+        return row
+    delta = mean_c - mean_b
+    se = math.sqrt(var_c / n_c + var_b / n_b)
+    z = abs(delta) / se if se > 0 else (math.inf if delta != 0 else 0.0)
+    z_out = z if math.isfinite(z) else None
+    t = min(n / planned, 1.0)
+    if looks and int(looks[-1]["n"]) == n:
+        boundary = looks[-1]["boundary"]
+    else:
+        cumulative = obf_alpha_spent(t, alpha)
+        increment = max(cumulative - spent, 1e-12)
+        boundary = NormalDist().inv_cdf(1.0 - increment / 2.0)
+        spent = cumulative
+        looks.append({"n": n, "information": t, "alpha_spent": spent, "boundary": boundary, "z": z_out})
+    if z >= boundary:
+        decision, reason = "stop", "efficacy"
+    elif n >= planned:
+        decision, reason = "stop", "max_runs"
+    else:
+        decision, reason = "continue", "within_boundary"
+    row.update(
+        decision=decision,
+        reason=reason,
+        z=z_out,
+        boundary=boundary,
+        alpha_spent=spent,
+    )
+    return row
+
+
+def advise(
+    runs: RunMeans,
+    config: SequentialConfig,
+    previous: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    planned = config.planned_runs()
+    before = {c["id"]: c for c in (previous or {}).get("conditions", [])}
+    grouped: dict[str, dict[str, Any]] = {}
+    for key, baseline in _pairs(runs.keys()):
+        suite, metric, tags = key
+        cid = condition_id(suite, dict(tags))
+        cond = grouped.setdefault(
+            cid,
+            {
+                "id": cid,
+                "suite": suite,
+                "compare_tags": dict(tags),
+                "baseline_id": condition_id(suite, dict(baseline[2])),
+                "baseline_tags": dict(baseline[2]),
+                "metrics": {},
+            },
+        )
+        cond["metrics"][metric] = (runs.values(key), runs.values(baseline))
+
+    conditions: list[dict[str, Any]] = []
+    for cid, cond in grouped.items():
+        prior = before.get(cid)
+        if prior is not None and prior.get("decision") == "stop":
+            conditions.append(prior)
+            continue
+        alpha = config.alpha / len(cond["metrics"])
+        metrics: dict[str, dict[str, Any]] = {}
+        for metric, (compare, baseline) in sorted(cond["metrics"].items()):
+            # A metric that crossed its boundary stays stopped, like a condition.
+            last = (prior or {}).get("metrics", {}).get(metric)
+            if last is not None and last.get("decision") == "stop":
+                metrics[metric] = last
+                continue
+            metrics[metric] = _look(compare, baseline, last, alpha=alpha, planned=planned, config=config)
+        done = all(row["decision"] == "stop" for row in metrics.values())
+        reasons = sorted({row["reason"] for row in metrics.values()})
+        conditions.append(
+            {
+                **{k: v for k, v in cond.items() if k != "metrics"},
+                "decision": "stop" if done else "continue",
+                "reason": ",".join(reasons),
+                "runs": min(min(row["n_compare"], row["n_baseline"]) for row in metrics.values()),
+                "max_runs": planned,
+                "metrics": metrics,
+            }
+        )
+
+    # A baseline keeps running while any condition compared against it does.
+    baselines: dict[str, dict[str, Any]] = {}
+    for cond in conditions:
+        entry = baselines.setdefault(
+            cond["baseline_id"],
+            {"id": cond["baseline_id"], "suite": cond["suite"], "tags": cond["baseline_tags"], "decision": "stop"},
+        )
+        if cond["decision"] == "continue":
+            entry["decision"] = "continue"
+    continuing = [c for c in conditions if c["decision"] == "continue"]
+    return {
+        "format": SEQUENTIAL_FORMAT,
+        "method": SEQUENTIAL_METHOD,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "alpha": config.alpha,
+            "power_target": config.power_target,
+            "min_effect_size_d": config.min_effect_size_d,
+            "max_runs": planned,
+            "min_runs": config.min_runs,
+            "primary_metrics": list(config.primary_metrics),
+        },
+        "decisions": {
+            **{b["id"]: b["decision"] for b in baselines.values()},
+            **{c["id"]: c["decision"] for c in conditions},
+        },
+        "counts": {"conditions": len(conditions), "continue": len(continuing), "stop": len(conditions) - len(continuing)},
+        "baselines": sorted(baselines.values(), key=lambda b: b["id"]),
+        "conditions": sorted(conditions, key=lambda c: c["id"]),
+    }
@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import heapq
+import math
+import random
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from statistics import NormalDist
+
+import numpy as np
+
+# KLL rank error: with k=200 a quantile query is within ~1.65% of n in rank
+# with 99% probability; the error scales roughly as 1/k.
+DEFAULT_SKETCH_K = 200
+KLL_RANK_ERROR_99 = {100: 0.0330, 200: 0.0165, 400: 0.0083, 800: 0.0042}
+SUMMARY_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+def kll_rank_error(k: int) -> float:
+    return KLL_RANK_ERROR_99.get(k, 3.3 / float(k))
+
+
+@dataclass
+class Welford:
+    n: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    def add(self, value: float) -> None:
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    def extend(self, values: Iterable[float]) -> None:
+        arr = np.asarray(list(values), dtype=float)
+        if arr.size == 0:
+            return
+        batch_mean = float(np.mean(arr))
+        batch = Welford(n=int(arr.size), mean=batch_mean, m2=float(np.sum((arr - batch_mean) ** 2)))
+        self.merge(batch)
+
+    def merge(self, other: Welford) -> None:
+        if other.n == 0:
+            return
+        if self.n == 0:
+            self.n, self.mean, self.m2 = other.n, other.mean, other.m2
+            return
+        total = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / total
+        self.m2 += other.m2 + delta * delta * self.n * other.n / total
+        self.n = total
+
+    def variance(self) -> float:
+        if self.n < 2:
+            return 0.0
+        return max(self.m2, 0.0) / (self.n - 1)
+
+    def std(self) -> float:
+        return math.sqrt(self.variance())
+
+
+class KLLSketch:
+    def __init__(self, k: int = DEFAULT_SKETCH_K, *, seed: int = 0) -> None:
+        self.k = k
+        self.n = 0
+        self.compactors: list[list[float]] = [[]]
+        self._rng = random.Random(seed)
+        self._size = 0
+        self._max_size = self._capacity(0)
+
+    @classmethod
+    def restore(cls, k: int, n: int, compactors: list[list[float]], *, seed: int = 0) -> KLLSketch:
+        sketch = cls(k, seed=seed)
+        sketch.compactors = [list(items) for items in compactors] or [[]]
+        sketch.n = n
+        sketch._size = sum(len(c) for c in sketch.compactors)
+        sketch._max_size = sum(sketch._capacity(h) for h in range(len(sketch.compactors)))
+        return sketch
+
+    def _capacity(self, height: int) -> int:
+        depth = len(self.compactors) - height - 1
+        return int(math.ceil(self.k * (2.0 / 3.0) ** depth)) + 1
+
+    def _grow(self) -> None:
+        self.compactors.append([])
+        self._max_size = sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def add(self, value: float) -> None:
+        self.compactors[0].append(float(value))
+        self.n += 1
+        self._size += 1
+        if self._size >= self._max_size:
+            self._compress()
+
+    def extend(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: KLLSketch) -> None:
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for height, items in enumerate(other.compactors):
+            self.compactors[height].extend(items)
+        self.n += other.n
+        self._size = sum(len(c) for c in self.compactors)
+        while self._size >= self._max_size:
+            self._compress()
+
+    def _compress(self) -> None:
+        for height in range(len(self.compactors)):
+            if len(self.compactors[height]) < self._capacity(height):
+                continue
+            if height + 1 >= len(self.compactors):
+                self._grow()
+            items = sorted(self.compactors[height])
+            keep = [items.pop()] if len(items) % 2 else []
+            offset = 1 if self._rng.random() < 0.5 else 0
+            self.compactors[height + 1].extend(items[offset::2])
+            self.compactors[height] = keep
+            self._size = sum(len(c) for c in self.compactors)
+            if self._size < self._max_size:
+                break
+
+    def weighted_items(self) -> tuple[np.ndarray, np.ndarray]:
+        values: list[float] = []
+        weights: list[float] = []
+        for height, items in enumerate(self.compactors):
+            values.extend(items)
+            weights.extend([float(2**height)] * len(items))
+        arr = np.asarray(values, dtype=float)
+        w = np.asarray(weights, dtype=float)
+        order = np.argsort(arr, kind="stable")
+        return arr[order], w[order]
+
+    def quantile(self, q: float) -> float:
+        values, weights = self.weighted_items()
+        if values.size == 0:
+            return 0.0
+        cum = np.cumsum(weights)
+        target = q * cum[-1]
+        idx = int(np.searchsorted(cum, target, side="left"))
+        return float(values[min(idx, values.size - 1)])
+
+    def cdf(self, x: float) -> float:
+        values, weights = self.weighted_items()
+        total = float(np.sum(weights))
+        if total == 0:
+            return 0.0
+        return float(np.sum(weights[values <= x]) / total)
+
+
+@dataclass
+class StreamingSummary:
+    k: int = DEFAULT_SKETCH_K
+    moments: Welford = field(default_factory=Welford)
+    sketch: KLLSketch = field(init=False)
+    min_value: float = math.inf
+    max_value: float = -math.inf
+
+    def __post_init__(self) -> None:
+        self.sketch = KLLSketch(self.k)
+
+    @property
+    def n(self) -> int:
+        return self.moments.n
+
+    def add(self, value: float) -> None:
+        self.moments.add(value)
+        self.sketch.add(value)
+        self.min_value = min(self.min_value, value)
+        self.max_value = max(self.max_value, value)
+
+    def extend(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.add(float(value))
+
+    def merge(self, other: StreamingSummary) -> None:
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+        self.min_value = min(self.min_value, other.min_value)
+        self.max_value = max(self.max_value, other.max_value)
+
+    def quantile(self, q: float) -> float:
+        if q <= 0.0:
+            return self.min_value
+        if q >= 1.0:
+            return self.max_value
+        return min(max(self.sketch.quantile(q), self.min_value), self.max_value)
+
+    def normal_ci(self, ci: float = 0.95) -> tuple[float, float]:
+        if self.n == 0:
+            return 0.0, 0.0
+        if self.n == 1:
+            return self.moments.mean, self.moments.mean
+        z = NormalDist().inv_cdf(1.0 - (1.0 - ci) / 2.0)
+        half = z * self.moments.std() / math.sqrt(self.n)
+        return self.moments.mean - half, self.moments.mean + half
+
+
+def sketch_cliffs_delta(a: StreamingSummary, b: StreamingSummary) -> float:
+    values_a, weights_a = a.sketch.weighted_items()
+    values_b, weights_b = b.sketch.weighted_items()
+    total_a = float(np.sum(weights_a))
+    total_b = float(np.sum(weights_b))
+    if total_a == 0 or total_b == 0:
+        return 0.0
+    cum_b = np.concatenate(([0.0], np.cumsum(weights_b)))
+    below = cum_b[np.searchsorted(values_b, values_a, side="left")]
+    above = total_b - cum_b[np.searchsorted(values_b, values_a, side="right")]
+    return float(np.sum(weights_a * (below - above)) / (total_a * total_b))
+
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_POISSON1_CDF = np.cumsum([math.exp(-1.0) / math.factorial(k) for k in range(20)])
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    z = x + _GOLDEN
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def poisson_weights(keys: np.ndarray, n_replicates: int, seed: int) -> np.ndarray:
+    base = _splitmix64(keys.astype(np.uint64) ^ _splitmix64(np.asarray([seed], dtype=np.uint64)))
+    offsets = np.arange(1, n_replicates + 1, dtype=np.uint64) * _GOLDEN
+    hashed = _splitmix64(base[:, None] + offsets[None, :])
+    uniform = (hashed >> np.uint64(11)).astype(float) * (1.0 / float(1 << 53))
+    return np.searchsorted(_POISSON1_CDF, uniform, side="right").astype(float)
+
+
+class PoissonBootstrap:
+    def __init__(self, n_replicates: int = 1000, *, seed: int = 42, batch_size: int = 512) -> None:
+        self.n_replicates = n_replicates
+        self.seed = seed
+        self.n = 0
+        self.sums = np.zeros(n_replicates, dtype=float)
+        self.weights = np.zeros(n_replicates, dtype=float)
+        self._batch_size = batch_size
+        self._values: list[float] = []
+        self._keys: list[int] = []
+
+    def add(self, value: float, key: int) -> None:
+        self._values.append(float(value))
+        self._keys.append(key)
+        self.n += 1
+        if len(self._values) >= self._batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._values:
+            return
+        values = np.asarray(self._values, dtype=float)
+        weights = poisson_weights(np.asarray(self._keys, dtype=np.uint64), self.n_replicates, self.seed)
+        self.sums += values @ weights
+        self.weights += weights.sum(axis=0)
+        self._values.clear()
+        self._keys.clear()
+
+    def merge(self, other: PoissonBootstrap) -> None:
+        if other.n_replicates != self.n_replicates or other.seed != self.seed:
+            raise ValueError("cannot merge Poisson bootstraps with different replicates or seed")
+        self.flush()
+        other.flush()
+        self.sums += other.sums
+        self.weights += other.weights
+        self.n += other.n
+
+    def ci(self, ci: float = 0.95) -> tuple[float, float]:
+        self.flush()
+        valid = self.weights > 0
+        if not np.any(valid):
+            return 0.0, 0.0
+        means = self.sums[valid] / self.weights[valid]
+        alpha = (1.0 - ci) / 2.0
+        return float(np.quantile(means, alpha)), float(np.quantile(means, 1.0 - alpha))
+
+
+# Bottom-k sample keyed by record hash: deterministic, independent of read order
+# and mergeable across partials.
+class Reservoir:
+    def __init__(self, k: int) -> None:
+        self.k = k
+        self.n = 0
+        self._heap: list[tuple[int, float]] = []
+
+    def add(self, value: float, key: int) -> None:
+        self.n += 1
+        self._offer(key, float(value))
+
+    def _offer(self, key: int, value: float) -> None:
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, (-key, value))
+        elif -key > self._heap[0][0]:
+            heapq.heapreplace(self._heap, (-key, value))
+
+    def merge(self, other: Reservoir) -> None:
+        for neg_key, value in other._heap:
+            self._offer(-neg_key, value)
+        self.n += other.n
+
+    def items(self) -> list[tuple[int, float]]:
+        return sorted((-neg_key, value) for neg_key, value in self._heap)
+
+    def values(self) -> list[float]:
+        return [value for _, value in self.items()]
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import tempfile
+from array import array
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+SPILL_PARTITIONS = 64
+SPILL_DTYPE = np.dtype([("group", "<u4"), ("value", "<f8"), ("run", "<i4")])
+_SIZE_UNITS = {"": 1, "k": 1 << 10, "m": 1 << 20, "g": 1 << 30, "t": 1 << 40}
+
+
+def parse_size(text: str) -> int:
+    raw = text.strip().lower().removesuffix("b").removesuffix("i")
+    unit = raw[-1] if raw and raw[-1] in _SIZE_UNITS else ""
+    try:
+        size = float(raw[: len(raw) - len(unit)]) * _SIZE_UNITS[unit]
+    except ValueError:
+        raise ValueError(f"bad size {text!r}; expected e.g. 512M or 4G") from None
+    if size <= 0:
+        raise ValueError(f"size must be positive, got {text!r}")
+    return int(size)
+
+
+@dataclass(frozen=True)
+class SpillConfig:
+    max_memory: int
+    partitions: int = SPILL_PARTITIONS
+    temp_dir: Path | None = None
+
+    @property
+    def buffer_bytes(self) -> int:
+        # A quarter of the budget for the ingest buffer leaves room for group
+        # state and for materializing one partition as Python lists.
+        return max(self.max_memory // 4, SPILL_DTYPE.itemsize)
+
+
+class SpillStore:
+    def __init__(self, config: SpillConfig) -> None:
+        self.config = config
+        self.partition_of: list[int] = []
+        self.records = 0
+        self.spilled = 0
+        self._groups = array("I")
+        self._values = array("d")
+        self._runs = array("i")
+        self._files: list[tuple[Path, np.ndarray]] = []
+        self._dir: tempfile.TemporaryDirectory[str] | None = None
+
+    @property
+    def buffered_bytes(self) -> int:
+        return len(self._values) * SPILL_DTYPE.itemsize
+
+    def add(self, group: int, value: float, run: int) -> None:
+        self._groups.append(group)
+        self._values.append(value)
+        self._runs.append(run)
+        self.records += 1
+        if self.buffered_bytes >= self.config.buffer_bytes:
+            self.spill()
+
+    def extend(self, groups: np.ndarray, values: np.ndarray, runs: np.ndarray) -> None:
+        self._groups.frombytes(groups.astype(np.uint32).tobytes())
+        self._values.frombytes(values.astype(np.float64).tobytes())
+        self._runs.frombytes(runs.astype(np.int32).tobytes())
+        self.records += len(values)
+        if self.buffered_bytes >= self.config.buffer_bytes:
+            self.spill()
+
+    def _buffer(self) -> np.ndarray:
+        rows = np.empty(len(self._values), dtype=SPILL_DTYPE)
+        rows["group"] = np.frombuffer(self._groups, dtype=np.uint32)
+        rows["value"] = np.frombuffer(self._values, dtype=np.float64)
+        rows["run"] = np.frombuffer(self._runs, dtype=np.int32)
+        self._groups, self._values, self._runs = array("I"), array("d"), array("i")
+        return rows
+
+    def spill(self) -> None:
+        if not self._values:
+            return
+        if self._dir is None:
+            dir_ = self.config.temp_dir
+            if dir_ is not None:
+                dir_.mkdir(parents=True, exist_ok=True)
+            self._dir = tempfile.TemporaryDirectory(prefix="metrics-spill-", dir=dir_)
+        rows = self._buffer()
+        partitions = np.asarray(self.partition_of, dtype=np.int64)[rows["group"]]
+        # lexsort is stable, so each group's values stay in ingestion order
+        # within the run; runs are read back in the order they were written.
+        order = np.lexsort((rows["group"], partitions))
+        offsets = np.searchsorted(partitions[order], np.arange(self.config.partitions + 1))
+        path = Path(self._dir.name) / f"run-{len(self._files):05d}.npy"
+        np.save(path, rows[order])
+        self._files.append((path, offsets))
+        self.spilled += len(rows)
+
+    def partitions(self) -> Iterator[tuple[int, np.ndarray]]:
+        # Yields (partition, rows sorted by group), ingestion order kept within
+        # a group. Without any spill the buffer is one partition, numbered -1.
+        if not self._files:
+            rows = self._buffer()
+            yield -1, rows[np.argsort(rows["group"], kind="stable")]
+            return
+        self.spill()
+        runs = [np.load(path, mmap_mode="r") for path, _ in self._files]
+        for p in range(self.config.partitions):
+            rows = np.concatenate(
+                [run[offsets[p] : offsets[p + 1]] for run, (_, offsets) in zip(runs, self._files)]
+            )
+            yield p, rows[np.argsort(rows["group"], kind="stable")]
+
+    def close(self) -> None:
+        if self._dir is not None:
+            self._dir.cleanup()
+            self._dir = None
+        self._files.clear()
@@ -1,27 +1,37 @@
 from __future__ import annotations
 
+import math
+import re
 from dataclasses import dataclass
-from collections.abc import Callable, Iterable
+from collections.abc import Iterable, Sequence
+from statistics import NormalDist
 from typing import TypeAlias, cast
 
 import numpy as np
 from numpy.typing import NDArray
 
+from backend_lib import TestResult, active_backend
+
 try:  # pragma: no cover - optional dependency in some environments
     from scipy import stats as _stats  # type: ignore[import-untyped]
 except Exception:  # pragma: no cover - fallback when scipy not present
     _stats = None
 
-
-@dataclass(frozen=True)
-class TestResult:
-    stat: float | None
-    p_value: float | None
+LOW_CARDINALITY_MAX = 16
+_ORDER_STAT = re.compile(r"^(p|trim)(\d+(?:\.\d*)?)$")
 
 
 FloatArray: TypeAlias = NDArray[np.float64]
 
 
+@dataclass(frozen=True)
+class KdeResult:
+    lo: float
+    hi: float
+    bandwidth: float
+    density: FloatArray
+
+
 def _to_array(values: Iterable[float]) -> FloatArray:
     arr = np.asarray(list(values), dtype=float)
     if arr.size == 0:
@@ -29,33 +39,25 @@ def _to_array(values: Iterable[float]) -> FloatArray:
     return cast(FloatArray, arr)
 
 
-def _mean(arr: FloatArray) -> float:
-    return float(np.mean(arr))
-
-
-def _median(arr: FloatArray) -> float:
-    return float(np.median(arr))
-
-
 def mean(values: Iterable[float]) -> float:
     arr = _to_array(values)
     if arr.size == 0:
         return 0.0
-    return float(np.mean(arr))
+    return active_backend().mean(arr)
 
 
 def median(values: Iterable[float]) -> float:
     arr = _to_array(values)
     if arr.size == 0:
         return 0.0
-    return float(np.median(arr))
+    return active_backend().median(arr)
 
 
 def std(values: Iterable[float]) -> float:
     arr = _to_array(values)
     if arr.size < 2:
         return 0.0
-    return float(np.std(arr, ddof=1))
+    return active_backend().std(arr)
 
 
 def bootstrap_ci(
@@ -71,67 +73,341 @@ def bootstrap_ci(
         return 0.0, 0.0
     if arr.size == 1:
         return float(arr[0]), float(arr[0])
-    rng = np.random.default_rng(seed)
-    stat_fn: Callable[[FloatArray], float]
-    if stat == "median":
-        stat_fn = _median
-    else:
-        stat_fn = _mean
-    boot = rng.choice(arr, size=(n_samples, arr.size), replace=True)
-    stats = cast(FloatArray, np.apply_along_axis(stat_fn, 1, boot))
+    if stat != "mean":
+        return bootstrap_cis(arr, [stat], n_samples=n_samples, ci=ci, seed=seed)[stat]
+    stats = active_backend().resample_means(arr, n_samples, seed)
     alpha = (1.0 - ci) / 2.0
     low = np.quantile(stats, alpha)
     high = np.quantile(stats, 1.0 - alpha)
     return float(low), float(high)
 
 
+def _parse_stat(stat: str) -> tuple[str, float]:
+    if stat == "mean":
+        return "mean", 0.0
+    if stat == "median":
+        return "quantile", 0.5
+    match = _ORDER_STAT.match(stat)
+    if match is None:
+        raise ValueError(f"unknown statistic {stat!r}; expected mean, median, pNN or trimNN")
+    kind, number = match.groups()
+    param = float(number) / 100.0
+    if kind == "p" and param <= 1.0:
+        return "quantile", param
+    if kind == "trim" and param < 0.5:
+        return "trim", param
+    raise ValueError(f"statistic {stat!r} out of range")
+
+
+def _order_positions(kind: str, param: float, n: int) -> list[int]:
+    if kind == "quantile":
+        lo = int(math.floor(param * (n - 1)))
+        return [lo, min(lo + 1, n - 1)]
+    if kind == "trim":
+        cut = int(param * n)
+        return [cut, n - cut - 1]
+    return []
+
+
+def _reduce_rows(part: FloatArray, kind: str, param: float) -> FloatArray:
+    # `part` must be partitioned at _order_positions(kind, param, n) along
+    # axis 1; quantiles interpolate like np.quantile's default method.
+    n = part.shape[1]
+    if kind == "quantile":
+        pos = param * (n - 1)
+        lo = int(math.floor(pos))
+        a, b = part[:, lo], part[:, min(lo + 1, n - 1)]
+        t = pos - lo
+        diff = b - a
+        return cast(FloatArray, b - diff * (1.0 - t) if t >= 0.5 else a + diff * t)
+    if kind == "trim":
+        cut = int(param * n)
+        return cast(FloatArray, part[:, cut : n - cut].mean(axis=1))
+    return cast(FloatArray, part.mean(axis=1))
+
+
+def _order_stats(rows: FloatArray, parsed: dict[str, tuple[str, float]]) -> dict[str, FloatArray]:
+    n = rows.shape[1]
+    kth = sorted({pos for kind, param in parsed.values() for pos in _order_positions(kind, param, n)})
+    part = np.partition(rows, kth, axis=1) if kth else rows
+    return {
+        stat: _reduce_rows(rows if kind == "mean" else part, kind, param) for stat, (kind, param) in parsed.items()
+    }
+
+
+def sample_stats(values: Iterable[float], stats: Sequence[str]) -> dict[str, float]:
+    parsed = {stat: _parse_stat(stat) for stat in stats}
+    arr = _to_array(values)
+    if arr.size == 0:
+        return {stat: 0.0 for stat in parsed}
+    return {stat: float(row[0]) for stat, row in _order_stats(arr[None, :], parsed).items()}
+
+
+def bootstrap_cis(
+    values: Iterable[float],
+    stats: Sequence[str],
+    *,
+    n_samples: int = 1000,
+    ci: float = 0.95,
+    seed: int = 42,
+) -> dict[str, tuple[float, float]]:
+    # One resample matrix and one np.partition call serve every requested
+    # statistic; the kth indices of all quantiles and trim bounds are selected
+    # together instead of sorting each replicate.
+    parsed = {stat: _parse_stat(stat) for stat in stats}
+    arr = _to_array(values)
+    if arr.size == 0:
+        return {stat: (0.0, 0.0) for stat in parsed}
+    if arr.size == 1:
+        return {stat: (float(arr[0]), float(arr[0])) for stat in parsed}
+    rng = np.random.default_rng(seed)
+    boot = rng.choice(arr, size=(n_samples, arr.size), replace=True)
+    alpha = (1.0 - ci) / 2.0
+    return {
+        stat: (float(np.quantile(reps, alpha)), float(np.quantile(reps, 1.0 - alpha)))
+        for stat, reps in _order_stats(boot, parsed).items()
+    }
+
+
+@dataclass(frozen=True)
+class ValueCounts:
+    values: FloatArray
+    counts: NDArray[np.int64]
+    codes: NDArray[np.intp]
+
+    @property
+    def n(self) -> int:
+        return int(self.codes.size)
+
+    @property
+    def integral(self) -> bool:
+        return bool(np.all(self.values == np.round(self.values)))
+
+    def mean(self) -> float:
+        return float(self.counts @ self.values / self.n)
+
+    def median(self) -> float:
+        cum = np.cumsum(self.counts)
+        lo = self.values[np.searchsorted(cum, (self.n - 1) // 2, side="right")]
+        hi = self.values[np.searchsorted(cum, self.n // 2, side="right")]
+        return float((lo + hi) / 2.0)
+
+    def expand(self) -> FloatArray:
+        return cast(FloatArray, np.repeat(self.values, self.counts))
+
+
+def value_counts(values: Iterable[float], *, max_distinct: int = LOW_CARDINALITY_MAX) -> ValueCounts | None:
+    arr = _to_array(values)
+    if arr.size < 2 or np.unique(arr[:1024]).size > max_distinct:
+        return None
+    distinct, codes, counts = np.unique(arr, return_inverse=True, return_counts=True)
+    if distinct.size > max_distinct:
+        return None
+    return ValueCounts(values=distinct, counts=counts.astype(np.int64), codes=codes.reshape(-1))
+
+
+def bootstrap_ci_counts(
+    vc: ValueCounts,
+    *,
+    n_samples: int = 1000,
+    ci: float = 0.95,
+    seed: int = 42,
+) -> tuple[float, float]:
+    # Same index stream as bootstrap_ci (Generator.choice draws integers), so
+    # the interval matches the general path; each replicate is then reduced to
+    # per-value counts instead of a float resample.
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, vc.n, size=(n_samples, vc.n))
+    picked = vc.codes.astype(np.uint8)[idx]
+    k = vc.values.size
+    if k == 2:
+        high = picked.sum(axis=1, dtype=np.int64)
+        counts = np.stack([vc.n - high, high], axis=1)
+    else:
+        offsets = (np.arange(n_samples, dtype=np.int64) * k)[:, None]
+        counts = np.bincount((picked + offsets).ravel(), minlength=n_samples * k).reshape(n_samples, k)
+    stats = counts @ vc.values / vc.n
+    alpha = (1.0 - ci) / 2.0
+    return float(np.quantile(stats, alpha)), float(np.quantile(stats, 1.0 - alpha))
+
+
+def _aligned_counts(a: ValueCounts, b: ValueCounts) -> tuple[NDArray[np.int64], NDArray[np.int64]]:
+    union = np.union1d(a.values, b.values)
+    ca = np.zeros(union.size, dtype=np.int64)
+    cb = np.zeros(union.size, dtype=np.int64)
+    ca[np.searchsorted(union, a.values)] = a.counts
+    cb[np.searchsorted(union, b.values)] = b.counts
+    return ca, cb
+
+
+def cliffs_delta_counts(a: ValueCounts, b: ValueCounts) -> float:
+    ca, cb = _aligned_counts(a, b)
+    below = np.cumsum(cb) - cb
+    above = b.n - np.cumsum(cb)
+    wins = int(ca @ below)
+    losses = int(ca @ above)
+    return float((wins - losses) / (a.n * b.n))
+
+
+def mann_whitney_u_counts(a: ValueCounts, b: ValueCounts) -> TestResult:
+    ca, cb = _aligned_counts(a, b)
+    return active_backend().mann_whitney_u_counts(np.union1d(a.values, b.values), ca, cb)
+
+
+def ks_test_counts(a: ValueCounts, b: ValueCounts) -> TestResult:
+    ca, cb = _aligned_counts(a, b)
+    return active_backend().ks_test_counts(np.union1d(a.values, b.values), ca, cb)
+
+
 def cohens_d(a: Iterable[float], b: Iterable[float]) -> float:
     arr_a = _to_array(a)
     arr_b = _to_array(b)
     if arr_a.size < 2 or arr_b.size < 2:
         return 0.0
-    mean_a = np.mean(arr_a)
-    mean_b = np.mean(arr_b)
-    var_a = np.var(arr_a, ddof=1)
-    var_b = np.var(arr_b, ddof=1)
-    pooled = ((arr_a.size - 1) * var_a + (arr_b.size - 1) * var_b) / (arr_a.size + arr_b.size - 2)
+    return cohens_d_from_moments(
+        int(arr_a.size),
+        float(np.mean(arr_a)),
+        float(np.var(arr_a, ddof=1)),
+        int(arr_b.size),
+        float(np.mean(arr_b)),
+        float(np.var(arr_b, ddof=1)),
+    )
+
+
+def cohens_d_from_moments(
+    n_a: int,
+    mean_a: float,
+    var_a: float,
+    n_b: int,
+    mean_b: float,
+    var_b: float,
+) -> float:
+    if n_a < 2 or n_b < 2:
+        return 0.0
+    pooled = ((n_a - 1) * var_a + (n_b - 1) * var_b) / (n_a + n_b - 2)
     if pooled <= 0:
         return 0.0
     return float((mean_a - mean_b) / np.sqrt(pooled))
 
 
+def cohens_d_batch(
+    n_a: FloatArray,
+    mean_a: FloatArray,
+    var_a: FloatArray,
+    n_b: FloatArray,
+    mean_b: FloatArray,
+    var_b: FloatArray,
+) -> FloatArray:
+    dof = n_a + n_b - 2.0
+    pooled = np.divide((n_a - 1.0) * var_a + (n_b - 1.0) * var_b, dof, out=np.zeros_like(var_a), where=dof > 0)
+    ok = (n_a >= 2) & (n_b >= 2) & (pooled > 0)
+    return cast(FloatArray, np.divide(mean_a - mean_b, np.sqrt(pooled), out=np.zeros_like(pooled), where=ok))
+
+
 def cliffs_delta(a: Iterable[float], b: Iterable[float]) -> float:
     arr_a = _to_array(a)
     arr_b = _to_array(b)
     if arr_a.size == 0 or arr_b.size == 0:
         return 0.0
-    sorted_b = np.sort(arr_b)
-    wins = 0
-    losses = 0
-    for value in arr_a:
-        wins += int(np.searchsorted(sorted_b, value, side="left"))
-        losses += int(sorted_b.size - np.searchsorted(sorted_b, value, side="right"))
-    total = arr_a.size * arr_b.size
-    return float((wins - losses) / total) if total else 0.0
+    return active_backend().cliffs_delta(arr_a, arr_b)
+
+
+def binned_kde(
+    values: Iterable[float],
+    *,
+    weights: Iterable[float] | None = None,
+    grid_size: int = 128,
+) -> KdeResult | None:
+    arr = _to_array(values)
+    w = _to_array(weights) if weights is not None else np.ones(arr.size, dtype=float)
+    if arr.size < 2 or float(np.sum(w)) <= 0:
+        return None
+    lo, hi = float(np.min(arr)), float(np.max(arr))
+    w = w / np.sum(w)
+    center = float(np.sum(w * arr))
+    # Scott's rule on the effective sample size, matching matplotlib's violinplot.
+    n_eff = 1.0 / float(np.sum(w * w))
+    var = float(np.sum(w * (arr - center) ** 2)) / max(1.0 - 1.0 / n_eff, 1e-12)
+    if hi <= lo or var <= 0:
+        return None
+    bandwidth = n_eff ** (-1.0 / 5.0) * float(np.sqrt(var))
+
+    delta = (hi - lo) / (grid_size - 1)
+    pos = (arr - lo) / delta
+    idx = np.clip(np.floor(pos).astype(np.int64), 0, grid_size - 2)
+    frac = pos - idx
+    counts = np.bincount(idx, weights=w * (1.0 - frac), minlength=grid_size)
+    counts += np.bincount(idx + 1, weights=w * frac, minlength=grid_size)
+
+    half = min(int(np.ceil(4.0 * bandwidth / delta)), grid_size - 1)
+    offsets = np.arange(-half, half + 1, dtype=float) * delta / bandwidth
+    kernel = np.exp(-0.5 * offsets**2) / (bandwidth * np.sqrt(2.0 * np.pi))
+    size = 1 << int(np.ceil(np.log2(grid_size + 2 * half)))
+    full = np.fft.irfft(np.fft.rfft(counts, size) * np.fft.rfft(kernel, size), size)
+    density = np.maximum(full[half : half + grid_size], 0.0)
+    return KdeResult(lo=lo, hi=hi, bandwidth=bandwidth, density=cast(FloatArray, density))
 
 
 def mann_whitney_u(a: Iterable[float], b: Iterable[float]) -> TestResult:
-    if _stats is None:
-        return TestResult(stat=None, p_value=None)
     arr_a = _to_array(a)
     arr_b = _to_array(b)
     if arr_a.size == 0 or arr_b.size == 0:
         return TestResult(stat=None, p_value=None)
-    res = _stats.mannwhitneyu(arr_a, arr_b, alternative="two-sided")
-    return TestResult(stat=float(res.statistic), p_value=float(res.pvalue))
+    return active_backend().mann_whitney_u(arr_a, arr_b)
 
 
 def ks_test(a: Iterable[float], b: Iterable[float]) -> TestResult:
-    if _stats is None:
-        return TestResult(stat=None, p_value=None)
     arr_a = _to_array(a)
     arr_b = _to_array(b)
     if arr_a.size == 0 or arr_b.size == 0:
         return TestResult(stat=None, p_value=None)
-    res = _stats.ks_2samp(arr_a, arr_b)
-    return TestResult(stat=float(res.statistic), p_value=float(res.pvalue))
+    return active_backend().ks_test(arr_a, arr_b)
+
+
+def welch_t_pvalues(
+    mean_a: FloatArray,
+    var_a: FloatArray,
+    n_a: FloatArray,
+    mean_b: FloatArray,
+    var_b: FloatArray,
+    n_b: FloatArray,
+) -> FloatArray:
+    se2_a = np.divide(var_a, n_a, out=np.zeros_like(var_a), where=n_a > 0)
+    se2_b = np.divide(var_b, n_b, out=np.zeros_like(var_b), where=n_b > 0)
+    se2 = se2_a + se2_b
+    delta = np.abs(mean_a - mean_b)
+    # Zero-variance cells: identical means are untestable, different means are certain.
+    p = np.where(delta > 0, 0.0, np.nan)
+    ok = se2 > 0
+    if not ok.any():
+        return cast(FloatArray, p)
+    t = delta[ok] / np.sqrt(se2[ok])
+    dof_terms = np.divide(se2_a**2, n_a - 1.0, out=np.zeros_like(se2_a), where=n_a > 1) + np.divide(
+        se2_b**2, n_b - 1.0, out=np.zeros_like(se2_b), where=n_b > 1
+    )
+    dof = np.divide(se2**2, dof_terms, out=np.full_like(se2, np.inf), where=dof_terms > 0)[ok]
+    if _stats is not None:
+        p[ok] = 2.0 * _stats.t.sf(t, dof)
+    else:
+        normal = NormalDist()
+        p[ok] = [2.0 * (1.0 - normal.cdf(float(value))) for value in t]
+    return cast(FloatArray, p)
+
+
+def benjamini_hochberg(p_values: Iterable[float | None]) -> list[float | None]:
+    return active_backend().benjamini_hochberg(list(p_values))
+
+
+def required_n_two_sample_t(
+    *,
+    effect_size_d: float,
+    alpha: float = 0.05,
+    power: float = 0.8,
+) -> int | None:
+    if effect_size_d <= 0 or not 0.0 < alpha < 1.0 or not 0.0 < power < 1.0:
+        return None
+    normal = NormalDist()
+    z_alpha = normal.inv_cdf(1.0 - alpha / 2.0)
+    z_power = normal.inv_cdf(power)
+    n = 2.0 * ((z_alpha + z_power) / effect_size_d) ** 2
+    return int(np.ceil(n))
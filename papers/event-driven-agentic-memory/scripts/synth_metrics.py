@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import random
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from histogram_lib import LATENCY_HISTOGRAM_METRIC, LatencyHistogram
+
+TIERS = ("no-memory", "summary", "vector", "graph", "hybrid")
+TIER_ACCURACY = {"no-memory": 0.05, "summary": 0.55, "vector": 0.7, "graph": 0.72, "hybrid": 0.8}
+A_SCENARIOS = ("baseline", "adversarial")
+B_SCENARIOS = {"baseline": (50, 0.1), "fault-light": (125, 0.25), "fault-heavy": (250, 0.5)}
+G_CASES = {"g-001": "latency_spike", "g-002": "single_module_fail", "g-003": "cascading_failures"}
+C_CASES = ("c-001", "c-002", "c-003", "c-004")
+C_STEPS = 6
+
+
+def _volatile_tags(rng: random.Random, run_id: str) -> dict[str, Any]:
+    if rng.random() < 0.5:
+        return {}
+    return {
+        "run_name": f"{run_id}-name",
+        "source_run_id": run_id,
+        "snapshot_id": f"snap-{rng.randrange(1 << 32):08x}",
+    }
+
+
+def _record(
+    suite: str,
+    case: str,
+    metric: str,
+    run_id: str,
+    ts: int,
+    value: float,
+    tags: dict[str, Any],
+) -> dict[str, Any]:
+    return {
+        "case": case,
+        "metric_name": metric,
+        "run_id": run_id,
+        "suite": suite,
+        "tags": tags,
+        "ts": ts,
+        "value": value,
+    }
+
+
+def _suite_a_run(rng: random.Random, run_id: str, ts: int) -> Iterator[dict[str, Any]]:
+    yield _record(
+        "A",
+        "a-001",
+        "dataset.generated",
+        run_id,
+        ts,
+        6.0,
+        {"path": "experiments/datasets/suite_a.jsonl", "session_length": 36, "token_budget": 6000},
+    )
+    for offset, scenario in enumerate(A_SCENARIOS):
+        for index, tier in enumerate(TIERS):
+            case = f"a-{100 * (offset + 1) + index + 1}"
+            tags = {"memory_tier": tier, "scenario": scenario, **_volatile_tags(rng, run_id)}
+            p = TIER_ACCURACY[tier] * (0.6 if scenario == "adversarial" else 1.0)
+            correct = 1.0 if rng.random() < p else 0.0
+            faithful = 1.0 if rng.random() < p else 0.0
+            for metric, value in (
+                ("suite_a.accuracy", correct),
+                ("suite_a.faithfulness", faithful),
+                ("suite_a.drift", 1.0 - correct),
+                ("suite_a.questions", 36.0),
+                ("case.completed", 1.0),
+            ):
+                ts += rng.randrange(1, 5)
+                yield _record("A", case, metric, run_id, ts, value, dict(tags))
+
+
+def _latency_histogram(run_id: str, scenario: str, requests: int, avg: float) -> LatencyHistogram:
+    rng = random.Random(f"{run_id}:{scenario}")
+    hist = LatencyHistogram()
+    for _ in range(requests):
+        latency = rng.lognormvariate(0.0, 0.5) * avg
+        if rng.random() < 0.01:
+            latency *= rng.uniform(5.0, 20.0)
+        hist.add(latency)
+    return hist
+
+
+def _load_windows(
+    run_id: str,
+    scenario: str,
+    requests: int,
+    error_p: float,
+    avg: float,
+    duration: float,
+) -> Iterator[tuple[int, str, float]]:
+    rng = random.Random(f"{run_id}:{scenario}:windows")
+    n_windows = max(min(int(math.ceil(duration)), 10), 1)
+    collapse = range(3, 6) if scenario == "fault-heavy" else range(0)
+    for window in range(n_windows):
+        slow = window in collapse
+        sent = max(int(round(requests / n_windows * (0.2 if slow else rng.uniform(0.8, 1.2)))), 0)
+        p = min(error_p * (2.0 if slow else 1.0), 1.0)
+        errors = sum(1 for _ in range(sent) if rng.random() < p)
+        latency = avg * rng.uniform(0.8, 1.2) * (4.0 if slow else 1.0)
+        offset = (window + 1) * 1000
+        yield offset, "load.window.requests", float(sent)
+        yield offset, "load.window.errors", float(errors)
+        yield offset, "load.window.avg_ms", latency
+
+
+def _suite_b_run(rng: random.Random, run_id: str, ts: int) -> Iterator[dict[str, Any]]:
+    for scenario, (requests, error_p) in B_SCENARIOS.items():
+        tags = {"scenario": scenario, **_volatile_tags(rng, run_id)}
+        errors = sum(1 for _ in range(requests) if rng.random() < error_p)
+        avg = rng.lognormvariate(4.4, 0.6)
+        duration = max(requests / rng.uniform(5.0, 15.0), 1e-3)
+        start = ts
+        for offset, metric, value in _load_windows(run_id, scenario, requests, error_p, avg, duration):
+            ts = start + offset
+            yield _record("B", f"b-{scenario}", metric, run_id, ts, value, dict(tags))
+        for metric, value in (
+            ("load.requests", float(requests)),
+            ("load.errors", float(errors)),
+            ("load.avg_ms", avg),
+            ("load.p50_ms", avg * rng.uniform(0.8, 0.95)),
+            ("load.p95_ms", avg * rng.uniform(1.4, 2.2)),
+            ("load.rps", requests / duration),
+            ("case.completed", 1.0),
+        ):
+            ts += rng.randrange(1, 50)
+            yield _record("B", f"b-{scenario}", metric, run_id, ts, value, dict(tags))
+        hist = _latency_histogram(run_id, scenario, requests, avg)
+        record = _record("B", f"b-{scenario}", LATENCY_HISTOGRAM_METRIC, run_id, ts + 1, hist.mean, dict(tags))
+        record["histogram"] = hist.to_payload()
+        yield record
+
+
+def _suite_c_run(rng: random.Random, run_id: str, ts: int) -> Iterator[dict[str, Any]]:
+    stub = rng.random() < 0.2
+    for case in C_CASES:
+        for step in range(C_STEPS):
+            digest = hashlib.sha256(f"{case}:{step}".encode()).hexdigest()
+            # value is the run's own hash-match flag; a diverged step fails it.
+            matched = 1.0
+            if rng.random() < 0.02:
+                digest = hashlib.sha256(f"{case}:{step}:{run_id}".encode()).hexdigest()
+                matched = 0.0
+            tags: dict[str, Any] = {"step": step}
+            if stub:
+                tags["hash"] = f"[stub] {digest}"
+            else:
+                tags.update({"hash": digest, "llm_mode": "auto", "model": "", "provider": ""})
+            ts += rng.randrange(1, 20)
+            yield _record("C", case, "completion.hash", run_id, ts, matched, tags)
+
+
+def _suite_g_run(rng: random.Random, run_id: str, ts: int) -> Iterator[dict[str, Any]]:
+    for case, scenario in G_CASES.items():
+        tags = {"case": case, "scenario": scenario, **_volatile_tags(rng, run_id)}
+        useful = float(rng.randrange(0, 200)) if scenario != "latency_spike" else 0.0
+        for metric, value in (
+            ("degradation.time_to_first_useful", rng.uniform(-1.0, 10.0) if useful else -1.0),
+            ("degradation.useful_count", useful),
+            ("case.completed", 1.0),
+        ):
+            ts += rng.randrange(1, 20)
+            yield _record("graceful-degradation", case, metric, run_id, ts, value, dict(tags))
+
+
+SUITE_RUNS = {
+    "a": _suite_a_run,
+    "b": _suite_b_run,
+    "c": _suite_c_run,
+    "graceful-degradation": _suite_g_run,
+}
+
+
+def generate_runs(
+    n_records: int,
+    *,
+    seed: int = 0,
+    dup_rate: float = 0.01,
+    start_ts: int = 1767300000000,
+) -> Iterator[tuple[str, str, list[dict[str, Any]]]]:
+    rng = random.Random(seed)
+    emitted = 0
+    ts = start_ts
+    index = 0
+    while emitted < n_records:
+        suite_key = ("a", "a", "b", "c", "graceful-degradation")[index % 5]
+        run_name = f"{suite_key}-{ts}"
+        run_id = f"{run_name}-r{index % 5 + 1}"
+        records: list[dict[str, Any]] = []
+        for record in SUITE_RUNS[suite_key](rng, run_id, ts):
+            if emitted >= n_records:
+                break
+            records.append(record)
+            emitted += 1
+            if emitted < n_records and rng.random() < dup_rate:
+                records.append(dict(record))
+                emitted += 1
+        ts = int(records[-1]["ts"]) + rng.randrange(1000, 60000) if records else ts
+        index += 1
+        yield suite_key, run_name, records
+
+
+def write_metrics(out: Path, n_records: int, *, layout: str = "file", seed: int = 0, dup_rate: float = 0.01) -> int:
+    total = 0
+    if layout == "file":
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with out.open("w", encoding="utf-8") as handle:
+            for _, _, records in generate_runs(n_records, seed=seed, dup_rate=dup_rate):
+                handle.writelines(json.dumps(record, sort_keys=True) + "\n" for record in records)
+                total += len(records)
+        return total
+    for suite_key, run_name, records in generate_runs(n_records, seed=seed, dup_rate=dup_rate):
+        run_dir = out / f"suite_{suite_key}" / run_name
+        run_dir.mkdir(parents=True, exist_ok=True)
+        with (run_dir / "metrics.jsonl").open("a", encoding="utf-8") as handle:
+            handle.writelines(json.dumps(record, sort_keys=True) + "\n" for record in records)
+        total += len(records)
+    return total
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate synthetic metrics.jsonl data mirroring the suite schema.")
+    parser.add_argument("--records", type=float, default=1e4, help="Number of records to emit (e.g. 1e6).")
+    parser.add_argument("--out", type=str, required=True, help="Output metrics.jsonl path, or artifacts dir.")
+    parser.add_argument(
+        "--layout",
+        choices=("file", "artifacts"),
+        default="file",
+        help="Write a single JSONL file or an artifacts/suite_*/<run>/metrics.jsonl tree.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    parser.add_argument("--dup-rate", type=float, default=0.01, help="Fraction of records emitted twice.")
+    args = parser.parse_args()
+
+    total = write_metrics(Path(args.out), int(args.records), layout=args.layout, seed=args.seed, dup_rate=args.dup_rate)
+    print(f"synth: wrote {total} records to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+from record_lib import MetricRecord
+
+# Load generators may flush counters periodically as load.window.* records; each
+# record covers the interval ending at its ts. Only those interval records make
+# a timeline: end-of-run load.* totals carry no time structure, and their ts
+# spread says nothing about the run's duration.
+WINDOW_METRICS = {"requests": "load.window.requests", "errors": "load.window.errors", "latency": "load.window.avg_ms"}
+TIMELINE_METRICS = frozenset(WINDOW_METRICS.values())
+
+
+@dataclass(frozen=True)
+class TimelineConfig:
+    window_s: float = 1.0
+    warmup_s: float = 0.0
+    cooldown_s: float = 0.0
+
+
+@dataclass
+class TimelineCollector:
+    track_digests: bool = False
+    run_ids: list[str] = field(default_factory=list)
+    scenarios: list[str] = field(default_factory=list)
+    metrics: list[str] = field(default_factory=list)
+    ts: list[int] = field(default_factory=list)
+    values: list[float] = field(default_factory=list)
+    digests: list[bytes] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def add_record(self, record: MetricRecord, digest: bytes | None = None) -> None:
+        if record.metric_name not in TIMELINE_METRICS or record.ts is None:
+            return
+        self.add_sample(
+            record.run_id,
+            str(record.tags.get("scenario", "")),
+            record.metric_name,
+            record.ts,
+            record.value,
+            digest,
+        )
+
+    def add_sample(
+        self,
+        run_id: str,
+        scenario: str,
+        metric_name: str,
+        ts: int,
+        value: float,
+        digest: bytes | None = None,
+    ) -> None:
+        self.run_ids.append(run_id)
+        self.scenarios.append(scenario)
+        self.metrics.append(metric_name)
+        self.ts.append(ts)
+        self.values.append(value)
+        if self.track_digests and digest is not None:
+            self.digests.append(digest)
+
+
+def _ratio(num: np.ndarray, den: np.ndarray) -> list[float | None]:
+    out = np.full(num.shape, np.nan)
+    np.divide(num, den, out=out, where=den > 0)
+    return [None if np.isnan(v) else float(v) for v in out]
+
+
+def _scenario_timeline(
+    metric: np.ndarray,
+    values: np.ndarray,
+    rel_s: np.ndarray,
+    to_end_s: np.ndarray,
+    spans_s: np.ndarray,
+    config: TimelineConfig,
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    req, err, lat = (metric == WINDOW_METRICS[kind] for kind in ("requests", "errors", "latency"))
+    window = float(config.window_s)
+    bucket = np.floor(rel_s / window).astype(np.int64)
+    last = np.floor(spans_s / window).astype(np.int64)
+    n_buckets = int(max(bucket.max(initial=0), last.max(initial=0))) + 1
+
+    def _sum(mask: np.ndarray, weighted: bool = True) -> np.ndarray:
+        weights = values[mask] if weighted else None
+        return np.bincount(bucket[mask], weights=weights, minlength=n_buckets).astype(float)
+
+    requests = _sum(req)
+    errors = _sum(err)
+    ended = np.concatenate(([0], np.cumsum(np.bincount(last, minlength=n_buckets))[:-1]))
+    active = (spans_s.size - ended).astype(float)
+    timeline = {
+        "source": "load.window",
+        "t_s": [float(b * window) for b in range(n_buckets)],
+        "requests": requests.tolist(),
+        "errors": errors.tolist(),
+        "active_runs": active.astype(int).tolist(),
+        "rps": _ratio(requests, active * window),
+        "error_rate": _ratio(errors, requests),
+        "latency_ms": _ratio(_sum(lat), _sum(lat, weighted=False)),
+    }
+
+    steady = (rel_s >= config.warmup_s) & (to_end_s >= config.cooldown_s)
+    kept_requests = float(np.sum(values[req & steady]))
+    kept_errors = float(np.sum(values[err & steady]))
+    kept_latency = values[lat & steady]
+    duration = float(np.sum(np.maximum(spans_s - config.warmup_s - config.cooldown_s, 0.0)))
+    steady_state = {
+        "runs": int(spans_s.size),
+        "duration_s": duration,
+        "requests": kept_requests,
+        "trimmed_requests": float(np.sum(values[req])) - kept_requests,
+        "rps": kept_requests / duration if duration > 0 else None,
+        "error_rate": kept_errors / kept_requests if kept_requests > 0 else None,
+        "latency_ms": float(np.mean(kept_latency)) if kept_latency.size else None,
+    }
+    return timeline, steady_state
+
+
+def build_timelines(collector: TimelineCollector, config: TimelineConfig) -> dict[str, Any]:
+    ts = np.asarray(collector.ts, dtype=np.int64)
+    values = np.asarray(collector.values, dtype=float)
+    metric = np.asarray(collector.metrics)
+    scenario = np.asarray(collector.scenarios)
+    keys = np.char.add(np.char.add(np.asarray(collector.run_ids), "\x1f"), scenario)
+    _, unit = np.unique(keys, return_inverse=True)
+    n_units = int(unit.max(initial=-1)) + 1
+    start = np.full(n_units, np.iinfo(np.int64).max, dtype=np.int64)
+    end = np.full(n_units, np.iinfo(np.int64).min, dtype=np.int64)
+    np.minimum.at(start, unit, ts)
+    np.maximum.at(end, unit, ts)
+    rel_s = (ts - start[unit]) / 1000.0
+    to_end_s = (end[unit] - ts) / 1000.0
+    span_s = (end - start) / 1000.0
+
+    scenarios: dict[str, Any] = {}
+    steady_state: dict[str, Any] = {}
+    for name in sorted(set(collector.scenarios)):
+        sel = scenario == name
+        scenarios[name], steady_state[name] = _scenario_timeline(
+            metric[sel], values[sel], rel_s[sel], to_end_s[sel], span_s[np.unique(unit[sel])], config
+        )
+    return {
+        "config": {"window_s": config.window_s, "warmup_s": config.warmup_s, "cooldown_s": config.cooldown_s},
+        "scenarios": scenarios,
+        "steady_state": steady_state,
+    }
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from types import TracebackType
+from typing import Any
+
+from histogram_lib import LatencyHistogram
+from record_lib import MetricRecord, Quarantine, iter_metrics, normalize_tags
+
+# Tags are stored normalized (volatile keys dropped, memory tiers canonical), so
+# a tag set here is exactly what the analysis groups on. Records are keyed by
+# the same content digest the JSONL pipeline dedups on.
+WAREHOUSE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS tagsets (
+    tagset_id INTEGER PRIMARY KEY,
+    tags TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS tags (
+    tagset_id INTEGER NOT NULL REFERENCES tagsets (tagset_id),
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (tagset_id, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tags_by_value ON tags (key, value, tagset_id);
+CREATE TABLE IF NOT EXISTS metric_values (
+    id INTEGER PRIMARY KEY,
+    digest BLOB NOT NULL UNIQUE,
+    suite TEXT NOT NULL,
+    metric_name TEXT NOT NULL,
+    tagset_id INTEGER NOT NULL REFERENCES tagsets (tagset_id),
+    run_id INTEGER REFERENCES runs (run_id),
+    case_id TEXT,
+    ts INTEGER,
+    value REAL NOT NULL,
+    histogram TEXT
+);
+CREATE INDEX IF NOT EXISTS metric_values_by_group ON metric_values (suite, metric_name, tagset_id);
+CREATE INDEX IF NOT EXISTS metric_values_by_metric ON metric_values (metric_name, tagset_id);
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    records INTEGER NOT NULL,
+    ingested_at TEXT NOT NULL
+);
+"""
+INGEST_BATCH = 5000
+
+
+@dataclass(frozen=True)
+class IngestResult:
+    path: str
+    inserted: int
+    duplicates: int
+    skipped: bool = False
+
+
+class MetricsWarehouse:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(WAREHOUSE_SCHEMA)
+        self._tagsets: dict[str, int] = {}
+        self._runs: dict[str, int] = {}
+
+    def __enter__(self) -> MetricsWarehouse:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _tagset_id(self, tags: dict[str, str]) -> int:
+        key = json.dumps(tags, sort_keys=True)
+        tagset_id = self._tagsets.get(key)
+        if tagset_id is None:
+            row = self._conn.execute("SELECT tagset_id FROM tagsets WHERE tags = ?", (key,)).fetchone()
+            if row is None:
+                tagset_id = int(self._conn.execute("INSERT INTO tagsets (tags) VALUES (?)", (key,)).lastrowid or 0)
+                self._conn.executemany(
+                    "INSERT INTO tags (tagset_id, key, value) VALUES (?, ?, ?)",
+                    [(tagset_id, k, v) for k, v in tags.items()],
+                )
+            else:
+                tagset_id = int(row[0])
+            self._tagsets[key] = tagset_id
+        return tagset_id
+
+    def _run_id(self, name: str) -> int | None:
+        if not name:
+            return None
+        run_id = self._runs.get(name)
+        if run_id is None:
+            self._conn.execute("INSERT OR IGNORE INTO runs (name) VALUES (?)", (name,))
+            run_id = int(self._conn.execute("SELECT run_id FROM runs WHERE name = ?", (name,)).fetchone()[0])
+            self._runs[name] = run_id
+        return run_id
+
+    def ingest(self, records: Iterable[MetricRecord]) -> tuple[int, int]:
+        sql = (
+            "INSERT OR IGNORE INTO metric_values "
+            "(digest, suite, metric_name, tagset_id, run_id, case_id, ts, value, histogram) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+        )
+        seen = inserted = 0
+        batch: list[tuple[Any, ...]] = []
+        with self._conn:
+            for record in records:
+                histogram = json.dumps(record.histogram.to_payload()) if record.histogram is not None else None
+                batch.append(
+                    (
+                        record.digest,
+                        record.suite,
+                        record.metric_name,
+                        self._tagset_id(normalize_tags(record.tags)),
+                        self._run_id(record.run_id),
+                        record.case or None,
+                        record.ts,
+                        record.value,
+                        histogram,
+                    )
+                )
+                if len(batch) >= INGEST_BATCH:
+                    inserted += self._conn.executemany(sql, batch).rowcount
+                    seen += len(batch)
+                    batch.clear()
+            if batch:
+                inserted += self._conn.executemany(sql, batch).rowcount
+                seen += len(batch)
+        return inserted, seen - inserted
+
+    def ingest_file(self, path: Path, *, quarantine: Quarantine | None = None) -> IngestResult:
+        stat = path.stat()
+        source = str(path.resolve())
+        row = self._conn.execute("SELECT size, mtime_ns FROM sources WHERE path = ?", (source,)).fetchone()
+        if row is not None and tuple(row) == (stat.st_size, stat.st_mtime_ns):
+            return IngestResult(path=str(path), inserted=0, duplicates=0, skipped=True)
+        inserted, duplicates = self.ingest(iter_metrics(path, quarantine=quarantine))
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sources (path, size, mtime_ns, records, ingested_at) VALUES (?, ?, ?, ?, ?)",
+                (
+                    source,
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                    inserted + duplicates,
+                    datetime.now(timezone.utc).isoformat(),
+                ),
+            )
+        return IngestResult(path=str(path), inserted=inserted, duplicates=duplicates)
+
+    def iter_records(self) -> Iterator[MetricRecord]:
+        tagsets = {
+            int(tagset_id): json.loads(tags)
+            for tagset_id, tags in self._conn.execute("SELECT tagset_id, tags FROM tagsets")
+        }
+        rows = self._conn.execute(
+            "SELECT m.digest, m.suite, m.metric_name, m.tagset_id, r.name, m.case_id, m.ts, m.value, m.histogram "
+            "FROM metric_values m LEFT JOIN runs r ON r.run_id = m.run_id ORDER BY m.id"
+        )
+        for digest, suite, metric_name, tagset_id, run_id, case, ts, value, histogram in rows:
+            yield MetricRecord(
+                suite=suite,
+                metric_name=metric_name,
+                value=value,
+                run_id=run_id or "",
+                case=case or "",
+                ts=ts,
+                tags=tagsets[tagset_id],
+                histogram=LatencyHistogram.from_payload(json.loads(histogram)) if histogram else None,
+                _digest=bytes(digest),
+            )
+
+    def query(
+        self,
+        metric: str,
+        *,
+        by: list[str],
+        where: dict[str, str],
+        suite: str | None = None,
+    ) -> list[dict[str, Any]]:
+        joins: list[str] = []
+        params: list[Any] = []
+        for i, key in enumerate(by):
+            joins.append(f"JOIN tags b{i} ON b{i}.tagset_id = m.tagset_id AND b{i}.key = ?")
+            params.append(key)
+        for i, (key, value) in enumerate(where.items()):
+            joins.append(f"JOIN tags w{i} ON w{i}.tagset_id = m.tagset_id AND w{i}.key = ? AND w{i}.value = ?")
+            params += [key, value]
+        conditions = ["m.metric_name GLOB ?"]
+        params.append(metric)
+        if suite is not None:
+            conditions.append("m.suite = ?")
+            params.append(suite)
+        columns = ["m.metric_name"] + [f"b{i}.value" for i in range(len(by))]
+        keys = ", ".join(f"k{i}" for i in range(len(columns)))
+        selected = ", ".join(f"{column} AS k{i}" for i, column in enumerate(columns))
+        # Two passes: the group mean comes from a window over the selection and
+        # the variance sums squared deviations from it. AVG(x*x) - AVG(x)^2
+        # cancels catastrophically when the mean dwarfs the spread.
+        sql = (
+            f"WITH sel AS (SELECT {selected}, m.value AS v "
+            f"FROM metric_values m {' '.join(joins)} WHERE {' AND '.join(conditions)}), "
+            f"dev AS (SELECT {keys}, v, v - AVG(v) OVER (PARTITION BY {keys}) AS d FROM sel) "
+            f"SELECT {keys}, COUNT(*), AVG(v), SUM(d * d), MIN(v), MAX(v) "
+            f"FROM dev GROUP BY {keys} ORDER BY {keys}"
+        )
+        rows: list[dict[str, Any]] = []
+        for row in self._conn.execute(sql, params):
+            n, avg, sq, lo, hi = row[-5:]
+            var = sq / (n - 1) if n > 1 else 0.0
+            out: dict[str, Any] = {"metric_name": row[0]}
+            out.update(zip(by, row[1 : 1 + len(by)]))
+            out.update({"n": int(n), "mean": float(avg), "std": var**0.5, "min": float(lo), "max": float(hi)})
+            rows.append(out)
+        return rows
+
+
+def iter_warehouse_records(path: Path) -> Iterator[MetricRecord]:
+    with MetricsWarehouse(path) as warehouse:
+        yield from warehouse.iter_records()
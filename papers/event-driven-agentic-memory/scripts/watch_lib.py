@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+from record_lib import MetricRecord, Quarantine, decode_lines
+
+
+@dataclass
+class _TailState:
+    inode: int = 0
+    offset: int = 0
+    lines: int = 0
+    partial: bytes = b""
+
+
+class MetricsTail:
+    # Lines are decoded as they are tailed. A malformed line (bad JSON or a
+    # schema violation) goes to the quarantine and is never retried, so one
+    # bad write cannot wedge every later refresh.
+    def __init__(self, quarantine: Quarantine | None = None) -> None:
+        self.quarantine = quarantine if quarantine is not None else Quarantine()
+        self._states: dict[Path, _TailState] = {}
+        self._seen: set[bytes] = set()
+        self.records: list[MetricRecord] = []
+
+    def poll(self, paths: list[Path]) -> list[MetricRecord]:
+        fresh: list[MetricRecord] = []
+        for path in paths:
+            for record in self._read_new(path):
+                if record.digest in self._seen:
+                    continue
+                self._seen.add(record.digest)
+                fresh.append(record)
+        self.records.extend(fresh)
+        return fresh
+
+    def _read_new(self, path: Path) -> list[MetricRecord]:
+        try:
+            stat = path.stat()
+        except OSError:
+            return []
+        state = self._states.setdefault(path, _TailState())
+        if stat.st_ino != state.inode or stat.st_size < state.offset:
+            state.inode = stat.st_ino
+            state.offset = 0
+            state.lines = 0
+            state.partial = b""
+        if stat.st_size == state.offset:
+            return []
+        with path.open("rb") as handle:
+            handle.seek(state.offset)
+            chunk = handle.read(stat.st_size - state.offset)
+        state.offset += len(chunk)
+        lines = (state.partial + chunk).split(b"\n")
+        state.partial = lines.pop()
+        if state.partial.strip():
+            try:
+                tail_record = json.loads(state.partial)
+            except ValueError:
+                tail_record = None
+            if tail_record is not None:
+                lines.append(state.partial)
+                state.partial = b""
+        start = state.lines + 1
+        state.lines += len(lines)
+        text = (line.decode("utf-8", errors="replace") for line in lines)
+        return list(decode_lines(text, str(path), quarantine=self.quarantine, start=start))
+
+
+async def watch_metrics(
+    discover: Callable[[], list[Path]],
+    on_update: Callable[[list[MetricRecord], set[str] | None], None],
+    *,
+    poll_interval: float = 1.0,
+    debounce: float = 2.0,
+    stop: asyncio.Event | None = None,
+    quarantine: Quarantine | None = None,
+    label: str = "watch",
+) -> None:
+    loop = asyncio.get_running_loop()
+    stop = stop or asyncio.Event()
+    tail = MetricsTail(quarantine)
+    rejected = 0
+
+    def _poll() -> list[MetricRecord]:
+        nonlocal rejected
+        fresh = tail.poll(discover())
+        report = tail.quarantine.report()
+        if report["rejected"] > rejected:
+            reasons = ", ".join(f"{reason}={count}" for reason, count in report["reasons"].items())
+            line = f"{label}: skipped {report['rejected'] - rejected} malformed line(s) ({reasons} so far)"
+            if report["quarantine"]:
+                line += f"; see {report['quarantine']}"
+            print(line)
+            rejected = report["rejected"]
+        return fresh
+
+    await asyncio.to_thread(_poll)
+    rendered = bool(tail.records)
+    if rendered:
+        await asyncio.to_thread(on_update, list(tail.records), None)
+
+    pending: set[str] = set()
+    last_change = 0.0
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=poll_interval)
+        except asyncio.TimeoutError:
+            pass
+        fresh = await asyncio.to_thread(_poll)
+        if fresh:
+            pending.update(record.metric_name for record in fresh)
+            last_change = loop.time()
+        if pending and loop.time() - last_change >= debounce:
+            changed: set[str] | None = pending if rendered else None
+            pending = set()
+            rendered = True
+            await asyncio.to_thread(on_update, list(tail.records), changed)
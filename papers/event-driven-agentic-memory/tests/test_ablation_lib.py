@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+from ablation_lib import AblationConfig, read_cached, write_cached  # noqa: E402
+
+RESULT: dict[str, list[dict[str, object]]] = {"summaries": [], "ablation": []}
+
+
+def test_cache_keeps_one_file_per_config(tmp_path: Path) -> None:
+    config, other = AblationConfig(), AblationConfig(baseline_tier="vector")
+    for fingerprint in ("run-1", "run-2", "run-3"):
+        write_cached(tmp_path, config, fingerprint, RESULT)
+    write_cached(tmp_path, other, "run-3", RESULT)
+    assert len(list(tmp_path.glob("ablation-*.json"))) == 2
+    assert read_cached(tmp_path, config, "run-1") is None
+    assert read_cached(tmp_path, config, "run-3") == RESULT
+    assert read_cached(tmp_path, other, "run-3") == RESULT
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+from backend_lib import CrossCheckConfig, NumpyBackend, ScipyBackend  # noqa: E402
+
+stats = pytest.importorskip("scipy.stats")
+
+
+@pytest.mark.parametrize(("n1", "n2"), [(20, 20000), (150, 30000)])
+def test_ks_backends_agree_on_unbalanced_samples(n1: int, n2: int) -> None:
+    rng = np.random.default_rng(7)
+    a = np.round(rng.normal(size=n1), 2)
+    b = np.round(rng.normal(0.3, size=n2), 2)
+    numpy_backend, scipy_backend = NumpyBackend(), ScipyBackend()
+    values, inverse = np.unique(np.concatenate([a, b]), return_inverse=True)
+    ca = np.bincount(inverse[:n1], minlength=values.size)
+    cb = np.bincount(inverse[n1:], minlength=values.size)
+    results = [
+        numpy_backend.ks_test(a, b),
+        numpy_backend.ks_test_counts(values, ca, cb),
+        scipy_backend.ks_test(a, b),
+        scipy_backend.ks_test_counts(values, ca, cb),
+    ]
+    config = CrossCheckConfig("numpy")
+    reference = results[-1].p_value
+    for result in results:
+        assert math.isclose(result.p_value, reference, rel_tol=config.rtol, abs_tol=config.atol)
+    method = "exact" if n1 * n2 / (n1 + n2) <= 140 else "asymp"
+    assert math.isclose(stats.ks_2samp(a, b, method=method).pvalue, reference, rel_tol=1e-9)
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+SCRIPTS = Path(__file__).resolve().parents[1] / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+import plots_lib  # noqa: E402
+from output_lib import output_generation, write_text_atomic  # noqa: E402
+from plots_lib import FigureOutput, _decimate_steps, _ecdf_points, _figure_output, _save_fig  # noqa: E402
+
+BUDGET = 64
+
+
+def _figure() -> tuple[object, object, object]:
+    fig, ax = plots_lib.plt.subplots()
+    rng = np.random.default_rng(0)
+    x = np.arange(5000, dtype=float)
+    dense = ax.plot(x, rng.normal(size=x.size))[0]
+    steps = ax.step(*_decimate_steps(x, np.cumsum(rng.normal(size=x.size)), BUDGET), where="post")[0]
+    ecdf = ax.step(*_ecdf_points(rng.normal(size=x.size), BUDGET), where="post")[0]
+    return fig, dense, (steps, ecdf)
+
+
+def test_svg_rasterizes_only_undecimated_artists(tmp_path: Path) -> None:
+    fig, dense, decimated = _figure()
+    with _figure_output(FigureOutput(formats=("png", "svg")), BUDGET):
+        _save_fig(fig, tmp_path, "dense")
+    assert dense.get_rasterized()
+    assert not any(line.get_rasterized() for line in decimated)
+    svg = (tmp_path / "dense.svg").read_text(encoding="utf-8")
+    assert "<image" in svg
+    assert (tmp_path / "dense.png").exists()
+
+
+def test_png_only_output_leaves_artists_vector(tmp_path: Path) -> None:
+    fig, dense, _ = _figure()
+    with _figure_output(FigureOutput(formats=("png",)), BUDGET):
+        _save_fig(fig, tmp_path, "dense")
+    assert not dense.get_rasterized()
+
+
+def test_analysis_read_waits_for_a_publishing_writer(tmp_path: Path) -> None:
+    path = tmp_path / "analysis.json"
+    write_text_atomic(path, json.dumps({"generation": 1}))
+    script = (
+        "import pathlib, plots_lib, sys; print('ready', flush=True); "
+        "print(plots_lib._load_analysis(pathlib.Path(sys.argv[1]))['generation'])"
+    )
+    env = {**os.environ, "PYTHONPATH": str(SCRIPTS)}
+    with output_generation(tmp_path):
+        write_text_atomic(path, json.dumps({"generation": 2}))
+        reader = subprocess.Popen([sys.executable, "-c", script, str(path)], env=env, stdout=subprocess.PIPE, text=True)
+        assert reader.stdout is not None and reader.stdout.readline().strip() == "ready"
+        time.sleep(0.5)
+        assert reader.poll() is None
+    out, _ = reader.communicate(timeout=30)
+    assert out.strip() == "2"
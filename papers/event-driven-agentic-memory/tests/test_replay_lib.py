@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+import analyze_metrics  # noqa: E402
+
+
+def _record(run_id: str, digest: str, value: float) -> dict[str, object]:
+    return {
+        "suite": "C",
+        "metric_name": "completion.hash",
+        "value": value,
+        "run_id": run_id,
+        "case": "c1",
+        "tags": {"step": 0, "hash": digest, "llm_mode": "auto"},
+    }
+
+
+def _analyze(tmp_path: Path, records: list[dict[str, object]]) -> tuple[dict[str, object], str]:
+    metrics = tmp_path / "metrics.jsonl"
+    metrics.write_text("".join(json.dumps(r) + "\n" for r in records), encoding="utf-8")
+    out, tables = tmp_path / "out", tmp_path / "tables"
+    analyze_metrics.main(["--metrics", str(metrics), "--output-dir", str(out), "--tables-dir", str(tables)])
+    analysis = json.loads((out / "analysis.json").read_text(encoding="utf-8"))
+    return analysis, (tables / "summary_anchor.tex").read_text(encoding="utf-8")
+
+
+def test_anchor_counts_values_when_hashes_all_differ(tmp_path: Path) -> None:
+    # Live completions differ run to run; every run still reports a match.
+    analysis, anchor = _analyze(tmp_path, [_record(f"r{i}", f"h{i}", 1.0) for i in range(5)])
+    assert "5/5 (hash match)" in anchor
+    assert analysis["replay"]["diverged"] == 4
+    assert abs(analysis["replay"]["consensus_rate"] - 0.2) < 1e-12
+
+
+def test_anchor_counts_values_when_hashes_agree(tmp_path: Path) -> None:
+    analysis, anchor = _analyze(tmp_path, [_record(f"r{i}", "h", 0.0 if i else 1.0) for i in range(3)])
+    assert "1/3 (hash match)" in anchor
+    assert analysis["replay"]["diverged"] == 0
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+from record_lib import MetricRecord  # noqa: E402
+from sequential_lib import RunMeans, SequentialConfig, advise  # noqa: E402
+
+METRICS = ("m.fast", "m.slow")
+
+
+def _add(runs: RunMeans, metric: str, tier: str, run_id: str, value: float) -> None:
+    runs.add(
+        MetricRecord(
+            suite="A",
+            metric_name=metric,
+            value=value,
+            run_id=run_id,
+            tags={"memory_tier": tier},
+            raw={"metric_name": metric, "run_id": run_id, "tier": tier, "value": value},
+        )
+    )
+
+
+def _metrics(advice: dict[str, object]) -> dict[str, dict[str, object]]:
+    (condition,) = advice["conditions"]
+    return condition["metrics"]
+
+
+def test_stopped_metric_stays_stopped_at_later_looks() -> None:
+    config = SequentialConfig(max_runs=20, min_runs=3, primary_metrics=METRICS)
+    runs = RunMeans(METRICS)
+    for i in range(6):
+        # m.fast separates at once; m.slow is a tie that keeps the condition running.
+        _add(runs, "m.fast", "graph", f"g{i}", 10.0 + 0.01 * i)
+        _add(runs, "m.fast", "no-memory", f"b{i}", 0.0 + 0.01 * i)
+        _add(runs, "m.slow", "graph", f"g{i}", float(i % 2))
+        _add(runs, "m.slow", "no-memory", f"b{i}", float((i + 1) % 2))
+    first = advise(runs, config)
+    assert _metrics(first)["m.fast"]["decision"] == "stop"
+    assert first["conditions"][0]["decision"] == "continue"
+
+    for i in range(6, 12):
+        # Later runs erase the gap; the earlier efficacy stop must not be revoked.
+        _add(runs, "m.fast", "graph", f"g{i}", -10.0)
+        _add(runs, "m.fast", "no-memory", f"b{i}", 0.0)
+        _add(runs, "m.slow", "graph", f"g{i}", float(i % 2))
+        _add(runs, "m.slow", "no-memory", f"b{i}", float((i + 1) % 2))
+    second = advise(runs, config, first)
+    fast = _metrics(second)["m.fast"]
+    assert fast["decision"] == "stop"
+    assert fast["reason"] == "efficacy"
+    assert fast == _metrics(first)["m.fast"]
+    assert len(_metrics(second)["m.slow"]["looks"]) == 2
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+from analysis_lib import aggregate_metrics  # noqa: E402
+from record_lib import MetricRecord  # noqa: E402
+from timeline_lib import TimelineConfig  # noqa: E402
+
+
+def _load(run_id: str, metric: str, ts: int, value: float) -> MetricRecord:
+    return MetricRecord(
+        suite="B",
+        metric_name=metric,
+        value=value,
+        run_id=run_id,
+        ts=ts,
+        tags={"scenario": "steady"},
+        raw={"run_id": run_id, "metric_name": metric, "ts": ts},
+    )
+
+
+def _summary_run(run_id: str, ts: int) -> list[MetricRecord]:
+    # End-of-run totals for a ~10 s run, flushed a few hundred ms apart.
+    return [
+        _load(run_id, "load.requests", ts, 100.0),
+        _load(run_id, "load.errors", ts + 300, 2.0),
+        _load(run_id, "load.avg_ms", ts + 600, 40.0),
+        _load(run_id, "load.rps", ts + 650, 10.0),
+    ]
+
+
+def test_summary_only_input_builds_no_timeline() -> None:
+    records = _summary_run("r1", 1_000) + _summary_run("r2", 50_000)
+    analysis = aggregate_metrics(records, timeline_config=TimelineConfig())
+    assert "timelines" not in analysis
+    rps = next(g for g in analysis["groups"] if g["metric_name"] == "load.rps")
+    assert rps["mean"] == 10.0
+
+
+def test_window_records_build_the_timeline() -> None:
+    records = _summary_run("r1", 1_000)
+    for second in range(1, 11):
+        ts = 1_000 + second * 1_000
+        records += [
+            _load("r1", "load.window.requests", ts, 10.0),
+            _load("r1", "load.window.errors", ts, 0.0),
+            _load("r1", "load.window.avg_ms", ts, 40.0),
+        ]
+    analysis = aggregate_metrics(records, timeline_config=TimelineConfig())
+    assert analysis["timelines"]["scenarios"]["steady"]["source"] == "load.window"
+    steady = analysis["timelines"]["steady_state"]["steady"]
+    assert steady["requests"] == 100.0
+    assert 9.0 <= steady["rps"] <= 12.0
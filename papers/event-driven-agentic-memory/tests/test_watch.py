@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+import analyze_metrics  # noqa: E402
+import plots_lib  # noqa: E402
+
+
+def test_watch_survives_failing_refreshes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    failures = iter([RuntimeError("analysis"), None, None, None])
+    drawn: list[Any] = []
+
+    def _analysis(*args: Any, **kwargs: Any) -> None:
+        exc = next(failures)
+        if exc is not None:
+            raise exc
+
+    def _figures(analysis: Path, figures_dir: Path, *, metric_names: set[str] | None = None) -> None:
+        drawn.append(metric_names)
+        if len(drawn) == 1:
+            raise KeyError("missing group")
+
+    async def _watch_metrics(discover: Any, on_update: Any, **kwargs: Any) -> None:
+        for changed in (None, {"a"}, {"b"}, {"c"}):
+            on_update([], changed)
+
+    monkeypatch.setattr(analyze_metrics, "_write_analysis_outputs", _analysis)
+    monkeypatch.setattr(analyze_metrics, "watch_metrics", _watch_metrics)
+    monkeypatch.setattr(plots_lib, "generate_figures", _figures)
+    analyze_metrics._watch(
+        [],
+        tmp_path / "out",
+        tmp_path / "tables",
+        tmp_path / "figures",
+        poll_interval=0.0,
+        debounce=0.0,
+        sketch_config=None,
+        bootstrap_config=None,
+        values_config=None,
+        timeline_config=None,
+        quarantine=None,
+    )
+    # The failed analysis and the failed figure pass each force a full redraw next.
+    assert drawn == [None, None, {"c"}]